@@ -0,0 +1,217 @@
+# File: backend/admission.py
+
+import asyncio
+import bisect
+import itertools
+import math
+import time
+from typing import Any, Callable, Dict, List, Optional
+from starlette.responses import JSONResponse
+from tracing import span
+
+# Request priorities; lower values are admitted first
+PRIORITY_HIGH = 0
+PRIORITY_NORMAL = 1
+PRIORITY_LOW = 2
+
+PRIORITY_NAMES = {PRIORITY_HIGH: "high", PRIORITY_NORMAL: "normal", PRIORITY_LOW: "low"}
+
+class AdmissionRejected(Exception):
+    """A request was shed instead of admitted."""
+
+    def __init__(self, reason: str, retry_after_seconds: float):
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after_seconds = retry_after_seconds
+
+class _Waiter:
+    __slots__ = ("priority", "seq", "user_id", "future")
+
+    def __init__(self, priority: int, seq: int, user_id: str, future: asyncio.Future):
+        self.priority = priority
+        self.seq = seq
+        self.user_id = user_id
+        self.future = future
+
+    def __lt__(self, other: "_Waiter") -> bool:
+        return (self.priority, self.seq) < (other.priority, other.seq)
+
+class AdmissionController:
+    """
+    Bounded request concurrency for one worker process, with priorities and per-user fairness.
+
+    At most `max_concurrency` requests run at once, and at most `per_user_limit` of
+    them for one user. Requests beyond that wait in a queue ordered by priority,
+    then arrival, and are shed once they have waited `queue_timeout_seconds`. When
+    the queue is full, a new request takes the place of the newest waiter of a
+    lower priority, or is shed straight away if there is none.
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int = 64,
+        per_user_limit: int = 8,
+        queue_timeout_seconds: float = 1.0,
+        max_queue: int = 256
+    ):
+        self.max_concurrency = max_concurrency
+        self.per_user_limit = per_user_limit
+        self.queue_timeout_seconds = queue_timeout_seconds
+        self.max_queue = max_queue
+        self._waiters: List[_Waiter] = []  # sorted: priority, then arrival
+        self._active_by_user: Dict[str, int] = {}
+        self._seq = itertools.count()
+        self.active = 0
+        self.admitted = 0
+        self.queued = 0
+        self.shed: Dict[str, int] = {"timeout": 0, "queue_full": 0, "preempted": 0}
+        self.shed_by_priority: Dict[str, int] = {name: 0 for name in PRIORITY_NAMES.values()}
+        self.max_queue_wait_seconds = 0.0
+
+    async def acquire(self, priority: int, user_id: str) -> None:
+        """Wait for a slot, or raise AdmissionRejected if the request is shed."""
+        if not self._waiters and self._can_run(user_id):
+            self._start(user_id)
+            return
+
+        if len(self._waiters) >= self.max_queue:
+            newest = self._waiters[-1]
+            if newest.priority <= priority:
+                self._count_shed("queue_full", priority)
+                raise AdmissionRejected("Server is busy", self.queue_timeout_seconds)
+            self._waiters.pop()
+            self._count_shed("preempted", newest.priority)
+            newest.future.set_exception(AdmissionRejected("Server is busy", self.queue_timeout_seconds))
+
+        waiter = _Waiter(priority, next(self._seq), user_id, asyncio.get_running_loop().create_future())
+        bisect.insort(self._waiters, waiter)
+        self.queued += 1
+        # Slots may be free for this user while the queued requests wait on their own user's limit
+        self._dispatch()
+        started = time.monotonic()
+        try:
+            done, _ = await asyncio.wait([waiter.future], timeout=self.queue_timeout_seconds)
+        except BaseException:
+            # Client went away while queued
+            self._abandon(waiter)
+            raise
+        self.max_queue_wait_seconds = max(self.max_queue_wait_seconds, time.monotonic() - started)
+        if not done:
+            self._remove(waiter)
+            self._count_shed("timeout", priority)
+            raise AdmissionRejected("Request waited too long to be served", self.queue_timeout_seconds)
+        waiter.future.result()
+
+    def release(self, user_id: str) -> None:
+        self.active -= 1
+        remaining = self._active_by_user[user_id] - 1
+        if remaining:
+            self._active_by_user[user_id] = remaining
+        else:
+            del self._active_by_user[user_id]
+        self._dispatch()
+
+    def _can_run(self, user_id: str) -> bool:
+        return self.active < self.max_concurrency and self._active_by_user.get(user_id, 0) < self.per_user_limit
+
+    def _start(self, user_id: str) -> None:
+        self.active += 1
+        self.admitted += 1
+        self._active_by_user[user_id] = self._active_by_user.get(user_id, 0) + 1
+
+    def _dispatch(self) -> None:
+        """Admit waiters in priority order, skipping users already at their limit."""
+        index = 0
+        while index < len(self._waiters) and self.active < self.max_concurrency:
+            waiter = self._waiters[index]
+            if self._active_by_user.get(waiter.user_id, 0) >= self.per_user_limit:
+                index += 1
+                continue
+            del self._waiters[index]
+            self._start(waiter.user_id)
+            waiter.future.set_result(None)
+
+    def _remove(self, waiter: _Waiter) -> None:
+        index = bisect.bisect_left(self._waiters, waiter)
+        if index < len(self._waiters) and self._waiters[index] is waiter:
+            del self._waiters[index]
+
+    def _abandon(self, waiter: _Waiter) -> None:
+        if not waiter.future.done():
+            self._remove(waiter)
+            waiter.future.cancel()
+        elif not waiter.future.cancelled() and waiter.future.exception() is None:
+            # Admitted just before the client went away: give the slot back
+            self.release(waiter.user_id)
+
+    def _count_shed(self, reason: str, priority: int) -> None:
+        self.shed[reason] += 1
+        self.shed_by_priority[PRIORITY_NAMES[priority]] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        queue_depth = {name: 0 for name in PRIORITY_NAMES.values()}
+        for waiter in self._waiters:
+            queue_depth[PRIORITY_NAMES[waiter.priority]] += 1
+        return {
+            "active": self.active,
+            "max_concurrency": self.max_concurrency,
+            "queue_depth": len(self._waiters),
+            "queue_depth_by_priority": queue_depth,
+            "admitted": self.admitted,
+            "queued": self.queued,
+            "shed": dict(self.shed),
+            "shed_by_priority": dict(self.shed_by_priority),
+            "max_queue_wait_seconds": round(self.max_queue_wait_seconds, 3),
+        }
+
+def header_value(scope: Dict[str, Any], name: bytes) -> Optional[str]:
+    for key, value in scope.get("headers", []):
+        if key == name:
+            return value.decode("latin-1")
+    return None
+
+class AdmissionMiddleware:
+    """
+    ASGI middleware that passes each HTTP request through an AdmissionController.
+
+    `classify(scope)` gives the request's priority, or None to let it through
+    unqueued. `reject_body(scope, reason)` builds the JSON body of a 503.
+    """
+
+    def __init__(
+        self,
+        app,
+        controller: AdmissionController,
+        classify: Callable[[Dict[str, Any]], Optional[int]],
+        reject_body: Callable[[Dict[str, Any], str], Dict[str, Any]]
+    ):
+        self.app = app
+        self.controller = controller
+        self.classify = classify
+        self.reject_body = reject_body
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        priority = self.classify(scope)
+        if priority is None:
+            await self.app(scope, receive, send)
+            return
+
+        user_id = header_value(scope, b"x-user-id") or ""
+        try:
+            with span("admission.wait", priority=PRIORITY_NAMES[priority]):
+                await self.controller.acquire(priority, user_id)
+        except AdmissionRejected as e:
+            response = JSONResponse(
+                content=self.reject_body(scope, e.reason),
+                status_code=503,
+                headers={"Retry-After": str(max(1, math.ceil(e.retry_after_seconds)))}
+            )
+            await response(scope, receive, send)
+            return
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.controller.release(user_id)
@@ -1,22 +1,48 @@
-from fastapi import FastAPI, Request, Response, Depends, HTTPException, status
+from fastapi import FastAPI, Request, Response, Depends, HTTPException, Query, status
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 from fastapi.encoders import jsonable_encoder
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, StreamingResponse, PlainTextResponse
 from slowapi import Limiter, _rate_limit_exceeded_handler
 from slowapi.util import get_remote_address
 from slowapi.errors import RateLimitExceeded
-from typing import Dict, Any, List, Optional, TypedDict, Union
-from pydantic import BaseModel, Field, validator
-from datetime import datetime, timezone
+from typing import Dict, Any, AsyncIterator, List, Optional, Set, Tuple, TypedDict, Union
+from pydantic import BaseModel, Field, ValidationError, validator
+from datetime import datetime, timezone, timedelta
 import os
 import uuid
 from dotenv import load_dotenv
-from cosmos_db import CosmosDBManager
-import humps
+from cosmos_db import CosmosDBManager, encode_cursor, decode_cursor, TOMBSTONE_TYPE
+from date_utils import parse_iso_datetime
+from case_conversion import convert_case, snake_to_camel
+from models import parse_change_data, serialize_document
+from search_index import SearchIndexManager
+from dashboard import DashboardAggregator, dashboard_summary, DASHBOARD_ID, DASHBOARD_TYPE
+from completion_history import CompletionHistoryArchive
+from sync_coalescer import coalesce_changes, CANCELLED
+from field_merge import change_versions, stamp_fields, merge_fields, changed_fields
+from bulk_operations import BulkUpdater, BulkLimitExceeded, patch_task, INCREMENT_FIELDS, PROTECTED_FIELDS
+from sync_stream import SyncStreamIngest, SyncStreamReader, SyncStreamError, IngestingStreamingResponse
+from idempotency import IdempotencyStore, IdempotencyKeyReused, CachedResponse
+from change_broadcaster import ChangeBroadcaster
+from single_flight import SingleFlight
+from write_journal import WriteJournal, WriteBehindFlusher, merge_pending
+from storage_throttle import StorageOverloaded
+from traffic_recorder import TrafficRecorder, RecorderMiddleware
+from request_profiler import RequestProfiler, ProfilerMiddleware
+from admission import AdmissionController, AdmissionMiddleware, PRIORITY_HIGH, PRIORITY_NORMAL, PRIORITY_LOW, header_value
+from tracing import Tracer, TracingMiddleware, span
+from user_actors import UserActorSystem, UserState
+from starlette.concurrency import run_in_threadpool
+from starlette.requests import ClientDisconnect
+from azure.cosmos import exceptions
 import traceback
 import json
+import hashlib
+import asyncio
+import math
+import secrets
 from urllib.parse import quote
 
 # Load environment variables
@@ -27,6 +53,76 @@ app = FastAPI(title="Life Manager API",
               description="API for Life Manager application",
               version="1.0.0")
 
+# Opt-in sampling profiler: requests with `X-Profile: <PROFILE_TOKEN>`, plus a random
+# PROFILE_SAMPLE_RATE share, are profiled. Innermost, so only the handler's time is sampled.
+request_profiler = RequestProfiler(
+    os.environ.get("PROFILE_DIR", "profiles"),
+    token=os.environ.get("PROFILE_TOKEN") or None,
+    sample_rate=float(os.environ.get("PROFILE_SAMPLE_RATE", "0")),
+    interval_seconds=float(os.environ.get("PROFILE_INTERVAL_MS", "5")) / 1000,
+    max_seconds=float(os.environ.get("PROFILE_MAX_SECONDS", "30"))
+)
+if request_profiler.enabled:
+    app.add_middleware(ProfilerMiddleware, profiler=request_profiler, exempt_prefixes=["/api/v1/events", "/api/v1/profiles/"])
+
+# Admission control: bounded concurrency per worker, queued by route priority
+admission_controller = AdmissionController(
+    max_concurrency=int(os.environ.get("ADMISSION_MAX_CONCURRENCY", "64")),
+    per_user_limit=int(os.environ.get("ADMISSION_PER_USER_LIMIT", "8")),
+    queue_timeout_seconds=float(os.environ.get("ADMISSION_QUEUE_TIMEOUT_SECONDS", "1")),
+    max_queue=int(os.environ.get("ADMISSION_MAX_QUEUE", "256"))
+)
+ADMISSION_SMALL_SYNC_BYTES = int(os.environ.get("ADMISSION_SMALL_SYNC_BYTES", "65536"))
+ADMISSION_LOW_PRIORITY_PATHS = {"/api/v1/user-data", "/api/v1/tasks/archive", "/api/v1/tasks/bulk", "/api/v1/sync/stream"}
+ADMISSION_EXEMPT_PATHS = {"/api/v1/events", "/api/v1/metrics"}
+
+def admission_priority(scope: Dict[str, Any]) -> Optional[int]:
+    """
+    Priority of a request: small syncs first, bulk loads last.
+    Static files, the push channel and metrics are not queued.
+    """
+    path = scope["path"]
+    if not path.startswith("/api/") or path in ADMISSION_EXEMPT_PATHS:
+        return None
+    if path == "/api/v1/sync":
+        size = header_value(scope, b"content-length")
+        if size and size.isdigit() and int(size) <= ADMISSION_SMALL_SYNC_BYTES:
+            return PRIORITY_HIGH
+        return PRIORITY_NORMAL
+    if path in ADMISSION_LOW_PRIORITY_PATHS:
+        return PRIORITY_LOW
+    return PRIORITY_NORMAL
+
+def admission_rejected_body(scope: Dict[str, Any], reason: str) -> Dict[str, Any]:
+    return create_api_response(success=False, error={"code": 503, "message": reason}, request=Request(scope))
+
+ADMISSION_CONTROL_ENABLED = os.environ.get("ADMISSION_CONTROL_ENABLED", "true").lower() == "true"
+if ADMISSION_CONTROL_ENABLED:
+    # Added before CORS so that shed responses still get CORS headers
+    app.add_middleware(
+        AdmissionMiddleware,
+        controller=admission_controller,
+        classify=admission_priority,
+        reject_body=admission_rejected_body
+    )
+
+# Opt-in request tracing: per-stage and per-storage-call spans, kept in memory for
+# /api/v1/debug/traces and optionally appended to TRACE_EXPORT_FILE. Wraps admission
+# control, so time spent queued shows up as its own span.
+TRACING_ENABLED = os.environ.get("TRACING_ENABLED", "false").lower() == "true"
+tracer = Tracer(
+    buffer_size=int(os.environ.get("TRACE_BUFFER_SIZE", "200")),
+    export_path=os.environ.get("TRACE_EXPORT_FILE") or None,
+    sample_rate=float(os.environ.get("TRACE_SAMPLE_RATE", "1")),
+    max_spans=int(os.environ.get("TRACE_MAX_SPANS", "1000"))
+)
+if TRACING_ENABLED:
+    app.add_middleware(
+        TracingMiddleware,
+        tracer=tracer,
+        exempt_prefixes=["/api/v1/events", "/api/v1/profiles/", "/api/v1/debug/"]
+    )
+
 # Enable CORS
 app.add_middleware(
     CORSMiddleware,
@@ -36,14 +132,103 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Initialize rate limiter
-limiter = Limiter(key_func=get_remote_address)
+# Opt-in recording of anonymized sync and load traffic for scripts/benchmarks/replay_traffic.py.
+# Outermost, so requests shed by admission control are recorded too.
+traffic_recorder = None
+if os.environ.get("TRAFFIC_RECORD_DIR"):
+    traffic_recorder = TrafficRecorder(
+        os.environ["TRAFFIC_RECORD_DIR"],
+        # Generated before workers fork, so every worker hashes ids the same way
+        salt=os.environ.get("TRAFFIC_RECORD_SALT") or secrets.token_hex(16),
+        sample_rate=float(os.environ.get("TRAFFIC_RECORD_SAMPLE_RATE", "1")),
+        max_bytes=int(os.environ.get("TRAFFIC_RECORD_MAX_MB", "256")) * 1024 * 1024
+    )
+    app.add_middleware(RecorderMiddleware, recorder=traffic_recorder, paths=["/api/v1/sync", "/api/v1/user-data"])
+
+# Initialize rate limiter. Limits are counted per process unless RATE_LIMIT_STORAGE_URI
+# points at shared storage (e.g. redis://), which multi-worker deployments should set
+limiter = Limiter(
+    key_func=get_remote_address,
+    storage_uri=os.environ.get("RATE_LIMIT_STORAGE_URI", "memory://"),
+    enabled=os.environ.get("RATE_LIMIT_ENABLED", "true").lower() == "true"
+)
 app.state.limiter = limiter
 app.add_exception_handler(RateLimitExceeded, _rate_limit_exceeded_handler)
 
 # Initialize CosmosDB manager
 cosmos_db = CosmosDBManager()
 
+# In-memory per-user task search indexes, built on first search
+search_index = SearchIndexManager(
+    loader=lambda user_id: cosmos_db.get_user_data(user_id)["tasks"],
+    max_users=int(os.environ.get("SEARCH_INDEX_MAX_USERS", "500")),
+    max_documents=int(os.environ.get("SEARCH_INDEX_MAX_DOCUMENTS", "500000"))
+)
+
+# Per-user dashboard counters, maintained from task deltas in the sync path
+dashboard_aggregator = DashboardAggregator(cosmos_db)
+
+# Completion history lives in per-month bucket documents instead of the task
+completion_archive = CompletionHistoryArchive(cosmos_db)
+
+# Filter-and-patch edits of many tasks, written in transactional batches
+bulk_updater = BulkUpdater(
+    cosmos_db,
+    batch_size=int(os.environ.get("BULK_BATCH_SIZE", "50")),
+    max_tasks=int(os.environ.get("BULK_MAX_TASKS", "500"))
+)
+
+# Streamed sync uploads are read and applied in bounded chunks, so large ones use bounded memory
+sync_stream = SyncStreamIngest(
+    max_line_bytes=int(os.environ.get("SYNC_STREAM_MAX_LINE_BYTES", "1048576")),
+    chunk_changes=int(os.environ.get("SYNC_STREAM_CHUNK_CHANGES", "200")),
+    chunk_bytes=int(os.environ.get("SYNC_STREAM_CHUNK_BYTES", "1048576"))
+)
+
+# Recent sync responses by idempotency key, so client retries are not applied twice
+idempotency_store = IdempotencyStore(
+    max_entries=int(os.environ.get("IDEMPOTENCY_MAX_ENTRIES", "10000")),
+    ttl_seconds=int(os.environ.get("IDEMPOTENCY_TTL_SECONDS", "3600"))
+)
+
+# Pushes committed sync changes to the user's other connected sessions (SSE)
+change_broadcaster = ChangeBroadcaster(buffer_size=int(os.environ.get("EVENTS_BUFFER_SIZE", "100")))
+EVENTS_HEARTBEAT_SECONDS = float(os.environ.get("EVENTS_HEARTBEAT_SECONDS", "15"))
+
+# Concurrent initial loads for the same user share one query and one response body
+user_data_flights = SingleFlight()
+# Concurrent first searches for the same user share one index build
+search_index_builds = SingleFlight()
+
+# Write-behind mode: accepted sync changes go to a local fsync'd journal and are
+# acknowledged at once; a background task writes them to Cosmos DB in batches.
+# The journal belongs to one process, so gunicorn runs a single worker in this mode.
+WRITE_BEHIND_ENABLED = os.environ.get("WRITE_BEHIND_ENABLED", "false").lower() == "true"
+write_journal: Optional[WriteJournal] = None
+write_behind_flusher: Optional[WriteBehindFlusher] = None
+
+# Actor mode: each active user's syncs and loads run one at a time in an asyncio actor
+# that holds the user's documents in memory, so writes never race and reads skip Cosmos DB.
+# The state belongs to one process, so gunicorn runs a single worker in this mode; with
+# several instances, ACTOR_NODES/ACTOR_NODE_ID assign each user to one of them.
+ACTOR_MODE_ENABLED = os.environ.get("ACTOR_MODE_ENABLED", "false").lower() == "true"
+user_actors: Optional[UserActorSystem] = None
+if ACTOR_MODE_ENABLED:
+    if WRITE_BEHIND_ENABLED:
+        raise ValueError("ACTOR_MODE_ENABLED and WRITE_BEHIND_ENABLED cannot both be set")
+    user_actors = UserActorSystem(
+        load=lambda user_id: run_in_threadpool(load_actor_documents, user_id),
+        max_users=int(os.environ.get("ACTOR_MAX_USERS", "1000")),
+        idle_seconds=float(os.environ.get("ACTOR_IDLE_SECONDS", "300")),
+        nodes=[node for node in os.environ.get("ACTOR_NODES", "").split(",") if node],
+        node_id=os.environ.get("ACTOR_NODE_ID") or None
+    )
+
+# Hot/cold tiering: when enabled, the initial load leaves out tasks completed
+# longer ago than the horizon; they are served by /api/v1/tasks/archive instead
+TIERED_LOAD_ENABLED = os.environ.get("TIERED_LOAD_ENABLED", "false").lower() == "true"
+COMPLETED_TASK_HORIZON_DAYS = int(os.environ.get("COMPLETED_TASK_HORIZON_DAYS", "30"))
+
 # Pydantic models for request/response data validation
 class ErrorDetail(BaseModel):
     code: int
@@ -71,49 +256,26 @@ class SyncRequest(BaseModel):
     changes: List[ChangeItem]
     clientLastSync: str
 
+class BulkTaskFilter(BaseModel):
+    ids: Optional[List[str]] = None
+    status: Optional[List[str]] = None
+    tags: Optional[List[str]] = None
+    dueAfter: Optional[str] = None
+    dueBefore: Optional[str] = None
+    scheduledAfter: Optional[str] = None
+    scheduledBefore: Optional[str] = None
+    updatedBefore: Optional[str] = None
+
+class BulkUpdateRequest(BaseModel):
+    filter: BulkTaskFilter
+    patch: Dict[str, Any] = {}
+    increment: Dict[str, Union[int, float]] = {}
+    timestamp: Optional[str] = None
+
 class SyncResponse(BaseModel):
     serverChanges: List[ChangeItem]
     syncedAt: str
-
-# Fields that need case conversion for their values
-CASE_CONVERTIBLE_FIELDS = ["status"]  # Add more fields as needed
-
-def convert_case(value: str, to_camel: bool) -> str:
-    """Convert a string between snake_case and camelCase."""
-    if to_camel:
-        return humps.camelize(value)
-    return humps.decamelize(value)
-
-def convert_enum_values(data: Union[Dict, List], is_snake_to_camel: bool) -> Union[Dict, List]:
-    """Convert enumerated values between snake_case and camelCase."""
-    if isinstance(data, list):
-        return [convert_enum_values(item, is_snake_to_camel) for item in data]
-    
-    if not isinstance(data, dict):
-        return data
-    
-    result = {}
-    for key, value in data.items():
-        if isinstance(value, (dict, list)):
-            value = convert_enum_values(value, is_snake_to_camel)
-        elif isinstance(value, str) and key in CASE_CONVERTIBLE_FIELDS:
-            value = convert_case(value, is_snake_to_camel)
-        result[key] = value
-    return result
-
-def snake_to_camel(data: Union[Dict, List]) -> Union[Dict, List]:
-    """Convert snake_case keys to camelCase and convert enumerated values."""
-    # First convert the enum values
-    data = convert_enum_values(data, is_snake_to_camel=True)
-    # Then convert the keys
-    return humps.camelize(data)
-
-def camel_to_snake(data: Union[Dict, List]) -> Union[Dict, List]:
-    """Convert camelCase keys to snake_case and convert enumerated values."""
-    # First convert the keys
-    data = humps.decamelize(data)
-    # Then convert the enum values
-    return convert_enum_values(data, is_snake_to_camel=False)
+    fullReloadRequired: bool = False
 
 def create_api_response(
     success: bool,
@@ -141,6 +303,115 @@ def create_api_response(
     }
     return response
 
+def encode_json(content: Any) -> bytes:
+    """Encode JSON exactly as JSONResponse does."""
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")).encode("utf-8")
+
+def encode_api_response(data_body: bytes, request: Request) -> bytes:
+    """
+    Wrap already-encoded response data in a success envelope with this request's
+    metadata, so a shared data body is not re-serialized per request.
+    """
+    envelope = create_api_response(success=True, data=None, request=request)
+    return b'{"success":true,"data":' + data_body + b',"error":null,"metadata":' + encode_json(envelope["metadata"]) + b'}'
+
+def update_dashboard(
+    user_id: str,
+    before: Optional[Dict[str, Any]],
+    after: Optional[Dict[str, Any]],
+    archived_added: Optional[List[Dict[str, Any]]] = None,
+    archived_removed: Optional[List[Dict[str, Any]]] = None
+) -> None:
+    """Apply a task change to the user's dashboard without failing the write that caused it."""
+    try:
+        dashboard_aggregator.apply_change(user_id, before, after, archived_added, archived_removed)
+    except Exception as e:
+        # The task write already succeeded; scripts/rebuild_dashboard.py repairs any drift
+        print(f"Error updating dashboard for user {user_id}: {e}")
+
+def archive_completions(
+    user_id: str,
+    task_id: str,
+    item_data: Dict[str, Any],
+    previous: Optional[Dict[str, Any]]
+) -> List[Dict[str, Any]]:
+    """
+    Move completion entries sent with a task into the history archive, leaving only
+    the completion summary on the task. Returns the newly archived entries.
+    """
+    entries = item_data.get("completion_history")
+    if not entries:
+        return []
+    archived, summary = completion_archive.archive(
+        user_id, task_id, entries, (previous or {}).get("completion_summary")
+    )
+    item_data["completion_history"] = []
+    item_data["completion_summary"] = summary
+    return archived
+
+def journal_record_document(record: Dict[str, Any]) -> Dict[str, Any]:
+    """Stored fields a pending journal record will write, for read-your-writes views."""
+    document = parse_change_data(record["type"], record["data"]) if record.get("data") is not None else {}
+    document.update({
+        "id": record["id"],
+        "user_id": record["user_id"],
+        "type": record["type"],
+        "updated_at": record["accepted_at"],
+    })
+    if record["operation"] == "create":
+        document["created_at"] = record["accepted_at"]
+    return document
+
+def fetch_journal_base(record: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    return cosmos_db.get_item_by_id(record["id"], record["user_id"], record["type"])
+
+def apply_journal_operation(user_id: str, operation: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    return apply_change(
+        user_id, operation["type"], operation["operation"], operation["id"], operation["data"],
+        timestamp=operation["timestamp"], field_timestamps=operation["field_timestamps"]
+    )
+
+def publish_flushed_changes(
+    user_id: str,
+    records: List[Dict[str, Any]],
+    server_changes: List[Optional[Dict[str, Any]]]
+) -> None:
+    """Push changes once they are stored, skipping the session that made them."""
+    origin_client_id = records[-1].get("client_id") if records else None
+    change_broadcaster.publish(user_id, [change for change in server_changes if change], origin_client_id)
+
+@app.on_event("startup")
+async def start_write_behind():
+    global write_journal, write_behind_flusher
+    if not WRITE_BEHIND_ENABLED:
+        return
+    write_journal = WriteJournal(
+        os.environ.get("WRITE_BEHIND_DIR", "journal"),
+        segment_max_bytes=int(os.environ.get("WRITE_BEHIND_SEGMENT_MAX_BYTES", str(16 * 1024 * 1024)))
+    )
+    # Recovers changes accepted but not yet stored before the last shutdown or crash
+    await run_in_threadpool(write_journal.open)
+    write_behind_flusher = WriteBehindFlusher(
+        write_journal,
+        apply_operation=apply_journal_operation,
+        on_applied=publish_flushed_changes,
+        batch_size=int(os.environ.get("WRITE_BEHIND_BATCH_SIZE", "100")),
+        interval_seconds=float(os.environ.get("WRITE_BEHIND_FLUSH_INTERVAL_SECONDS", "0.05"))
+    )
+    write_behind_flusher.start()
+
+@app.on_event("shutdown")
+async def stop_write_behind():
+    if write_behind_flusher is None:
+        return
+    await write_behind_flusher.stop(float(os.environ.get("WRITE_BEHIND_DRAIN_SECONDS", "10")))
+    write_journal.close()
+
+@app.on_event("shutdown")
+async def close_traffic_recorder():
+    if traffic_recorder is not None:
+        traffic_recorder.close()
+
 async def add_rate_limit_headers(request: Request, response: Response):
     """Add rate limit headers to the response."""
     if hasattr(request.state, "view_rate_limit"):
@@ -157,16 +428,24 @@ async def add_rate_limit_headers(request: Request, response: Response):
             response.headers["X-RateLimit-Reset"] = str(window_stats.reset)
     return response
 
+def retry_after(error: StorageOverloaded) -> str:
+    """Retry-After header value (whole seconds) for a storage overload."""
+    return str(max(1, math.ceil(error.retry_after_seconds)))
+
 # Exception handler
 @app.exception_handler(Exception)
 async def exception_handler(request: Request, exc: Exception):
     """Global error handler to ensure consistent error responses."""
     status_code = status.HTTP_500_INTERNAL_SERVER_ERROR
     error_message = str(exc)
+    headers = None
     
     if isinstance(exc, HTTPException):
         status_code = exc.status_code
         error_message = exc.detail
+    elif isinstance(exc, StorageOverloaded):
+        status_code = exc.status_code
+        headers = {"Retry-After": retry_after(exc)}
     
     print(f"Error: {exc}")
     print(traceback.format_exc())
@@ -182,7 +461,8 @@ async def exception_handler(request: Request, exc: Exception):
     
     return JSONResponse(
         status_code=status_code,
-        content=response
+        content=response,
+        headers=headers
     )
 
 # Dependency to get user ID
@@ -196,36 +476,309 @@ async def get_user_id(request: Request) -> str:
         )
     return user_id
 
+def parse_change(
+    change_type: str,
+    operation: str,
+    item_id: Optional[str],
+    data: Optional[Dict[str, Any]]
+) -> Dict[str, Any]:
+    """
+    Check that a change is complete and valid, and return its data in storage
+    (snake_case) form, keeping only the fields the client sent, including None values.
+    """
+    if operation == "create" and not data:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Data is required for create operation"
+        )
+    if operation in ("update", "delete") and not item_id:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Item ID is required for {operation} operation"
+        )
+    try:
+        with span("parse_change", type=change_type):
+            return parse_change_data(change_type, data) if data is not None else {}
+    except ValidationError as e:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"Invalid {change_type} data: {e}"
+        )
+
+def read_previous(user_id: str, item_id: str, change_type: str, state: Optional[UserState]) -> Optional[Dict[str, Any]]:
+    """The stored item a change applies to: from the user's actor state when there is one."""
+    if state is not None:
+        return state.get(item_id)
+    return cosmos_db.get_item_by_id(item_id, user_id, change_type)
+
+def apply_change(
+    user_id: str,
+    change_type: str,
+    operation: str,
+    item_id: Optional[str],
+    data: Optional[Dict[str, Any]],
+    state: Optional[UserState] = None,
+    timestamp: Optional[str] = None,
+    field_timestamps: Optional[Dict[str, str]] = None
+) -> Optional[Dict[str, Any]]:
+    """
+    Apply one (coalesced) change to storage and the derived views (search index,
+    dashboard, completion history). Returns the server change to report back, if any.
+    In actor mode, `state` is the user's in-memory documents: the change is checked
+    against it and it is updated once storage has the change.
+
+    `timestamp` and `field_timestamps` are when the client made the change (see
+    coalesce_changes); an update keeps only the fields newer than the stored ones.
+    """
+    if operation == CANCELLED:
+        # Created and deleted within one sync: nothing reached storage
+        return {
+            "type": change_type,
+            "operation": "delete",
+            "id": item_id,
+            "timestamp": datetime.now(timezone.utc).isoformat()
+        }
+
+    item_data = parse_change(change_type, operation, item_id, data)
+    # Field versions are the server's; clients cannot set them
+    item_data.pop("field_versions", None)
+    changed_at, field_versions = change_versions(timestamp, field_timestamps)
+    item_data["user_id"] = user_id
+    item_data["type"] = change_type
+    item_data["updated_at"] = datetime.now(timezone.utc).isoformat()
+
+    if operation == "create":
+        item_data["id"] = item_id or str(uuid.uuid4())
+        stamp_fields(item_data, changed_at, field_versions)
+        archived = archive_completions(user_id, item_data["id"], item_data, None) if change_type == "task" else []
+        try:
+            result = cosmos_db.create_item(item_data)
+        except exceptions.CosmosResourceExistsError:
+            # A retried create that already succeeded: report the stored item as-is
+            existing = read_previous(user_id, item_data["id"], change_type, state)
+            if existing is None:
+                existing = cosmos_db.get_item_by_id(item_data["id"], user_id, change_type)
+            if existing is None:
+                # Deleted since the create that succeeded: report it gone, like a cancelled create
+                return {
+                    "type": change_type,
+                    "operation": "delete",
+                    "id": item_data["id"],
+                    "timestamp": datetime.now(timezone.utc).isoformat()
+                }
+            return {
+                "type": change_type,
+                "operation": "create",
+                "id": existing["id"],
+                "data": serialize_document(existing),
+                "timestamp": existing["updated_at"]
+            }
+        if result:
+            if state is not None:
+                state.put(result)
+            if change_type == "task":
+                search_index.apply_upsert(user_id, result)
+                update_dashboard(user_id, None, result, archived_added=archived)
+            return {
+                "type": change_type,
+                "operation": "create",
+                "id": result["id"],
+                "data": serialize_document(result),
+                "timestamp": result["updated_at"]
+            }
+
+    elif operation == "update":
+        previous = read_previous(user_id, item_id, change_type, state)
+        if not previous:
+            raise ValueError(f"Item with id {item_id} not found")
+        with span("merge_fields", fields=len(item_data)):
+            item_data = merge_fields(previous, item_data, changed_at, field_versions)
+        archived = archive_completions(user_id, item_id, item_data, previous) if change_type == "task" else []
+        result = cosmos_db.update_item(item_id, item_data, existing_item=dict(previous))
+        if result:
+            if state is not None:
+                state.put(result)
+            if change_type == "task":
+                search_index.apply_upsert(user_id, result)
+                update_dashboard(user_id, previous, result, archived_added=archived)
+            return {
+                "type": change_type,
+                "operation": "update",
+                "id": result["id"],
+                "data": serialize_document(result),
+                "timestamp": result["updated_at"]
+            }
+
+    elif operation == "delete":
+        if state is not None:
+            previous = state.get(item_id)
+        else:
+            previous = cosmos_db.get_item_by_id(item_id, user_id, change_type) if change_type == "task" else None
+        # Tells the user's other devices about the delete at their next sync
+        tombstone = cosmos_db.tombstone_document(item_id, user_id, change_type)
+        if cosmos_db.delete_item(item_id, user_id, change_type, tombstone=tombstone):
+            if state is not None:
+                state.remove(item_id, tombstone)
+            search_index.apply_delete(user_id, item_id)
+            if previous and change_type == "task":
+                removed = completion_archive.delete_for_task(user_id, item_id)
+                update_dashboard(user_id, previous, None, archived_removed=removed)
+            return {
+                "type": change_type,
+                "operation": "delete",
+                "id": item_id,
+                "timestamp": tombstone["deleted_at"]
+            }
+
+    return None
+
+def split_tombstones(items: List[Dict[str, Any]]) -> Tuple[Dict[str, Dict[str, Any]], Dict[str, Dict[str, Any]]]:
+    """
+    Changed documents and tombstones (from get_changes_since), each by item id.
+    Of an item deleted and created again, only the newer of the two is kept.
+    """
+    documents = {item["id"]: item for item in items if item.get("type") != TOMBSTONE_TYPE}
+    tombstones = {}
+    for item in items:
+        if item.get("type") != TOMBSTONE_TYPE:
+            continue
+        document = documents.get(item["item_id"])
+        if document is None or item["updated_at"] >= document["updated_at"]:
+            documents.pop(item["item_id"], None)
+            tombstones[item["item_id"]] = item
+    return documents, tombstones
+
+def tombstone_change(tombstone: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "type": tombstone["item_type"],
+        "operation": "delete",
+        "id": tombstone["item_id"],
+        "timestamp": tombstone["deleted_at"]
+    }
+
+def requires_full_reload(client_last_sync: str) -> bool:
+    """
+    Whether a client last synced before the tombstone horizon: deletes it has not
+    seen may have expired, so incremental sync cannot bring it up to date.
+    """
+    last_sync = parse_iso_datetime(client_last_sync)
+    return last_sync is None or last_sync < cosmos_db.tombstone_horizon()
+
 # API Routes
 @app.get("/api/v1/user-data", response_model=ApiResponse)
 @limiter.limit("180/hour")
-async def get_user_data(request: Request, user_id: str = Depends(get_user_id)):
+async def get_user_data(
+    request: Request,
+    user_id: str = Depends(get_user_id),
+    include_archived: bool = Query(False, alias="includeArchived")
+):
     """
     Get all data for a user (tasks, goals, categories, dashboard).
+    In tiered mode, tasks completed before `archivedBefore` are omitted unless includeArchived is set.
     Rate limit: 180 requests per hour
     """
     try:
-        print(f"Fetching user data for user_id: {user_id}")
-        # Get all user data using the new get_user_data method
-        user_data = cosmos_db.get_user_data(user_id)
-
-        # Convert to camelCase for frontend
-        response_data = {
-            "tasks": snake_to_camel(user_data["tasks"]),
-            "goals": snake_to_camel(user_data["goals"]),
-            "categories": snake_to_camel(user_data["categories"]),
-            "dashboard": snake_to_camel(user_data["dashboard"]) if user_data["dashboard"] else None,
-            "lastSyncedAt": datetime.now(timezone.utc).isoformat()
-        }
+        tiered = TIERED_LOAD_ENABLED and not include_archived
+        if user_actors is not None:
+            require_actor_owner(user_id)
+            # Runs in the user's actor, so it sees every write queued before it
+            load = lambda: user_actors.call(
+                user_id, lambda state: run_in_threadpool(load_user_data_body, user_id, tiered, state)
+            )
+        else:
+            load = lambda: run_in_threadpool(load_user_data_body, user_id, tiered)
+        # Loads already in flight for this user (other tabs, reconnects) are joined, not repeated
+        data_body, shared = await user_data_flights.run(f"{user_id}:{'tiered' if tiered else 'full'}", load)
+        if shared:
+            print(f"Joined in-flight user data load for user_id: {user_id}")
 
-        api_response = create_api_response(success=True, data=response_data, request=request)
-        response = JSONResponse(content=api_response)
+        response = Response(content=encode_api_response(data_body, request), media_type="application/json")
         await add_rate_limit_headers(request, response)
         return response
 
     except Exception as e:
         raise
 
+def merge_journal_into_user_data(user_data: Dict[str, Any], pending: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Show the user their accepted but not yet stored changes."""
+    documents = {
+        document["id"]: document
+        for key in ("tasks", "goals", "categories")
+        for document in user_data[key]
+    }
+    merge_pending(documents, pending, journal_record_document, fetch_journal_base)
+    merged = {"tasks": [], "goals": [], "categories": [], "dashboard": user_data["dashboard"]}
+    keys = {"task": "tasks", "goal": "goals", "category": "categories"}
+    for document in documents.values():
+        key = keys.get(document.get("type"))
+        if key:
+            merged[key].append(document)
+    return merged
+
+def require_actor_owner(user_id: str) -> None:
+    """In actor mode with several nodes, refuse users owned by another node (421 Misdirected Request)."""
+    owner = user_actors.owner(user_id)
+    if owner is not None:
+        raise HTTPException(
+            status_code=status.HTTP_421_MISDIRECTED_REQUEST,
+            detail=f"User is served by node {owner}",
+            headers={"X-Actor-Owner": owner}
+        )
+
+def load_actor_documents(user_id: str) -> List[Dict[str, Any]]:
+    """The documents a user's actor holds: tasks, goals, categories and tombstones."""
+    user_data = cosmos_db.get_user_data(user_id, include_tombstones=True)
+    return user_data["tasks"] + user_data["goals"] + user_data["categories"] + user_data["tombstones"]
+
+def user_data_from_state(user_id: str, state: UserState, completed_since: Optional[str]) -> Dict[str, Any]:
+    """get_user_data's result, from an actor's documents; only the dashboard is read from storage."""
+    tasks = [
+        task for task in state.of_type("task")
+        if not completed_since or task.get("status") != "complete" or task.get("updated_at", "") >= completed_since
+    ]
+    return {
+        "tasks": tasks,
+        "goals": state.of_type("goal"),
+        "categories": state.of_type("category"),
+        "dashboard": cosmos_db.get_item_by_id(DASHBOARD_ID, user_id, DASHBOARD_TYPE)
+    }
+
+def load_user_data_body(user_id: str, tiered: bool, state: Optional[UserState] = None) -> bytes:
+    """Query a user's data and encode it, in camelCase, as the user-data response data."""
+    print(f"Fetching user data for user_id: {user_id}")
+    # Taken before the query, so writes that land while it runs are picked up by the next sync
+    last_synced_at = datetime.now(timezone.utc).isoformat()
+    # Also taken before the query: a change flushed while it runs is still merged below
+    pending = write_journal.pending_for_user(user_id) if write_journal else []
+    archived_before = None
+    if tiered:
+        horizon = datetime.now(timezone.utc) - timedelta(days=COMPLETED_TASK_HORIZON_DAYS)
+        archived_before = horizon.isoformat()
+
+    if state is not None:
+        user_data = user_data_from_state(user_id, state, archived_before)
+    else:
+        # Get all user data using the new get_user_data method
+        user_data = cosmos_db.get_user_data(user_id, completed_since=archived_before)
+    if pending:
+        with span("merge_journal", pending=len(pending)):
+            user_data = merge_journal_into_user_data(user_data, pending)
+
+    # Convert to camelCase for frontend
+    with span("serialize", tasks=len(user_data["tasks"])):
+        response_data = {
+            "tasks": [serialize_document(task) for task in user_data["tasks"]],
+            "goals": [serialize_document(goal) for goal in user_data["goals"]],
+            "categories": [serialize_document(category) for category in user_data["categories"]],
+            "dashboard": snake_to_camel(dashboard_summary(user_data["dashboard"])) if user_data["dashboard"] else None,
+            "archivedBefore": archived_before,
+            "lastSyncedAt": last_synced_at
+        }
+    with span("encode_json") as current:
+        body = encode_json(response_data)
+        current.set_attribute("bytes", len(body))
+    return body
+
 @app.post("/api/v1/sync", response_model=ApiResponse)
 @limiter.limit("360/minute")
 async def sync_changes(
@@ -235,119 +788,926 @@ async def sync_changes(
 ):
     """
     Sync changes between frontend and backend.
+    Send an Idempotency-Key header to make retries safe: a repeated key returns the
+    original response without applying the changes again.
     Rate limit: 360 requests per minute
     """
+    idempotency_key = request.headers.get("Idempotency-Key")
+    if not idempotency_key:
+        return await process_sync(request, sync_request, user_id)
+
+    async def handler() -> CachedResponse:
+        response = await process_sync(request, sync_request, user_id)
+        return CachedResponse(response.status_code, response.body, response.media_type)
+
+    fingerprint = hashlib.sha256(await request.body()).hexdigest()
     try:
-        # Process each change
-        server_changes = []
-        has_errors = False
-
-        for change in sync_request.changes:
-            change_type = change.type
-            operation = change.operation
-            item_id = change.id
-            # Convert the data while preserving all fields, including None values
-            item_data = camel_to_snake(change.data) if change.data is not None else {}
-
-            if item_data is not None:
-                item_data["user_id"] = user_id
-                item_data["type"] = change_type
-                item_data["updated_at"] = datetime.now(timezone.utc).isoformat()
-
-            try:
-                if operation == "create":
-                    if not item_data:
-                        raise HTTPException(
-                            status_code=status.HTTP_400_BAD_REQUEST,
-                            detail="Data is required for create operation"
-                        )
-                    item_data["id"] = item_id or str(uuid.uuid4())
-                    result = cosmos_db.create_item(item_data)
-                    if result:
-                        server_changes.append({
-                            "type": change_type,
-                            "operation": "create",
-                            "id": result["id"],
-                            "data": snake_to_camel(result),
-                            "timestamp": result["updated_at"]
-                        })
-
-                elif operation == "update":
-                    if not item_id:
-                        raise HTTPException(
-                            status_code=status.HTTP_400_BAD_REQUEST,
-                            detail="Item ID is required for update operation"
-                        )
-                    result = cosmos_db.update_item(item_id, item_data)
-                    if result:
-                        server_changes.append({
-                            "type": change_type,
-                            "operation": "update",
-                            "id": result["id"],
-                            "data": snake_to_camel(result),
-                            "timestamp": result["updated_at"]
-                        })
-
-                elif operation == "delete":
-                    if not item_id:
-                        raise HTTPException(
-                            status_code=status.HTTP_400_BAD_REQUEST,
-                            detail="Item ID is required for delete operation"
-                        )
-                    if cosmos_db.delete_item(item_id, user_id):
-                        server_changes.append({
-                            "type": change_type,
-                            "operation": "delete",
-                            "id": item_id,
-                            "timestamp": datetime.now(timezone.utc).isoformat()
-                        })
-
-            except Exception as operation_error:
-                print(f"Error processing change: {operation_error}")
-                print(traceback.format_exc())
-                has_errors = True
-                error_response = create_api_response(
-                    success=False,
-                    error={"code": 500, "message": str(operation_error)},
-                    data={"serverChanges": server_changes},
-                    request=request
-                )
-                response = JSONResponse(content=error_response, status_code=500)
-                await add_rate_limit_headers(request, response)
-                return response
-
-        # Only proceed with server changes if no errors occurred
-        if not has_errors:
-            # Get any server-side changes newer than client_last_sync
-            server_items = cosmos_db.get_changes_since(user_id, sync_request.clientLastSync)
-
-            # Add server items to server_changes if they're not already included
-            processed_ids = {change["id"] for change in server_changes}
-            for item in server_items:
-                if item["id"] not in processed_ids:
-                    server_changes.append({
-                        "type": item["type"],
-                        "operation": "update",
-                        "id": item["id"],
-                        "data": snake_to_camel(item),
-                        "timestamp": item["updated_at"]
-                    })
-
-            response_data = {
-                "serverChanges": server_changes,
-                "syncedAt": datetime.now(timezone.utc).isoformat()
-            }
+        cached, replayed = await idempotency_store.run(f"{user_id}:{idempotency_key}", fingerprint, handler)
+    except IdempotencyKeyReused:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="Idempotency-Key was already used with a different request body"
+        )
 
-            api_response = create_api_response(success=True, data=response_data, request=request)
-            response = JSONResponse(content=api_response)
+    response = Response(content=cached.body, status_code=cached.status_code, media_type=cached.media_type)
+    if replayed:
+        response.headers["Idempotent-Replayed"] = "true"
+    await add_rate_limit_headers(request, response)
+    return response
+
+async def process_sync(request: Request, sync_request: SyncRequest, user_id: str) -> JSONResponse:
+    """Apply a sync request's changes and collect the server changes to send back."""
+    if write_behind_flusher is not None:
+        return await process_sync_write_behind(request, sync_request, user_id)
+    if user_actors is not None:
+        require_actor_owner(user_id)
+        return await user_actors.call(user_id, lambda state: apply_sync(request, sync_request, user_id, state))
+    return await apply_sync(request, sync_request, user_id)
+
+async def apply_sync(
+    request: Request,
+    sync_request: SyncRequest,
+    user_id: str,
+    state: Optional[UserState] = None
+) -> JSONResponse:
+    """Apply a sync request's changes to storage (and the actor state, if any) and build the response."""
+    try:
+        # Fold repeated changes to the same item into one storage operation each
+        with span("coalesce_changes", changes=len(sync_request.changes)):
+            operations = coalesce_changes(sync_request.changes)
+        # Storage calls block (throttle waits and 429 backoff included), so they run off the
+        # event loop. In actor mode the actor waits for them, so nothing else touches `state`
+        server_changes, acknowledged, operation_error = await run_in_threadpool(
+            apply_operations, user_id, sync_request.changes, operations, state
+        )
+
+        if operation_error is not None:
+            error_code = getattr(operation_error, "status_code", 500)
+            error_response = create_api_response(
+                success=False,
+                error={"code": error_code, "message": str(getattr(operation_error, "detail", operation_error))},
+                data={"serverChanges": server_changes, "acknowledged": acknowledged},
+                request=request
+            )
+            response = JSONResponse(content=error_response, status_code=error_code)
+            if isinstance(operation_error, StorageOverloaded):
+                # The acknowledged changes are applied; the client resends the rest later
+                response.headers["Retry-After"] = retry_after(operation_error)
             await add_rate_limit_headers(request, response)
             return response
 
+        # Notify the user's other sessions; the originating session gets the response below
+        change_broadcaster.publish(user_id, list(server_changes), request.headers.get("X-Client-ID"))
+
+        pulled, full_reload = await run_in_threadpool(
+            pull_server_changes, user_id, sync_request.clientLastSync, {change["id"] for change in server_changes}, state
+        )
+        response_data = {
+            "serverChanges": changes_to_report(server_changes, operations, sync_request.clientLastSync) + pulled,
+            "acknowledged": acknowledged,
+            "syncedAt": datetime.now(timezone.utc).isoformat(),
+            "fullReloadRequired": full_reload
+        }
+
+        with span("encode_response"):
+            api_response = create_api_response(success=True, data=response_data, request=request)
+            response = JSONResponse(content=api_response)
+        await add_rate_limit_headers(request, response)
+        return response
+
     except Exception as e:
         print(f"Unexpected error in sync: {e}")
         print(traceback.format_exc())
         raise
 
+def apply_operations(
+    user_id: str,
+    changes: List[ChangeItem],
+    operations: List[Dict[str, Any]],
+    state: Optional[UserState] = None,
+    first_index: int = 0
+) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]], Optional[Exception]]:
+    """
+    Apply coalesced operations in order until one fails. Returns the server changes
+    and acknowledgements of those applied, and the error that stopped the rest, if
+    any. `first_index` is the upload index of `changes[0]`.
+    """
+    server_changes = []
+    acknowledged = []
+    operation_error = None
+    for operation in operations:
+        try:
+            with span("apply_change", type=operation["type"], operation=operation["operation"]):
+                server_change = apply_change(
+                    user_id, operation["type"], operation["operation"], operation["id"], operation["data"], state,
+                    timestamp=operation["timestamp"], field_timestamps=operation["field_timestamps"]
+                )
+        except Exception as e:
+            print(f"Error processing change: {e}")
+            print(traceback.format_exc())
+            operation_error = e
+            break
+        if server_change:
+            server_changes.append(server_change)
+        for index in operation["sources"]:
+            original = changes[index]
+            acknowledged.append({"id": original.id, "operation": original.operation, "index": first_index + index})
+    acknowledged.sort(key=lambda ack: ack["index"])
+    return server_changes, acknowledged, operation_error
+
+def pull_server_changes(
+    user_id: str,
+    client_last_sync: str,
+    reported_ids: Set[str],
+    state: Optional[UserState] = None
+) -> Tuple[List[Dict[str, Any]], bool]:
+    """
+    The changes stored since the client's last sync, other than those of items in
+    `reported_ids`, and whether the client is too far behind for them and must
+    reload everything instead.
+    """
+    full_reload = requires_full_reload(client_last_sync)
+    if full_reload:
+        server_items = []
+    elif state is not None:
+        server_items = state.changed_since(client_last_sync)
+    else:
+        server_items = cosmos_db.get_changes_since(user_id, client_last_sync)
+
+    server_changes = []
+    with span("collect_server_changes", items=len(server_items)):
+        documents, tombstones = split_tombstones(server_items)
+        for item in documents.values():
+            if item.get("type") == "task":
+                # Writes made through other workers reach this worker's index here
+                search_index.apply_upsert(user_id, item)
+            if item["id"] not in reported_ids:
+                server_changes.append({
+                    "type": item["type"],
+                    "operation": "update",
+                    "id": item["id"],
+                    "data": serialize_document(item),
+                    "timestamp": item["updated_at"]
+                })
+        for item_id, tombstone in tombstones.items():
+            if tombstone["item_type"] == "task":
+                search_index.apply_delete(user_id, item_id)
+            if item_id not in reported_ids:
+                server_changes.append(tombstone_change(tombstone))
+    return server_changes, full_reload
+
+def changes_to_report(
+    server_changes: List[Dict[str, Any]],
+    operations: List[Dict[str, Any]],
+    client_last_sync: str
+) -> List[Dict[str, Any]]:
+    """
+    Server changes as the syncing client needs them: updated documents carry only
+    the fields it does not have (changed_fields). Pushes to other sessions keep
+    whole documents.
+    """
+    sent = {operation["id"]: operation["data"] for operation in operations if operation["operation"] == "update"}
+    return [
+        dict(change, data=changed_fields(change["data"], sent.get(change["id"]), client_last_sync))
+        if change["operation"] == "update" and change.get("data") else change
+        for change in server_changes
+    ]
+
+async def process_sync_write_behind(request: Request, sync_request: SyncRequest, user_id: str) -> JSONResponse:
+    """
+    Accept a sync request's changes into the write journal and acknowledge them once
+    they are durable there; storage happens in the background (WriteBehindFlusher).
+    Server changes include the user's pending journal changes (read-your-writes).
+    """
+    with span("coalesce_changes", changes=len(sync_request.changes)):
+        operations = coalesce_changes(sync_request.changes)
+    server_changes, acknowledged, error = await journal_operations(
+        user_id, request.headers.get("X-Client-ID"), sync_request.changes, operations
+    )
+
+    if error is not None:
+        error_response = create_api_response(
+            success=False,
+            error={"code": error.status_code, "message": str(error.detail)},
+            data={"serverChanges": server_changes, "acknowledged": acknowledged},
+            request=request
+        )
+        response = JSONResponse(content=error_response, status_code=error.status_code)
+        await add_rate_limit_headers(request, response)
+        return response
+
+    synced_at = datetime.now(timezone.utc).isoformat()
+    pulled, full_reload = await pull_journal_changes(user_id, sync_request.clientLastSync, synced_at)
+    response_data = {
+        "serverChanges": server_changes + pulled,
+        "acknowledged": acknowledged,
+        "syncedAt": synced_at,
+        "fullReloadRequired": full_reload
+    }
+    with span("encode_response"):
+        api_response = create_api_response(success=True, data=response_data, request=request)
+        response = JSONResponse(content=api_response)
+    await add_rate_limit_headers(request, response)
+    return response
+
+async def journal_operations(
+    user_id: str,
+    client_id: Optional[str],
+    changes: List[ChangeItem],
+    operations: List[Dict[str, Any]],
+    first_index: int = 0
+) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]], Optional[HTTPException]]:
+    """
+    Validate coalesced operations in order until one is invalid, and append the valid
+    ones to the write journal. Returns the server changes and acknowledgements of
+    those accepted, and the error that stopped the rest, if any. `first_index` is
+    the upload index of `changes[0]`.
+    """
+    entries = []
+    server_changes = []
+    acknowledged = []
+    error = None
+
+    for operation in operations:
+        try:
+            if operation["operation"] == CANCELLED:
+                server_changes.append(apply_change(user_id, operation["type"], CANCELLED, operation["id"], None))
+            else:
+                parse_change(operation["type"], operation["operation"], operation["id"], operation["data"])
+                entries.append({
+                    "user_id": user_id,
+                    "client_id": client_id,
+                    "type": operation["type"],
+                    "operation": operation["operation"],
+                    "id": operation["id"] or str(uuid.uuid4()),
+                    "data": operation["data"],
+                    "timestamp": operation["timestamp"],
+                })
+        except HTTPException as operation_error:
+            print(f"Error processing change: {operation_error.detail}")
+            error = operation_error
+            break
+        for index in operation["sources"]:
+            original = changes[index]
+            acknowledged.append({"id": original.id, "operation": original.operation, "index": first_index + index})
+
+    if entries:
+        with span("journal_append", entries=len(entries)):
+            await run_in_threadpool(write_journal.append, entries)
+        write_behind_flusher.notify()
+    acknowledged.sort(key=lambda ack: ack["index"])
+    return server_changes, acknowledged, error
+
+async def pull_journal_changes(user_id: str, client_last_sync: str, synced_at: str) -> Tuple[List[Dict[str, Any]], bool]:
+    """
+    The changes stored since the client's last sync with the user's pending journal
+    changes merged over them, and whether the client must reload everything instead.
+    """
+    pending = write_journal.pending_for_user(user_id)
+    full_reload = requires_full_reload(client_last_sync)
+    server_items = [] if full_reload else await run_in_threadpool(
+        cosmos_db.get_changes_since, user_id, client_last_sync
+    )
+    documents, tombstones = split_tombstones(server_items)
+    with span("merge_journal", pending=len(pending)):
+        changed = await run_in_threadpool(merge_pending, documents, pending, journal_record_document, fetch_journal_base)
+
+    server_changes = []
+    for item_id, document in changed.items():
+        if document is None:
+            server_changes.append({
+                "type": next(record["type"] for record in pending if record["id"] == item_id),
+                "operation": "delete",
+                "id": item_id,
+                "timestamp": synced_at
+            })
+    for item in documents.values():
+        if item.get("type") == "task" and item["id"] not in changed:
+            search_index.apply_upsert(user_id, item)
+        server_changes.append({
+            "type": item["type"],
+            "operation": "update",
+            "id": item["id"],
+            "data": serialize_document(item),
+            "timestamp": item["updated_at"]
+        })
+    for item_id, tombstone in tombstones.items():
+        if item_id in changed:
+            # A pending change to the item is newer than its delete
+            continue
+        if tombstone["item_type"] == "task":
+            search_index.apply_delete(user_id, item_id)
+        server_changes.append(tombstone_change(tombstone))
+    return server_changes, full_reload
+
+@app.post("/api/v1/sync/stream")
+@limiter.limit("60/minute")
+async def sync_changes_stream(request: Request, user_id: str = Depends(get_user_id)):
+    """
+    Sync a large upload, such as a client's changes after days offline, without
+    holding it in memory. The body is NDJSON: `{"clientLastSync": ...}`, then one
+    change per line. Changes are applied in chunks as the body arrives, and the
+    response streams one NDJSON event per chunk ("progress"), then the server
+    changes ("changes") and "complete", or an "error" that stops the sync.
+    Rate limit: 60 requests per minute
+    """
+    if user_actors is not None:
+        require_actor_owner(user_id)
+    reader = sync_stream.reader(request.stream())
+    try:
+        header = await reader.header()
+    except SyncStreamError as e:
+        sync_stream.rejected += 1
+        raise HTTPException(status_code=e.status_code, detail=str(e))
+    client_last_sync = header.get("clientLastSync")
+    if not isinstance(client_last_sync, str):
+        sync_stream.rejected += 1
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="clientLastSync is required")
+
+    response = IngestingStreamingResponse(
+        stream_sync(reader, user_id, client_last_sync, request.headers.get("X-Client-ID")),
+        media_type="application/x-ndjson"
+    )
+    await add_rate_limit_headers(request, response)
+    return response
+
+def stream_event(event: str, data: Dict[str, Any], error: Optional[Dict[str, Any]] = None) -> bytes:
+    body = {"event": event, "data": data}
+    if error:
+        body["error"] = error
+    return encode_json(body) + b"\n"
+
+async def apply_stream_chunk(
+    user_id: str,
+    client_id: Optional[str],
+    changes: List[ChangeItem],
+    operations: List[Dict[str, Any]],
+    first_index: int
+) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]], Optional[Exception]]:
+    """Apply one chunk of a streamed upload the way process_sync applies a request."""
+    if write_behind_flusher is not None:
+        return await journal_operations(user_id, client_id, changes, operations, first_index)
+    if user_actors is not None:
+        return await user_actors.call(user_id, lambda state: run_in_threadpool(
+            apply_operations, user_id, changes, operations, state, first_index
+        ))
+    return await run_in_threadpool(apply_operations, user_id, changes, operations, None, first_index)
+
+async def pull_stream_changes(user_id: str, client_last_sync: str, reported_ids: Set[str]) -> Tuple[List[Dict[str, Any]], bool]:
+    if write_behind_flusher is not None:
+        return await pull_journal_changes(user_id, client_last_sync, datetime.now(timezone.utc).isoformat())
+    if user_actors is not None:
+        return await user_actors.call(user_id, lambda state: run_in_threadpool(
+            pull_server_changes, user_id, client_last_sync, reported_ids, state
+        ))
+    return await run_in_threadpool(pull_server_changes, user_id, client_last_sync, reported_ids)
+
+async def stream_sync(
+    reader: SyncStreamReader,
+    user_id: str,
+    client_last_sync: str,
+    client_id: Optional[str]
+) -> AsyncIterator[bytes]:
+    """
+    Read, validate and apply a streamed upload chunk by chunk. Changes are coalesced
+    within a chunk; chunks are applied in upload order, so the acknowledged indexes
+    always form a prefix of the upload that the client need not send again.
+    """
+    sync_stream.active += 1
+    # Ids of the items already reported, so the final pull does not send them twice
+    reported_ids: Set[str] = set()
+    try:
+        async for first_index, items in reader.chunks():
+            changes = []
+            invalid = None
+            for item in items:
+                try:
+                    changes.append(ChangeItem(**item))
+                except ValidationError as e:
+                    # The valid changes before it are still applied
+                    invalid = SyncStreamError(
+                        f"Change {first_index + len(changes)} is invalid: {e}", status.HTTP_422_UNPROCESSABLE_ENTITY
+                    )
+                    break
+            with span("stream_chunk", changes=len(changes), first_index=first_index):
+                with span("coalesce_changes", changes=len(changes)):
+                    operations = coalesce_changes(changes)
+                server_changes, acknowledged, operation_error = await apply_stream_chunk(
+                    user_id, client_id, changes, operations, first_index
+                )
+            if write_behind_flusher is None:
+                change_broadcaster.publish(user_id, list(server_changes), client_id)
+            reported_ids.update(change["id"] for change in server_changes)
+            data = {
+                "serverChanges": changes_to_report(server_changes, operations, client_last_sync),
+                "acknowledged": acknowledged,
+                "received": reader.changes
+            }
+            operation_error = operation_error or invalid
+            if operation_error is not None:
+                error_code = getattr(operation_error, "status_code", 500)
+                if isinstance(operation_error, StorageOverloaded):
+                    data["retryAfter"] = retry_after(operation_error)
+                yield stream_event("error", data, {
+                    "code": error_code,
+                    "message": str(getattr(operation_error, "detail", operation_error))
+                })
+                return
+            yield stream_event("progress", data)
+
+        pulled, full_reload = await pull_stream_changes(user_id, client_last_sync, reported_ids)
+        for start in range(0, len(pulled), sync_stream.chunk_changes):
+            yield stream_event("changes", {"serverChanges": pulled[start:start + sync_stream.chunk_changes]})
+        yield stream_event("complete", {
+            "received": reader.changes,
+            "syncedAt": datetime.now(timezone.utc).isoformat(),
+            "fullReloadRequired": full_reload
+        })
+    except ClientDisconnect:
+        # The chunks applied so far stay applied; the client sends the upload again
+        print(f"Client disconnected during streamed sync for user {user_id} after {reader.changes} changes")
+    except SyncStreamError as e:
+        sync_stream.rejected += 1
+        yield stream_event("error", {"received": reader.changes}, {"code": e.status_code, "message": str(e)})
+    except Exception as e:
+        print(f"Unexpected error in streamed sync: {e}")
+        print(traceback.format_exc())
+        yield stream_event("error", {"received": reader.changes}, {"code": 500, "message": "Internal server error"})
+    finally:
+        sync_stream.active -= 1
+
+@app.get("/api/v1/events", include_in_schema=False)
+@limiter.limit("60/minute")
+async def stream_changes(
+    request: Request,
+    client_id: Optional[str] = Query(None, alias="clientId"),
+    user_id_param: Optional[str] = Query(None, alias="userId")
+):
+    """
+    Server-Sent Events stream of changes other sessions commit for this user.
+    Connected clients receive `changes` events instead of polling /api/v1/sync, and a
+    `resync` event if they fall too far behind to be sent every change.
+    The user may be given as a query parameter since EventSource cannot set headers.
+    Rate limit: 60 requests per minute
+    """
+    user_id = user_id_param or await get_user_id(request)
+    subscription = change_broadcaster.subscribe(user_id, client_id)
+
+    async def event_stream():
+        try:
+            yield f"retry: {int(EVENTS_HEARTBEAT_SECONDS * 1000)}\n\n"
+            while True:
+                try:
+                    event = await asyncio.wait_for(subscription.next_event(), timeout=EVENTS_HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    if await request.is_disconnected():
+                        break
+                    yield ": keepalive\n\n"
+                    continue
+                yield f"event: {event['event']}\ndata: {json.dumps(event['data'])}\n\n"
+        finally:
+            change_broadcaster.unsubscribe(subscription)
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+# Master List sort keys accepted by the query API (camelCase) -> storage field
+TASK_SORT_FIELDS = {
+    "priority": "priority",
+    "dynamicPriority": "dynamic_priority",
+    "dueDate": "due_date",
+}
+
+@app.get("/api/v1/tasks", response_model=ApiResponse)
+@limiter.limit("360/minute")
+async def query_tasks(
+    request: Request,
+    user_id: str = Depends(get_user_id),
+    status_filter: Optional[List[str]] = Query(None, alias="status"),
+    tags: Optional[List[str]] = Query(None),
+    due_after: Optional[str] = Query(None, alias="dueAfter"),
+    due_before: Optional[str] = Query(None, alias="dueBefore"),
+    scheduled_after: Optional[str] = Query(None, alias="scheduledAfter"),
+    scheduled_before: Optional[str] = Query(None, alias="scheduledBefore"),
+    sort_by: str = Query("priority", alias="sortBy"),
+    sort_order: str = Query("desc", alias="sortOrder"),
+    page_size: int = Query(50, alias="pageSize", ge=1, le=200),
+    cursor: Optional[str] = Query(None)
+):
+    """
+    Get a filtered, sorted page of tasks for the Master List.
+    Pass the returned nextCursor back as `cursor` to fetch the following page.
+    Rate limit: 360 requests per minute
+    """
+    if sort_by not in TASK_SORT_FIELDS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"sortBy must be one of: {', '.join(TASK_SORT_FIELDS)}"
+        )
+    if sort_order not in ("asc", "desc"):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="sortOrder must be 'asc' or 'desc'"
+        )
+
+    filters = {
+        "status": [convert_case(value, to_camel=False) for value in status_filter] if status_filter else None,
+        "tags": tags,
+        "due_after": due_after,
+        "due_before": due_before,
+        "scheduled_after": scheduled_after,
+        "scheduled_before": scheduled_before,
+    }
+
+    try:
+        page = await run_in_threadpool(
+            cosmos_db.query_tasks,
+            user_id,
+            filters=filters,
+            sort_by=TASK_SORT_FIELDS[sort_by],
+            descending=sort_order == "desc",
+            page_size=page_size,
+            cursor=cursor
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    response_data = {
+        "tasks": snake_to_camel(page["items"]),
+        "nextCursor": page["next_cursor"],
+        "hasMore": page["has_more"]
+    }
+
+    api_response = create_api_response(success=True, data=response_data, request=request)
+    response = JSONResponse(content=api_response)
+    await add_rate_limit_headers(request, response)
+    return response
+
+@app.get("/api/v1/search", response_model=ApiResponse)
+@limiter.limit("360/minute")
+async def search_tasks(
+    request: Request,
+    user_id: str = Depends(get_user_id),
+    q: str = Query(""),
+    tags: Optional[List[str]] = Query(None),
+    limit: int = Query(20, ge=1, le=100)
+):
+    """
+    Full-text prefix search over task titles, notes and tags.
+    The first search for a user builds their index; later searches are served from memory.
+    Rate limit: 360 requests per minute
+    """
+    if not search_index.is_resident(user_id):
+        # The build scans the user's partition: off the event loop, once for concurrent searches
+        await search_index_builds.run(user_id, lambda: run_in_threadpool(search_index.build, user_id))
+    # Rebuilds the index if it was evicted meanwhile, so it runs off the event loop as well
+    results = await run_in_threadpool(search_index.search, user_id, q, tags, limit)
+
+    response_data = {
+        "results": snake_to_camel(results["results"]),
+        "total": results["total"],
+        "tagFacets": results["tag_facets"]
+    }
+
+    api_response = create_api_response(success=True, data=response_data, request=request)
+    response = JSONResponse(content=api_response)
+    await add_rate_limit_headers(request, response)
+    return response
+
+@app.get("/api/v1/tasks/archive", response_model=ApiResponse)
+@limiter.limit("360/minute")
+async def get_archived_tasks(
+    request: Request,
+    user_id: str = Depends(get_user_id),
+    before: Optional[str] = Query(None),
+    page_size: int = Query(50, alias="pageSize", ge=1, le=200),
+    cursor: Optional[str] = Query(None)
+):
+    """
+    Get completed tasks left out of the tiered initial load, most recently updated first.
+    Pass the `archivedBefore` value from /api/v1/user-data as `before` so pages line up
+    with what the client already holds.
+    Rate limit: 360 requests per minute
+    """
+    if not before:
+        before = (datetime.now(timezone.utc) - timedelta(days=COMPLETED_TASK_HORIZON_DAYS)).isoformat()
+
+    try:
+        page = await run_in_threadpool(
+            cosmos_db.query_tasks,
+            user_id,
+            filters={"status": ["complete"], "updated_before": before},
+            sort_by="updated_at",
+            descending=True,
+            page_size=page_size,
+            cursor=cursor
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    response_data = {
+        "tasks": snake_to_camel(page["items"]),
+        "archivedBefore": before,
+        "nextCursor": page["next_cursor"],
+        "hasMore": page["has_more"]
+    }
+
+    api_response = create_api_response(success=True, data=response_data, request=request)
+    response = JSONResponse(content=api_response)
+    await add_rate_limit_headers(request, response)
+    return response
+
+def parse_bulk_update(bulk_request: BulkUpdateRequest) -> Tuple[Dict[str, Any], Dict[str, Any], Dict[str, float]]:
+    """Check a bulk update and return its filters, fields to set and increments, in storage form."""
+    task_filter = bulk_request.filter
+    filters = {
+        "ids": task_filter.ids,
+        "status": [convert_case(value, to_camel=False) for value in task_filter.status] if task_filter.status else None,
+        "tags": task_filter.tags,
+        "due_after": task_filter.dueAfter,
+        "due_before": task_filter.dueBefore,
+        "scheduled_after": task_filter.scheduledAfter,
+        "scheduled_before": task_filter.scheduledBefore,
+        "updated_before": task_filter.updatedBefore,
+    }
+    if not any(filters.values()):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Filter needs at least one condition"
+        )
+    if not bulk_request.patch and not bulk_request.increment:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Patch or increment is required"
+        )
+    try:
+        fields = parse_change_data("task", bulk_request.patch)
+    except ValidationError as e:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"Invalid task patch: {e}"
+        )
+    protected = sorted(PROTECTED_FIELDS & fields.keys())
+    if protected:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Bulk updates cannot set: {', '.join(convert_case(field, to_camel=True) for field in protected)}"
+        )
+    increments = {convert_case(field, to_camel=False): amount for field, amount in bulk_request.increment.items()}
+    unsupported = sorted(increments.keys() - INCREMENT_FIELDS)
+    if unsupported or increments.keys() & fields.keys():
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Only {', '.join(sorted(convert_case(field, to_camel=True) for field in INCREMENT_FIELDS))} "
+                   "can be incremented, and not also set"
+        )
+    return filters, fields, increments
+
+def apply_bulk_update(
+    user_id: str,
+    filters: Dict[str, Any],
+    fields: Dict[str, Any],
+    increments: Dict[str, float],
+    changed_at: str,
+    written: List[Tuple[Dict[str, Any], Dict[str, Any]]]
+) -> Dict[str, Any]:
+    """
+    Run a bulk update; blocking, so called in the threadpool. Each stored batch
+    updates the dashboard and is added to `written` for publish_bulk_update.
+    """
+    def on_written(batch: List[Tuple[Dict[str, Any], Dict[str, Any]]]) -> None:
+        written.extend(batch)
+        try:
+            dashboard_aggregator.apply_changes(user_id, batch)
+        except Exception as e:
+            # The task writes already succeeded; scripts/rebuild_dashboard.py repairs any drift
+            print(f"Error updating dashboard for user {user_id}: {e}")
+
+    with span("bulk_update"):
+        return bulk_updater.apply(
+            user_id, filters, lambda task: patch_task(task, fields, increments, changed_at), on_written
+        )
+
+def publish_bulk_update(
+    user_id: str,
+    written: List[Tuple[Dict[str, Any], Dict[str, Any]]],
+    client_id: Optional[str],
+    state: Optional[UserState] = None
+) -> None:
+    """
+    Bring the search index and the actor state up to date with stored bulk writes,
+    and push them to the user's other sessions. Runs on the event loop, which owns
+    the push channel's queues.
+    """
+    if not written:
+        return
+    for _, after in written:
+        if state is not None:
+            state.put(after)
+        search_index.apply_upsert(user_id, after)
+    change_broadcaster.publish(user_id, [
+        {
+            "type": "task",
+            "operation": "update",
+            "id": after["id"],
+            "data": serialize_document(after),
+            "timestamp": after["updated_at"]
+        }
+        for _, after in written
+    ], client_id)
+
+@app.post("/api/v1/tasks/bulk", response_model=ApiResponse)
+@limiter.limit("30/minute")
+async def bulk_update_tasks(
+    request: Request,
+    bulk_request: BulkUpdateRequest,
+    user_id: str = Depends(get_user_id)
+):
+    """
+    Apply one patch to every task matching a filter, such as moving all overdue tasks
+    to today or raising the priority of every task with a tag. `patch` sets fields,
+    `increment` adds to numeric ones. Reports the updated tasks' new versions.
+    Rate limit: 30 requests per minute
+    """
+    filters, fields, increments = parse_bulk_update(bulk_request)
+    changed_at, _ = change_versions(bulk_request.timestamp, None)
+    client_id = request.headers.get("X-Client-ID")
+
+    written: List[Tuple[Dict[str, Any], Dict[str, Any]]] = []
+
+    async def run(state: Optional[UserState] = None) -> Dict[str, Any]:
+        try:
+            return await run_in_threadpool(apply_bulk_update, user_id, filters, fields, increments, changed_at, written)
+        finally:
+            # Batches stored before a failed one are published as well
+            publish_bulk_update(user_id, written, client_id, state)
+
+    try:
+        if user_actors is not None:
+            require_actor_owner(user_id)
+            result = await user_actors.call(user_id, run)
+        else:
+            result = await run()
+    except BulkLimitExceeded as e:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(e))
+
+    response_data = {
+        "matched": result["matched"],
+        "updated": [
+            {"id": task["id"], "updatedAt": task["updated_at"], "etag": task.get("_etag")}
+            for task in result["updated"]
+        ],
+        "unchanged": result["unchanged"]
+    }
+
+    api_response = create_api_response(success=True, data=response_data, request=request)
+    response = JSONResponse(content=api_response)
+    await add_rate_limit_headers(request, response)
+    return response
+
+@app.get("/api/v1/tasks/{task_id}/history", response_model=ApiResponse)
+@limiter.limit("360/minute")
+async def get_task_history(
+    request: Request,
+    task_id: str,
+    user_id: str = Depends(get_user_id),
+    limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = Query(None)
+):
+    """
+    Get a task's completion history, newest first, one page at a time.
+    Rate limit: 360 requests per minute
+    """
+    try:
+        position = decode_cursor(cursor) if cursor else None
+        if position is not None and not (
+            isinstance(position, dict)
+            and isinstance(position.get("b"), str)
+            and isinstance(position.get("o"), int) and not isinstance(position.get("o"), bool)
+            and position["o"] >= 0
+        ):
+            raise ValueError("Invalid cursor")
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    page = await run_in_threadpool(completion_archive.get_page, user_id, task_id, limit=limit, cursor=position)
+
+    response_data = {
+        "entries": snake_to_camel(page["entries"]),
+        "nextCursor": encode_cursor(page["next"]) if page["next"] else None,
+        "hasMore": page["next"] is not None
+    }
+
+    api_response = create_api_response(success=True, data=response_data, request=request)
+    response = JSONResponse(content=api_response)
+    await add_rate_limit_headers(request, response)
+    return response
+
+@app.get("/api/v1/dashboard", response_model=ApiResponse)
+@limiter.limit("360/minute")
+async def get_dashboard(request: Request, user_id: str = Depends(get_user_id)):
+    """
+    Get the user's dashboard aggregates (a single point read).
+    Rate limit: 360 requests per minute
+    """
+    dashboard = await run_in_threadpool(dashboard_aggregator.get, user_id)
+    response_data = {"dashboard": snake_to_camel(dashboard)}
+
+    api_response = create_api_response(success=True, data=response_data, request=request)
+    response = JSONResponse(content=api_response)
+    await add_rate_limit_headers(request, response)
+    return response
+
+@app.get("/api/v1/metrics", response_model=ApiResponse)
+@limiter.limit("60/minute")
+async def get_metrics(request: Request):
+    """
+    Get this worker process's in-memory counters (caches, request collapsing, push channel, user actors, bulk updates, streamed syncs, storage throttle, query costs, admission, schema upgrades, traffic recording, profiler, tracing).
+    Rate limit: 60 requests per minute
+    """
+    response_data = snake_to_camel({
+        "process_id": os.getpid(),
+        "user_data_loads": user_data_flights.stats(),
+        "search_index": search_index.stats(),
+        "idempotency": idempotency_store.stats(),
+        "change_events": change_broadcaster.stats(),
+        "write_behind": write_behind_flusher.stats() if write_behind_flusher else None,
+        "user_actors": user_actors.stats() if user_actors else None,
+        "bulk_updates": bulk_updater.stats(),
+        "sync_streams": sync_stream.stats(),
+        "storage_throttle": cosmos_db.throttle.stats() if cosmos_db.throttle else None,
+        "queries": cosmos_db.query_log.stats(),
+        "admission": admission_controller.stats() if ADMISSION_CONTROL_ENABLED else None,
+        "schema_upgrades": cosmos_db.upgrade_writer.stats() if cosmos_db.upgrade_writer else None,
+        "traffic_recorder": traffic_recorder.stats() if traffic_recorder else None,
+        "profiler": request_profiler.stats() if request_profiler.enabled else None,
+        "tracing": tracer.stats() if TRACING_ENABLED else None,
+    })
+
+    api_response = create_api_response(success=True, data=response_data, request=request)
+    response = JSONResponse(content=api_response)
+    await add_rate_limit_headers(request, response)
+    return response
+
+@app.get("/api/v1/profiles/{profile_id}", include_in_schema=False)
+@limiter.limit("60/minute")
+async def get_profile(request: Request, profile_id: str):
+    """
+    Get a stored request profile as folded stacks (flamegraph.pl / speedscope input).
+    The profile id is the X-Request-ID of the profiled request, returned in X-Profile-ID.
+    Requires the same `X-Profile: <PROFILE_TOKEN>` header that requests profiling.
+    Rate limit: 60 requests per minute
+    """
+    if not request_profiler.authorized(request.headers.get("X-Profile")):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Profiling is not authorized")
+    path = request_profiler.path_for(profile_id)
+    if not os.path.exists(path):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Profile {profile_id} not found")
+    with open(path, encoding="utf-8") as profile:
+        response = PlainTextResponse(profile.read())
+    await add_rate_limit_headers(request, response)
+    return response
+
+@app.get("/api/v1/debug/traces", response_model=ApiResponse, include_in_schema=False)
+@limiter.limit("60/minute")
+async def list_traces(
+    request: Request,
+    min_duration_ms: float = Query(0, alias="minDurationMs", ge=0),
+    limit: int = Query(50, ge=1, le=200)
+):
+    """
+    List this worker process's most recent request traces, newest first.
+    Only available with TRACING_ENABLED=true.
+    Rate limit: 60 requests per minute
+    """
+    if not TRACING_ENABLED:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Tracing is not enabled")
+    api_response = create_api_response(
+        success=True, data=snake_to_camel({"traces": tracer.recent(min_duration_ms, limit)}), request=request
+    )
+    response = JSONResponse(content=api_response)
+    await add_rate_limit_headers(request, response)
+    return response
+
+@app.get("/api/v1/debug/traces/{trace_id}", response_model=ApiResponse, include_in_schema=False)
+@limiter.limit("60/minute")
+async def get_trace(request: Request, trace_id: str):
+    """
+    Get one request trace: its spans, and the time spent per span name.
+    The trace id is the request's X-Request-ID, returned in X-Trace-ID.
+    Rate limit: 60 requests per minute
+    """
+    trace = tracer.get(trace_id) if TRACING_ENABLED else None
+    if trace is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Trace {trace_id} not found")
+    api_response = create_api_response(success=True, data=snake_to_camel(trace), request=request)
+    response = JSONResponse(content=api_response)
+    await add_rate_limit_headers(request, response)
+    return response
+
 # Serve static files from the frontend build directory
 if os.path.isdir("dist"):
     app.mount("/assets", StaticFiles(directory="dist/assets"), name="assets")
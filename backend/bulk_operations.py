@@ -0,0 +1,126 @@
+# File: backend/bulk_operations.py
+
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from azure.cosmos import exceptions
+from field_merge import merge_fields
+
+# Cosmos DB runs at most 100 operations in one transactional batch
+MAX_BATCH_SIZE = 100
+MAX_CONFLICT_RETRIES = 3
+
+# Numeric task fields a bulk update may add to
+INCREMENT_FIELDS = {"priority", "dynamic_priority", "effort"}
+# Task fields a bulk patch may not set (storage names)
+PROTECTED_FIELDS = {
+    "id", "user_id", "type", "created_at", "updated_at", "schema_version", "field_versions",
+    "partition_bucket", "completion_history", "completion_summary",
+}
+
+class BulkLimitExceeded(Exception):
+    """A bulk filter matched more tasks than one operation may change."""
+
+def patch_task(
+    task: Dict[str, Any],
+    fields: Dict[str, Any],
+    increments: Dict[str, float],
+    changed_at: str
+) -> Optional[Dict[str, Any]]:
+    """
+    The task with `fields` set and `increments` added, merged field by field
+    (merge_fields) as of `changed_at`, or None if that changes no value.
+    """
+    updates = dict(fields)
+    for field, amount in increments.items():
+        updates[field] = (task.get(field) or 0) + amount
+    merged = merge_fields(task, updates, changed_at)
+    if all(task.get(field) == value for field, value in merged.items() if field != "field_versions"):
+        return None
+    document = dict(task)
+    document.update(merged)
+    return document
+
+class BulkUpdater:
+    """
+    Applies one patch to every task of a user that matches a filter.
+
+    Matching tasks are found with one query in the user's task partition, at most
+    `max_tasks` of them. The patched tasks are written in transactional batches of
+    `batch_size` replaces, one batch at a time, each through the storage throttle.
+    Every replace is conditional on the ETag read, so a task edited meanwhile is
+    read again and patched again instead of overwritten.
+    """
+
+    def __init__(self, cosmos_db, batch_size: int = 50, max_tasks: int = 500):
+        if not 1 <= batch_size <= MAX_BATCH_SIZE:
+            raise ValueError(f"Bulk batch size must be between 1 and {MAX_BATCH_SIZE}")
+        self.cosmos_db = cosmos_db
+        self.batch_size = batch_size
+        self.max_tasks = max_tasks
+        self.operations = 0
+        self.tasks_updated = 0
+        self.batches = 0
+        self.conflicts = 0
+
+    def apply(
+        self,
+        user_id: str,
+        filters: Dict[str, Any],
+        patch: Callable[[Dict[str, Any]], Optional[Dict[str, Any]]],
+        on_written: Callable[[List[Tuple[Dict[str, Any], Dict[str, Any]]]], None]
+    ) -> Dict[str, Any]:
+        """
+        Patch the user's tasks matching `filters`. `patch(task)` returns the new
+        document, or None to leave the task as it is. `on_written` gets the
+        (before, after) pairs of each batch once it is stored.
+
+        Returns the matched count, the stored documents and the ids left unchanged.
+        Raises BulkLimitExceeded before writing anything if too many tasks match. A
+        failed batch stops the operation; the batches before it stay written.
+        """
+        tasks = self.cosmos_db.find_tasks(user_id, filters, self.max_tasks + 1)
+        if len(tasks) > self.max_tasks:
+            raise BulkLimitExceeded(f"Filter matches more than {self.max_tasks} tasks")
+        self.operations += 1
+
+        updated: List[Dict[str, Any]] = []
+        unchanged: List[str] = []
+        for start in range(0, len(tasks), self.batch_size):
+            written = self._write_batch(user_id, filters, tasks[start:start + self.batch_size], patch, unchanged)
+            if written:
+                on_written(written)
+                updated.extend(after for _, after in written)
+        self.tasks_updated += len(updated)
+        return {"matched": len(tasks), "updated": updated, "unchanged": unchanged}
+
+    def _write_batch(self, user_id, filters, tasks, patch, unchanged) -> List[Tuple[Dict[str, Any], Dict[str, Any]]]:
+        for attempt in range(MAX_CONFLICT_RETRIES):
+            planned = []
+            skipped = []
+            for task in tasks:
+                document = patch(task)
+                if document is None:
+                    skipped.append(task["id"])
+                else:
+                    planned.append((task, document))
+            try:
+                stored = self.cosmos_db.replace_items_batch([document for _, document in planned]) if planned else []
+            except exceptions.CosmosBatchOperationError as e:
+                if e.status_code not in (404, 412) or attempt == MAX_CONFLICT_RETRIES - 1:
+                    raise
+                self.conflicts += 1
+                # Read the batch again; tasks deleted or no longer matching drop out
+                tasks = self.cosmos_db.find_tasks(user_id, dict(filters, ids=[task["id"] for task in tasks]), len(tasks))
+                continue
+            if planned:
+                self.batches += 1
+            unchanged.extend(skipped)
+            return [(before, after) for (before, _), after in zip(planned, stored)]
+        return []
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "operations": self.operations,
+            "tasks_updated": self.tasks_updated,
+            "batches": self.batches,
+            "conflicts": self.conflicts,
+        }
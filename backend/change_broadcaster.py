@@ -0,0 +1,86 @@
+# File: backend/change_broadcaster.py
+
+import asyncio
+from typing import Any, Dict, List, Optional, Set
+
+class Subscription:
+    """One connected client session listening for a user's changes."""
+
+    def __init__(self, user_id: str, client_id: Optional[str], buffer_size: int):
+        self.user_id = user_id
+        self.client_id = client_id
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=buffer_size)
+        self.resync_pending = False
+        self.overflows = 0
+
+    async def next_event(self) -> Dict[str, Any]:
+        """Wait for the next event to send to this session."""
+        event = await self.queue.get()
+        if event["event"] == "resync":
+            self.resync_pending = False
+        return event
+
+class ChangeBroadcaster:
+    """
+    In-process per-user pub/sub for committed sync changes.
+
+    Every subscription has a bounded buffer. When a slow client's buffer fills,
+    its pending events are replaced by a single "resync" event telling it to
+    catch up through /api/v1/sync, so one stalled connection can never hold
+    unbounded memory or slow down publishers.
+    """
+
+    def __init__(self, buffer_size: int = 100):
+        self.buffer_size = buffer_size
+        self._subscriptions: Dict[str, Set[Subscription]] = {}
+        self.published = 0
+        self.delivered = 0
+        self.overflows = 0
+
+    def subscribe(self, user_id: str, client_id: Optional[str] = None) -> Subscription:
+        subscription = Subscription(user_id, client_id, self.buffer_size)
+        self._subscriptions.setdefault(user_id, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        subscriptions = self._subscriptions.get(subscription.user_id)
+        if subscriptions is None:
+            return
+        subscriptions.discard(subscription)
+        if not subscriptions:
+            del self._subscriptions[subscription.user_id]
+
+    def publish(self, user_id: str, changes: List[Dict[str, Any]], origin_client_id: Optional[str] = None) -> None:
+        """Fan committed changes out to the user's sessions, except the one that made them."""
+        if not changes:
+            return
+        self.published += 1
+        event = {"event": "changes", "data": changes}
+        for subscription in list(self._subscriptions.get(user_id, ())):
+            if origin_client_id and subscription.client_id == origin_client_id:
+                continue
+            if subscription.resync_pending:
+                # The pending resync already covers this change
+                continue
+            try:
+                subscription.queue.put_nowait(event)
+                self.delivered += 1
+            except asyncio.QueueFull:
+                self._overflow(subscription)
+
+    def _overflow(self, subscription: Subscription) -> None:
+        while not subscription.queue.empty():
+            subscription.queue.get_nowait()
+        subscription.queue.put_nowait({"event": "resync", "data": {}})
+        subscription.resync_pending = True
+        subscription.overflows += 1
+        self.overflows += 1
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "users": len(self._subscriptions),
+            "connections": sum(len(subscriptions) for subscriptions in self._subscriptions.values()),
+            "published": self.published,
+            "delivered": self.delivered,
+            "overflows": self.overflows,
+        }
@@ -0,0 +1,153 @@
+# File: backend/completion_history.py
+
+from typing import Any, Dict, List, Optional, Tuple
+from azure.cosmos import exceptions
+from cosmos_db import HISTORY_TYPE
+from date_utils import parse_iso_datetime
+
+MAX_CONFLICT_RETRIES = 5
+
+def bucket_key(entry: Dict[str, Any]) -> str:
+    """Month bucket ("YYYY-MM") an entry is archived under."""
+    completed = parse_iso_datetime(entry.get("completed_at"))
+    return completed.strftime("%Y-%m") if completed else "undated"
+
+def bucket_id(task_id: str, bucket: str) -> str:
+    return f"history:{task_id}:{bucket}"
+
+def empty_summary() -> Dict[str, Any]:
+    return {"count": 0, "streak": 0, "last_completed_at": None, "last_next_due_date": None}
+
+def update_summary(summary: Optional[Dict[str, Any]], entries: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Fold new completion entries into a task's summary.
+
+    The streak counts consecutive completions made on or before the previous
+    completion's next due date; a late completion starts a new streak.
+    """
+    summary = dict(summary or empty_summary())
+    for entry in sorted(entries, key=lambda e: e.get("completed_at") or ""):
+        summary["count"] += 1
+        completed_at = entry.get("completed_at")
+        if summary["last_completed_at"] and (completed_at or "") < summary["last_completed_at"]:
+            # Back-filled older entry: counts towards the total but not the streak
+            continue
+
+        completed = parse_iso_datetime(completed_at)
+        due = parse_iso_datetime(summary["last_next_due_date"])
+        on_time = summary["streak"] == 0 or due is None or (completed is not None and completed.date() <= due.date())
+        summary["streak"] = summary["streak"] + 1 if on_time else 1
+        summary["last_completed_at"] = completed_at
+        summary["last_next_due_date"] = entry.get("next_due_date")
+    return summary
+
+class CompletionHistoryArchive:
+    """
+    Stores task completion history outside the task document.
+
+    Entries live in month buckets in the task's partition; the task itself only
+    carries a `completion_summary`, so its size no longer grows with its age.
+    """
+
+    def __init__(self, cosmos_db):
+        self.cosmos_db = cosmos_db
+
+    def archive(
+        self,
+        user_id: str,
+        task_id: str,
+        entries: List[Dict[str, Any]],
+        summary: Optional[Dict[str, Any]] = None
+    ) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+        """
+        Move entries into history buckets, skipping ones already archived.
+        Returns the newly archived entries and the task's updated summary.
+        """
+        by_bucket: Dict[str, List[Dict[str, Any]]] = {}
+        for entry in entries:
+            by_bucket.setdefault(bucket_key(entry), []).append(entry)
+
+        archived = []
+        for bucket, bucket_entries in by_bucket.items():
+            archived.extend(self._append_to_bucket(user_id, task_id, bucket, bucket_entries))
+
+        # Entries newer than the summary are counted even if an earlier attempt
+        # archived them before failing to save the task
+        last_completed_at = (summary or {}).get("last_completed_at") or ""
+        archived_keys = {entry.get("completed_at") for entry in archived}
+        to_count = archived + [
+            entry for entry in entries
+            if (entry.get("completed_at") or "") > last_completed_at and entry.get("completed_at") not in archived_keys
+        ]
+        return archived, update_summary(summary, to_count)
+
+    def _append_to_bucket(
+        self,
+        user_id: str,
+        task_id: str,
+        bucket: str,
+        entries: List[Dict[str, Any]]
+    ) -> List[Dict[str, Any]]:
+        for _ in range(MAX_CONFLICT_RETRIES):
+            document = self.cosmos_db.get_item_by_id(bucket_id(task_id, bucket), user_id, HISTORY_TYPE)
+            known = {entry.get("completed_at") for entry in (document or {}).get("entries", [])}
+            new_entries = []
+            for entry in entries:
+                if entry.get("completed_at") not in known:
+                    known.add(entry.get("completed_at"))
+                    new_entries.append(entry)
+            if not new_entries:
+                return []
+
+            try:
+                if document is None:
+                    self.cosmos_db.create_item({
+                        "id": bucket_id(task_id, bucket),
+                        "user_id": user_id,
+                        "type": HISTORY_TYPE,
+                        "task_id": task_id,
+                        "bucket": bucket,
+                        "entries": sorted(new_entries, key=lambda e: e.get("completed_at") or ""),
+                    })
+                else:
+                    document["entries"] = sorted(
+                        document["entries"] + new_entries,
+                        key=lambda e: e.get("completed_at") or ""
+                    )
+                    self.cosmos_db.replace_item(document, etag=document.get("_etag"))
+                return new_entries
+            except (exceptions.CosmosAccessConditionFailedError, exceptions.CosmosResourceExistsError):
+                continue
+        raise RuntimeError(f"History bucket {bucket} for task {task_id} is too contended to update")
+
+    def get_page(self, user_id: str, task_id: str, limit: int = 50, cursor: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """
+        Get a page of a task's completions, newest first.
+        `cursor` is the position returned as `next` by the previous page.
+        """
+        before_bucket = cursor["b"] if cursor else None
+        skip = cursor["o"] if cursor else 0
+
+        entries: List[Dict[str, Any]] = []
+        next_position = None
+        for document in self.cosmos_db.get_history_buckets(user_id, task_id, up_to_bucket=before_bucket):
+            bucket_entries = list(reversed(document.get("entries", [])))
+            offset = skip if document["bucket"] == before_bucket else 0
+            remaining = limit - len(entries)
+            entries.extend(bucket_entries[offset:offset + remaining])
+            if offset + remaining < len(bucket_entries):
+                next_position = {"b": document["bucket"], "o": offset + remaining}
+                break
+            if len(entries) >= limit:
+                next_position = {"b": document["bucket"], "o": len(bucket_entries)}
+                break
+
+        return {"entries": entries, "next": next_position}
+
+    def delete_for_task(self, user_id: str, task_id: str) -> List[Dict[str, Any]]:
+        """Delete all of a task's history buckets, returning the entries they held."""
+        removed = []
+        for document in list(self.cosmos_db.get_history_buckets(user_id, task_id)):
+            if self.cosmos_db.delete_item(document["id"], user_id, HISTORY_TYPE):
+                removed.extend(document.get("entries", []))
+        return removed
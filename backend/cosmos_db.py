@@ -1,43 +1,278 @@
 # File: backend/cosmos_db.py
 
 import os
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Iterable, Optional, Tuple, Union
 from dotenv import load_dotenv
 from azure.cosmos import CosmosClient, exceptions, PartitionKey
+from azure.cosmos.documents import ConnectionPolicy, RetryOptions
 from azure.cosmos.container import ContainerProxy
 from azure.cosmos.database import DatabaseProxy
 from azure.identity import DefaultAzureCredential
+from azure.core import MatchConditions
 from datetime import datetime, timezone, timedelta
 import traceback
+import base64
+import json
+import time
+from storage_throttle import AdaptiveThrottle
+from schema_upgrades import UpgradeWriter, upgrade_document, stamp_version
+from tracing import span
+from query_log import QueryLog, QueryPages
+
+# Indexing policy applied to the container (mirrors docs/design_document.md).
+# The composite indexes back the keyset-paginated Master List queries; each
+# ascending pair also serves the fully descending ORDER BY.
+INDEXING_POLICY = {
+    "indexingMode": "consistent",
+    "automatic": True,
+    "includedPaths": [{"path": "/*"}],
+    "excludedPaths": [
+        {"path": "/notes/?"},
+        {"path": "/completion_history/*"},
+        {"path": "/\"_etag\"/?"}
+    ],
+    "compositeIndexes": [
+        [{"path": "/priority", "order": "ascending"}, {"path": "/id", "order": "ascending"}],
+        [{"path": "/dynamic_priority", "order": "ascending"}, {"path": "/id", "order": "ascending"}],
+        [{"path": "/due_date", "order": "ascending"}, {"path": "/id", "order": "ascending"}],
+        [{"path": "/updated_at", "order": "ascending"}, {"path": "/id", "order": "ascending"}]
+    ]
+}
+
+# Task fields the query API may sort on (snake_case storage names)
+QUERY_SORT_FIELDS = ["priority", "dynamic_priority", "due_date", "updated_at"]
+
+# Range filters accepted by query_tasks: filter name -> (field, operator)
+QUERY_RANGE_FILTERS = {
+    "due_after": ("due_date", ">="),
+    "due_before": ("due_date", "<"),
+    "scheduled_after": ("scheduled_date", ">="),
+    "scheduled_before": ("scheduled_date", "<"),
+    "updated_before": ("updated_at", "<"),
+}
+
+MAX_QUERY_PAGE_SIZE = 200
+
+# Archived completion history buckets; never part of a client's working set
+HISTORY_TYPE = "completion_history"
+
+# Markers left by deleted items so incremental sync can report the delete; they
+# expire through the container's TTL (TOMBSTONE_TTL_SECONDS)
+TOMBSTONE_TYPE = "tombstone"
+
+def tombstone_id(item_id: str) -> str:
+    return f"tombstone:{item_id}"
+
+# Partition key layouts (COSMOS_PARTITION_SCHEME). The hierarchical schemes split
+# a user's data into sub-partitions by document type and, optionally, time
+# bucket, so a heavy user is not held to one logical partition's limits.
+PARTITION_SCHEMES = {
+    "user": ["/user_id"],
+    "user_type": ["/user_id", "/type"],
+    "user_type_bucket": ["/user_id", "/type", "/partition_bucket"],
+}
+
+# A partition key value, or the list of values of a hierarchical key (or prefix)
+PartitionKeyValue = Union[str, List[str]]
+
+# Time bucket of documents that are not history buckets
+CURRENT_PARTITION_BUCKET = "current"
+
+def partition_bucket(item: Dict[str, Any]) -> str:
+    """Third-level partition key value: the month of a history bucket, else "current"."""
+    if item.get("type") == HISTORY_TYPE and item.get("bucket"):
+        return item["bucket"]
+    return CURRENT_PARTITION_BUCKET
+
+def partition_key_definition(scheme: str) -> PartitionKey:
+    paths = PARTITION_SCHEMES[scheme]
+    if len(paths) == 1:
+        return PartitionKey(path=paths[0])
+    return PartitionKey(path=paths, kind="MultiHash")
+
+def encode_cursor(payload: Dict[str, Any]) -> str:
+    """Encode a keyset position into an opaque, URL-safe cursor string."""
+    raw = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+def decode_cursor(cursor: str) -> Dict[str, Any]:
+    """Decode a cursor produced by encode_cursor, raising ValueError if it is malformed."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+    except Exception:
+        raise ValueError("Invalid cursor")
+    if not isinstance(payload, dict):
+        raise ValueError("Invalid cursor")
+    return payload
+
+_UNDEFINED = object()
+
+def _sort_rank(value: Any) -> int:
+    """Rank of a sort value in Cosmos ORDER BY order: undefined < null < defined values."""
+    if value is _UNDEFINED:
+        return 0
+    if value is None:
+        return 1
+    return 2
 
 class CosmosDBManager:
-    def __init__(self, cosmos_host=None, cosmos_database_id=None, cosmos_container_id=None):
-        self._load_env_variables(cosmos_host, cosmos_database_id, cosmos_container_id)
+    def __init__(self, cosmos_host=None, cosmos_database_id=None, cosmos_container_id=None, partition_scheme=None):
+        self._load_env_variables(cosmos_host, cosmos_database_id, cosmos_container_id, partition_scheme)
         self.client = self._get_cosmos_client()
         self.database: Optional[DatabaseProxy] = None
         self.container: Optional[ContainerProxy] = None
         self._initialize_database_and_container()
 
-    def _load_env_variables(self, cosmos_host=None, cosmos_database_id=None, cosmos_container_id=None):
+    def _load_env_variables(self, cosmos_host=None, cosmos_database_id=None, cosmos_container_id=None, partition_scheme=None):
         load_dotenv()
         self.cosmos_host = cosmos_host or os.environ.get("COSMOS_HOST")
         self.cosmos_database_id = cosmos_database_id or os.environ.get("COSMOS_DATABASE_ID")
         self.cosmos_container_id = cosmos_container_id or os.environ.get("COSMOS_CONTAINER_ID")
         self.tenant_id = os.environ.get("TENANT_ID", '16b3c013-d300-468d-ac64-7eda0820b6d3')
+        self.partition_scheme = partition_scheme or os.environ.get("COSMOS_PARTITION_SCHEME", "user")
 
         if not all([self.cosmos_host, self.cosmos_database_id, self.cosmos_container_id]):
             raise ValueError("Cosmos DB configuration is incomplete")
+        if self.partition_scheme not in PARTITION_SCHEMES:
+            raise ValueError(f"Unknown partition scheme: {self.partition_scheme}")
+        self.partition_paths = PARTITION_SCHEMES[self.partition_scheme]
+
+        # With the adaptive throttle on, 429s are retried here instead of inside the SDK
+        self.throttle = None
+        if os.environ.get("COSMOS_ADAPTIVE_THROTTLE", "true").lower() == "true":
+            self.throttle = AdaptiveThrottle(
+                initial_limit=int(os.environ.get("COSMOS_INITIAL_CONCURRENCY", "16")),
+                min_limit=int(os.environ.get("COSMOS_MIN_CONCURRENCY", "1")),
+                max_limit=int(os.environ.get("COSMOS_MAX_CONCURRENCY", "64")),
+                queue_timeout_seconds=float(os.environ.get("COSMOS_QUEUE_TIMEOUT_SECONDS", "2")),
+                retry_budget_seconds=float(os.environ.get("COSMOS_RETRY_BUDGET_SECONDS", "10")),
+                charge_of=self._last_request_charge
+            )
+
+        # Documents upgraded on read are written back in the background; 0 turns that off
+        self.upgrade_writer = None
+        upgrade_writes_per_second = float(os.environ.get("SCHEMA_UPGRADE_WRITES_PER_SECOND", "5"))
+        if upgrade_writes_per_second > 0:
+            self.upgrade_writer = UpgradeWriter(
+                write=lambda document: self.replace_item(document, etag=document.get("_etag")),
+                writes_per_second=upgrade_writes_per_second
+            )
+
+        # Tombstones outlive their item by this long; clients that last synced earlier reload everything
+        self.tombstone_ttl_seconds = int(os.environ.get("TOMBSTONE_TTL_SECONDS", str(30 * 24 * 3600)))
+        if self.tombstone_ttl_seconds <= 0:
+            raise ValueError("TOMBSTONE_TTL_SECONDS must be positive")
+
+        # Query metrics and index utilization are requested with every query, for the slow query log
+        self.query_metrics = os.environ.get("COSMOS_QUERY_METRICS", "true").lower() == "true"
+        self.query_log = QueryLog(
+            INDEXING_POLICY,
+            slow_threshold_ms=float(os.environ.get("SLOW_QUERY_THRESHOLD_MS", "100")),
+            slow_request_units=float(os.environ.get("SLOW_QUERY_REQUEST_UNITS", "0")),
+            log_path=os.environ.get("SLOW_QUERY_LOG_FILE") or None
+        )
 
     def _get_cosmos_client(self) -> CosmosClient:
         print("Initializing Cosmos DB client")
         print("Using DefaultAzureCredential for Cosmos DB authentication")
-        credential = DefaultAzureCredential(
+        self.credential = DefaultAzureCredential(
             interactive_browser_tenant_id=self.tenant_id,
             visual_studio_code_tenant_id=self.tenant_id,
             workload_identity_tenant_id=self.tenant_id,
             shared_cache_tenant_id=self.tenant_id
         )
-        return CosmosClient(self.cosmos_host, credential=credential)
+        return CosmosClient(self.cosmos_host, credential=self.credential, connection_policy=self._connection_policy())
+
+    def _connection_policy(self) -> ConnectionPolicy:
+        policy = ConnectionPolicy()
+        if self.throttle is not None:
+            # The SDK would otherwise retry 429s itself, out of sight of the throttle
+            policy.RetryOptions = RetryOptions(max_retry_attempt_count=0)
+        return policy
+
+    def _last_request_charge(self) -> Optional[str]:
+        # Headers of this client's most recent response; approximate when calls overlap
+        if self.container is None:
+            return None
+        return self.container.client_connection.last_response_headers.get("x-ms-request-charge")
+
+    def _call(self, name: str, operation, request_charge=None):
+        """Run one container call, traced as `cosmos.<name>`, through the adaptive throttle if enabled."""
+        with span(f"cosmos.{name}") as current:
+            result = operation() if self.throttle is None else self.throttle.run(operation)
+            current.set_attribute("request_charge", request_charge() if request_charge else self._last_request_charge())
+            return result
+
+    def _query_options(self, pages: QueryPages, options: Dict[str, Any]) -> Dict[str, Any]:
+        if self.query_metrics:
+            options = dict(options, populate_query_metrics=True, populate_index_metrics=True)
+        return dict(options, response_hook=pages)
+
+    def _query(
+        self,
+        name: str,
+        query: str,
+        parameters: Optional[List[Dict[str, Any]]] = None,
+        **options: Any
+    ) -> List[Any]:
+        """Run a query to completion through _call, and record its cost in the query log."""
+        pages = QueryPages()
+        elapsed = [0.0]
+
+        def run():
+            # Timed per attempt, so time spent waiting on the throttle is not counted
+            started = time.perf_counter()
+            items = list(self.container.query_items(
+                query=query, parameters=parameters, **self._query_options(pages, options)
+            ))
+            elapsed[0] = time.perf_counter() - started
+            return items
+
+        items = self._call(name, run, request_charge=lambda: pages.request_charge)
+        self.query_log.record(name, query, parameters, pages, elapsed[0], len(items))
+        return items
+
+    def _paged(
+        self,
+        name: str,
+        query: str,
+        parameters: Optional[List[Dict[str, Any]]] = None,
+        **options: Any
+    ) -> Iterable[Dict[str, Any]]:
+        """
+        Iterate a lazy query one page at a time, each page fetched through the throttle
+        and recorded in the query log on its own.
+        A throttled page is fetched again from the same continuation.
+        """
+        continuation = None
+        while True:
+            pages = QueryPages()
+            elapsed = [0.0]
+
+            def fetch_page():
+                started = time.perf_counter()
+                iterator = self.container.query_items(
+                    query=query, parameters=parameters, **self._query_options(pages, options)
+                ).by_page(continuation)
+                page = list(next(iterator, []))
+                elapsed[0] = time.perf_counter() - started
+                return page, iterator.continuation_token
+            items, continuation = self._call(name, fetch_page, request_charge=lambda: pages.request_charge)
+            self.query_log.record(name, query, parameters, pages, elapsed[0], len(items))
+            yield from items
+            if not continuation:
+                return
+
+    def reconnect(self) -> None:
+        """
+        Open a new client with the existing credential and its cached token.
+        Used by server workers forked after the app was loaded, so they do not share
+        the parent's connections; database and container setup is not repeated.
+        """
+        self.client = CosmosClient(self.cosmos_host, credential=self.credential, connection_policy=self._connection_policy())
+        self.database = self.client.get_database_client(self.cosmos_database_id)
+        self.container = self.database.get_container_client(self.cosmos_container_id)
 
     def _initialize_database_and_container(self) -> None:
         try:
@@ -60,19 +295,110 @@ class CosmosDBManager:
         try:
             container = self.database.create_container(
                 id=self.cosmos_container_id, 
-                partition_key=PartitionKey(path='/user_id')
+                partition_key=partition_key_definition(self.partition_scheme),
+                indexing_policy=INDEXING_POLICY,
+                # TTL on, with no default: only documents with their own `ttl` (tombstones) expire
+                default_ttl=-1
             )
             print(f'Container with id \'{self.cosmos_container_id}\' created')
         except exceptions.CosmosResourceExistsError:
             container = self.database.get_container_client(self.cosmos_container_id)
             print(f'Container with id \'{self.cosmos_container_id}\' was found')
+            properties = container.read()
+            paths = properties.get("partitionKey", {}).get("paths", [])
+            if paths != self.partition_paths:
+                # A container's partition key cannot change; see scripts/migrate_partition_key.py
+                raise ValueError(
+                    f"Container '{self.cosmos_container_id}' is partitioned on {paths}, "
+                    f"not {self.partition_paths} ({self.partition_scheme})"
+                )
+            self._ensure_container_settings(container, properties)
         return container
 
+    def _ensure_container_settings(self, container: ContainerProxy, properties: Dict[str, Any]) -> None:
+        """
+        Add any missing composite indexes to an existing container (applied online by
+        Cosmos) and turn on TTL, which tombstones need to expire.
+        """
+        current = properties.get("indexingPolicy", {}).get("compositeIndexes", [])
+        default_ttl = properties.get("defaultTtl")
+        if all(index in current for index in INDEXING_POLICY["compositeIndexes"]) and default_ttl is not None:
+            return
+        # Settings left out of a replace are reset, so the TTL is always passed
+        self.database.replace_container(
+            container,
+            partition_key=partition_key_definition(self.partition_scheme),
+            indexing_policy=INDEXING_POLICY,
+            default_ttl=default_ttl if default_ttl is not None else -1
+        )
+        print(f'Indexing policy and TTL updated for container \'{self.cosmos_container_id}\'')
+
+    # Partition Keys
+    def _partition_key(
+        self,
+        user_id: str,
+        item_type: Optional[str] = None,
+        bucket: Optional[str] = None
+    ) -> PartitionKeyValue:
+        """
+        Narrowest partition key (or hierarchical key prefix) for the given levels.
+        Levels the scheme does not have are ignored; levels left out make a prefix.
+        """
+        if len(self.partition_paths) == 1:
+            return user_id
+        values = [user_id]
+        if item_type is not None:
+            values.append(item_type)
+            if len(self.partition_paths) == 3 and bucket is not None:
+                values.append(bucket)
+        return values
+
+    def _item_partition_key(self, item_id: str, user_id: str, item_type: Optional[str]) -> Optional[PartitionKeyValue]:
+        """Full partition key of one item, or None if its type is needed but unknown."""
+        if len(self.partition_paths) == 1:
+            return user_id
+        if item_type is None:
+            return None
+        bucket = CURRENT_PARTITION_BUCKET
+        if item_type == HISTORY_TYPE:
+            # History bucket ids end with their month: history:{task_id}:{bucket}
+            bucket = item_id.rsplit(":", 1)[-1]
+        return self._partition_key(user_id, item_type, bucket)
+
+    def _document_partition_key(self, item: Dict[str, Any]) -> PartitionKeyValue:
+        return self._partition_key(item["user_id"], item.get("type"), item.get("partition_bucket"))
+
+    def _find_item(self, item_id: str, user_id: str) -> Optional[Dict[str, Any]]:
+        """Look an item up by id across the user's sub-partitions (when its type is unknown)."""
+        items = self._query(
+            "find_item",
+            "SELECT * FROM c WHERE c.id = @id",
+            [{"name": "@id", "value": item_id}],
+            partition_key=self._partition_key(user_id)
+        )
+        return items[0] if items else None
+
+    def _upgrade(self, items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Bring documents read from storage to their current schema version (see schema_upgrades.py)."""
+        for item in items:
+            if upgrade_document(item) and self.upgrade_writer is not None:
+                self.upgrade_writer.submit(item)
+        return items
+
     # Core CRUD Operations
-    def get_item_by_id(self, item_id: str, user_id: str) -> Optional[Dict[str, Any]]:
-        """Get a single item by its ID and user_id (partition key)."""
+    def get_item_by_id(self, item_id: str, user_id: str, item_type: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """
+        Get a single item by its ID and user_id (partition key).
+        With a hierarchical partition key, pass `item_type` to make this a point read.
+        """
         try:
-            item = self.container.read_item(item=item_id, partition_key=user_id)
+            partition_key = self._item_partition_key(item_id, user_id, item_type)
+            if partition_key is None:
+                item = self._find_item(item_id, user_id)
+            else:
+                item = self._call("read_item", lambda: self.container.read_item(item=item_id, partition_key=partition_key))
+            if item is not None:
+                self._upgrade([item])
             return item
         except exceptions.CosmosResourceNotFoundError:
             return None
@@ -85,13 +411,16 @@ class CosmosDBManager:
         try:
             if 'user_id' not in item:
                 raise ValueError("user_id (partition key) is required for create operation")
+            if len(self.partition_paths) == 3:
+                item['partition_bucket'] = partition_bucket(item)
+            stamp_version(item)
             
             # Ensure timestamps are set
             current_time = datetime.now(timezone.utc).isoformat()
             item['created_at'] = current_time
             item['updated_at'] = current_time
             
-            created_item = self.container.create_item(body=item)
+            created_item = self._call("create_item", lambda: self.container.create_item(body=item))
             print(f"Item created with id: {created_item['id']}")
             return created_item
         except exceptions.CosmosResourceExistsError:
@@ -101,32 +430,98 @@ class CosmosDBManager:
             print(f"Error creating item: {str(e)}")
             raise
 
-    def update_item(self, item_id: str, updates: Dict[str, Any]) -> Dict[str, Any]:
-        """Update an existing item with new values."""
+    def update_item(
+        self,
+        item_id: str,
+        updates: Dict[str, Any],
+        existing_item: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """
+        Update an existing item with new values.
+        Pass `existing_item` when the caller has already read the item to skip the read.
+        """
         try:
             # Get the existing item
-            existing_item = self.get_item_by_id(item_id, updates['user_id'])
+            if existing_item is None:
+                existing_item = self.get_item_by_id(item_id, updates['user_id'], updates.get('type'))
             if not existing_item:
                 raise ValueError(f"Item with id {item_id} not found")
 
             # Update the item with new values
             existing_item.update(updates)
             existing_item['updated_at'] = datetime.now(timezone.utc).isoformat()
+            stamp_version(existing_item)
 
             # Replace the item in the container
-            updated_item = self.container.replace_item(
+            updated_item = self._call("replace_item", lambda: self.container.replace_item(
                 item=item_id,
                 body=existing_item
-            )
+            ))
             return updated_item
         except Exception as e:
             print(f"Error updating item {item_id}: {str(e)}")
             raise
 
-    def delete_item(self, item_id: str, user_id: str) -> bool:
-        """Delete an item by its ID."""
+    def replace_item(self, item: Dict[str, Any], etag: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Replace an item exactly as given, without touching its timestamps.
+        With `etag`, the replace only succeeds if the item is unchanged since it was read
+        (raises CosmosAccessConditionFailedError otherwise).
+        """
+        try:
+            options = {}
+            if etag:
+                options = {"etag": etag, "match_condition": MatchConditions.IfNotModified}
+            return self._call("replace_item", lambda: self.container.replace_item(item=item["id"], body=item, **options))
+        except exceptions.CosmosAccessConditionFailedError:
+            raise
+        except Exception as e:
+            print(f"Error replacing item {item.get('id')}: {str(e)}")
+            raise
+
+    def tombstone_document(self, item_id: str, user_id: str, item_type: str) -> Dict[str, Any]:
+        """The tombstone of a deleted item: reported by get_changes_since, expired by Cosmos after the TTL."""
+        deleted_at = datetime.now(timezone.utc).isoformat()
+        tombstone = {
+            "id": tombstone_id(item_id),
+            "user_id": user_id,
+            "type": TOMBSTONE_TYPE,
+            "item_id": item_id,
+            "item_type": item_type,
+            "deleted_at": deleted_at,
+            "updated_at": deleted_at,
+            "ttl": self.tombstone_ttl_seconds,
+        }
+        if len(self.partition_paths) == 3:
+            tombstone["partition_bucket"] = CURRENT_PARTITION_BUCKET
+        return tombstone
+
+    def tombstone_horizon(self) -> datetime:
+        """Deletes before this time may no longer have a tombstone."""
+        return datetime.now(timezone.utc) - timedelta(seconds=self.tombstone_ttl_seconds)
+
+    def delete_item(
+        self,
+        item_id: str,
+        user_id: str,
+        item_type: Optional[str] = None,
+        tombstone: Optional[Dict[str, Any]] = None
+    ) -> bool:
+        """
+        Delete an item by its ID.
+        With `tombstone` (see tombstone_document), it is written first, so a delete
+        that fails after it is still seen by other devices and is retried as a no-op.
+        """
         try:
-            self.container.delete_item(item=item_id, partition_key=user_id)
+            partition_key = self._item_partition_key(item_id, user_id, item_type)
+            if partition_key is None:
+                item = self._find_item(item_id, user_id)
+                if item is None:
+                    return False
+                partition_key = self._document_partition_key(item)
+            if tombstone is not None:
+                self._call("upsert_item", lambda: self.container.upsert_item(body=tombstone))
+            self._call("delete_item", lambda: self.container.delete_item(item=item_id, partition_key=partition_key))
             return True
         except exceptions.CosmosResourceNotFoundError:
             return False
@@ -134,25 +529,43 @@ class CosmosDBManager:
             print(f"Error deleting item {item_id}: {str(e)}")
             raise
 
-    def get_user_data(self, user_id: str) -> Dict[str, List[Dict[str, Any]]]:
-        """Get all data for a user (tasks, goals, categories, dashboard)."""
+    def get_user_data(
+        self,
+        user_id: str,
+        completed_since: Optional[str] = None,
+        include_tombstones: bool = False
+    ) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        Get all data for a user (tasks, goals, categories, dashboard).
+        With `completed_since`, completed tasks last updated before that time are left out.
+        With `include_tombstones`, the user's unexpired tombstones are returned too.
+        """
         try:
             query = """
             SELECT * FROM c 
             WHERE c.user_id = @user_id
+            AND c.type != @history_type
             """
-            items = list(self.container.query_items(
-                query=query,
-                parameters=[{"name": "@user_id", "value": user_id}],
-                enable_cross_partition_query=False
-            ))
+            parameters = [
+                {"name": "@user_id", "value": user_id},
+                {"name": "@history_type", "value": HISTORY_TYPE}
+            ]
+            if not include_tombstones:
+                query += "AND c.type != @tombstone_type\n"
+                parameters.append({"name": "@tombstone_type", "value": TOMBSTONE_TYPE})
+            if completed_since:
+                query += "AND (c.type != 'task' OR c.status != 'complete' OR c.updated_at >= @completed_since)"
+                parameters.append({"name": "@completed_since", "value": completed_since})
+            items = self._query("query_user_data", query, parameters, partition_key=self._partition_key(user_id))
+            self._upgrade(items)
 
             # Organize items by type
             result = {
                 "tasks": [],
                 "goals": [],
                 "categories": [],
-                "dashboard": None
+                "dashboard": None,
+                "tombstones": []
             }
 
             for item in items:
@@ -165,31 +578,229 @@ class CosmosDBManager:
                     result["categories"].append(item)
                 elif item_type == "dashboard":
                     result["dashboard"] = item
+                elif item_type == TOMBSTONE_TYPE:
+                    result["tombstones"].append(item)
 
             return result
         except Exception as e:
             print(f"Error getting user data: {str(e)}")
             raise
 
+    def get_history_buckets(
+        self,
+        user_id: str,
+        task_id: Optional[str] = None,
+        up_to_bucket: Optional[str] = None
+    ) -> Iterable[Dict[str, Any]]:
+        """
+        Get completion history buckets, newest bucket first, for one task or (without
+        `task_id`) all of a user's tasks. Results are paged lazily as they are iterated.
+        """
+        try:
+            conditions = ["c.user_id = @user_id", "c.type = @history_type"]
+            parameters = [
+                {"name": "@user_id", "value": user_id},
+                {"name": "@history_type", "value": HISTORY_TYPE}
+            ]
+            if task_id:
+                conditions.append("c.task_id = @task_id")
+                parameters.append({"name": "@task_id", "value": task_id})
+            if up_to_bucket:
+                conditions.append("c.bucket <= @up_to_bucket")
+                parameters.append({"name": "@up_to_bucket", "value": up_to_bucket})
+            query = f"""
+            SELECT * FROM c
+            WHERE {" AND ".join(conditions)}
+            ORDER BY c.bucket DESC
+            """
+            return self._paged(
+                "query_history", query, parameters, partition_key=self._partition_key(user_id, HISTORY_TYPE)
+            )
+        except Exception as e:
+            print(f"Error getting completion history for task {task_id}: {str(e)}")
+            raise
+
+    def get_user_ids(self) -> List[str]:
+        """Get every user id that owns documents (cross-partition; for maintenance scripts)."""
+        try:
+            return self._query(
+                "query_user_ids", "SELECT DISTINCT VALUE c.user_id FROM c", enable_cross_partition_query=True
+            )
+        except Exception as e:
+            print(f"Error listing user ids: {str(e)}")
+            raise
+
     def get_changes_since(self, user_id: str, since_timestamp: str) -> List[Dict[str, Any]]:
-        """Get all items that have been updated since a given timestamp."""
+        """Get all items, and tombstones of deleted items, that have been updated since a given timestamp."""
         try:
             query = """
             SELECT * FROM c 
             WHERE c.user_id = @user_id 
             AND c.updated_at > @since_timestamp
+            AND c.type != @history_type
             """
-            items = list(self.container.query_items(
-                query=query,
-                parameters=[
+            items = self._query(
+                "query_changes",
+                query,
+                [
                     {"name": "@user_id", "value": user_id},
-                    {"name": "@since_timestamp", "value": since_timestamp}
+                    {"name": "@since_timestamp", "value": since_timestamp},
+                    {"name": "@history_type", "value": HISTORY_TYPE}
                 ],
-                enable_cross_partition_query=False
-            ))
-            return items
+                partition_key=self._partition_key(user_id)
+            )
+            return self._upgrade(items)
         except Exception as e:
             print(f"Error getting changes since timestamp: {str(e)}")
             raise
 
+    def query_tasks(
+        self,
+        user_id: str,
+        filters: Optional[Dict[str, Any]] = None,
+        sort_by: str = "priority",
+        descending: bool = True,
+        page_size: int = 50,
+        cursor: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Get one page of a user's tasks, filtered and sorted server-side.
+
+        Pagination is keyset-based: the cursor encodes the sort value and id of the
+        last returned task, so every page is a bounded index seek regardless of how
+        many tasks the user has.
+        """
+        try:
+            if sort_by not in QUERY_SORT_FIELDS:
+                raise ValueError(f"Unsupported sort field: {sort_by}")
+            page_size = max(1, min(int(page_size), MAX_QUERY_PAGE_SIZE))
+            conditions, parameters = self._task_filter(user_id, filters or {})
+
+            if cursor:
+                position = decode_cursor(cursor)
+                if not {"s", "d", "r", "v", "id"} <= position.keys():
+                    raise ValueError("Invalid cursor")
+                if position["s"] != sort_by or position["d"] != descending:
+                    raise ValueError("Cursor does not match the requested sort order")
+                conditions.append(self._keyset_condition(sort_by, descending, position["r"]))
+                parameters.append({"name": "@cursor_id", "value": position["id"]})
+                if position["r"] == 2:
+                    parameters.append({"name": "@cursor_value", "value": position["v"]})
+
+            direction = "DESC" if descending else "ASC"
+            query = f"""
+            SELECT TOP {page_size + 1} * FROM c
+            WHERE {" AND ".join(conditions)}
+            ORDER BY c.{sort_by} {direction}, c.id {direction}
+            """
+            items = self._query(
+                "query_tasks", query, parameters, partition_key=self._partition_key(user_id, "task", CURRENT_PARTITION_BUCKET)
+            )
+            self._upgrade(items)
+
+            has_more = len(items) > page_size
+            items = items[:page_size]
+            next_cursor = None
+            if has_more:
+                last = items[-1]
+                value = last.get(sort_by, _UNDEFINED)
+                next_cursor = encode_cursor({
+                    "s": sort_by,
+                    "d": descending,
+                    "r": _sort_rank(value),
+                    "v": value if value is not _UNDEFINED else None,
+                    "id": last["id"]
+                })
+
+            return {"items": items, "next_cursor": next_cursor, "has_more": has_more}
+        except Exception as e:
+            print(f"Error querying tasks: {str(e)}")
+            raise
+
+    def find_tasks(self, user_id: str, filters: Dict[str, Any], limit: int) -> List[Dict[str, Any]]:
+        """Get up to `limit` of a user's tasks matching query_tasks filters (or `ids`), unordered."""
+        try:
+            conditions, parameters = self._task_filter(user_id, filters)
+            query = f"""
+            SELECT TOP {int(limit)} * FROM c
+            WHERE {" AND ".join(conditions)}
+            """
+            items = self._query(
+                "find_tasks", query, parameters, partition_key=self._partition_key(user_id, "task", CURRENT_PARTITION_BUCKET)
+            )
+            return self._upgrade(items)
+        except Exception as e:
+            print(f"Error finding tasks: {str(e)}")
+            raise
+
+    def replace_items_batch(self, items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Replace items of one partition (such as a user's tasks) in one transactional
+        batch, each only if unchanged since it was read (its `_etag`), and set their
+        updated_at. If any replace fails, none is written: CosmosBatchOperationError
+        with status 412 means an item changed meanwhile, 404 that one was deleted.
+        """
+        try:
+            current_time = datetime.now(timezone.utc).isoformat()
+            operations = []
+            for item in items:
+                item['updated_at'] = current_time
+                stamp_version(item)
+                operations.append(("replace", (item["id"], item), {"if_match_etag": item["_etag"]}))
+            partition_key = self._document_partition_key(items[0])
+            results = self._call("execute_item_batch", lambda: self.container.execute_item_batch(
+                batch_operations=operations,
+                partition_key=partition_key
+            ))
+            return [result["resourceBody"] for result in results]
+        except exceptions.CosmosBatchOperationError:
+            raise
+        except Exception as e:
+            print(f"Error replacing batch of {len(items)} items: {str(e)}")
+            raise
+
+    @staticmethod
+    def _task_filter(user_id: str, filters: Dict[str, Any]) -> Tuple[List[str], List[Dict[str, Any]]]:
+        """WHERE conditions and parameters selecting a user's tasks that match `filters`."""
+        conditions = ["c.user_id = @user_id", "c.type = 'task'"]
+        parameters = [{"name": "@user_id", "value": user_id}]
+
+        if filters.get("ids"):
+            conditions.append("ARRAY_CONTAINS(@ids, c.id)")
+            parameters.append({"name": "@ids", "value": list(filters["ids"])})
+        if filters.get("status"):
+            conditions.append("ARRAY_CONTAINS(@statuses, c.status)")
+            parameters.append({"name": "@statuses", "value": list(filters["status"])})
+        if filters.get("tags"):
+            conditions.append("EXISTS(SELECT VALUE t FROM t IN c.tags WHERE ARRAY_CONTAINS(@tags, t))")
+            parameters.append({"name": "@tags", "value": list(filters["tags"])})
+        for name, (field, operator) in QUERY_RANGE_FILTERS.items():
+            if filters.get(name):
+                conditions.append(f"c.{field} {operator} @{name}")
+                parameters.append({"name": f"@{name}", "value": filters[name]})
+        return conditions, parameters
+
+    @staticmethod
+    def _keyset_condition(field: str, descending: bool, rank: int) -> str:
+        """
+        Build the WHERE clause that resumes after the cursor position.
 
+        Cosmos orders undefined before null before defined values, and comparisons
+        against undefined/null never match, so each rank is tested explicitly.
+        """
+        rank_predicates = [
+            f"NOT IS_DEFINED(c.{field})",
+            f"IS_NULL(c.{field})",
+            f"(IS_DEFINED(c.{field}) AND NOT IS_NULL(c.{field}))"
+        ]
+        if descending:
+            same_rank = f"c.{field} < @cursor_value OR (c.{field} = @cursor_value AND c.id < @cursor_id)"
+            later_ranks = rank_predicates[:rank]
+        else:
+            same_rank = f"c.{field} > @cursor_value OR (c.{field} = @cursor_value AND c.id > @cursor_id)"
+            later_ranks = rank_predicates[rank + 1:]
+        if rank != 2:
+            id_operator = "<" if descending else ">"
+            same_rank = f"{rank_predicates[rank]} AND c.id {id_operator} @cursor_id"
+        clauses = [f"({same_rank})"] + [f"({predicate})" for predicate in later_ranks]
+        return "(" + " OR ".join(clauses) + ")"
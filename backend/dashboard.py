@@ -0,0 +1,191 @@
+# File: backend/dashboard.py
+
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+from azure.cosmos import exceptions
+from date_utils import parse_iso_datetime
+
+# The dashboard document lives in each user's partition under a fixed id
+DASHBOARD_ID = "dashboard"
+DASHBOARD_TYPE = "dashboard"
+
+# Counter fields kept on the dashboard document; nested dicts hold keyed counts
+SCALAR_COUNTERS = ["task_count", "effort_total", "open_effort_total"]
+KEYED_COUNTERS = ["status_counts", "open_due_by_day", "completions_by_week"]
+
+MAX_CONFLICT_RETRIES = 5
+
+def _week_key(value: Optional[str]) -> Optional[str]:
+    parsed = parse_iso_datetime(value)
+    if not parsed:
+        return None
+    year, week, _ = parsed.isocalendar()
+    return f"{year}-W{week:02d}"
+
+def empty_aggregate() -> Dict[str, Any]:
+    """Counters for a user with no tasks."""
+    aggregate: Dict[str, Any] = {name: 0 for name in SCALAR_COUNTERS}
+    aggregate.update({name: {} for name in KEYED_COUNTERS})
+    return aggregate
+
+def task_contribution(task: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """The counters a single task document adds to its user's dashboard."""
+    contribution = empty_aggregate()
+    if not task or task.get("type") != "task":
+        return contribution
+
+    status = task.get("status") or "not_started"
+    effort = task.get("effort") or 0
+    is_open = status != "complete"
+
+    contribution["task_count"] = 1
+    contribution["effort_total"] = effort
+    contribution["status_counts"][status] = 1
+    if is_open:
+        contribution["open_effort_total"] = effort
+        due = parse_iso_datetime(task.get("due_date"))
+        if due:
+            contribution["open_due_by_day"][due.date().isoformat()] = 1
+
+    add_completions(contribution, task.get("completion_history") or [])
+    return contribution
+
+def add_completions(aggregate: Dict[str, Any], entries: List[Dict[str, Any]], sign: int = 1) -> None:
+    """Count completion entries into the per-week totals."""
+    weeks = aggregate.setdefault("completions_by_week", {})
+    for entry in entries:
+        week = _week_key(entry.get("completed_at"))
+        if week:
+            weeks[week] = weeks.get(week, 0) + sign
+            if weeks[week] == 0:
+                del weeks[week]
+
+def apply_delta(aggregate: Dict[str, Any], contribution: Dict[str, Any], sign: int) -> bool:
+    """Add (sign=1) or subtract (sign=-1) a contribution in place. Returns True if anything changed."""
+    changed = False
+    for name in SCALAR_COUNTERS:
+        if contribution[name]:
+            aggregate[name] = aggregate.get(name, 0) + sign * contribution[name]
+            changed = True
+    for name in KEYED_COUNTERS:
+        counts = aggregate.setdefault(name, {})
+        for key, value in contribution[name].items():
+            counts[key] = counts.get(key, 0) + sign * value
+            if counts[key] == 0:
+                del counts[key]
+            changed = True
+    return changed
+
+def diff_contributions(
+    before: Optional[Dict[str, Any]],
+    after: Optional[Dict[str, Any]],
+    archived_added: Optional[List[Dict[str, Any]]] = None,
+    archived_removed: Optional[List[Dict[str, Any]]] = None
+) -> Dict[str, Any]:
+    """
+    Net change in counters when a task goes from `before` to `after` (either may be None).
+    Completions moved into or deleted from the history archive are passed separately,
+    since they are no longer part of the task document.
+    """
+    delta = task_contribution(after)
+    apply_delta(delta, task_contribution(before), -1)
+    add_completions(delta, archived_added or [])
+    add_completions(delta, archived_removed or [], sign=-1)
+    return delta
+
+def dashboard_summary(document: Optional[Dict[str, Any]], now: Optional[datetime] = None) -> Dict[str, Any]:
+    """
+    Shape a stored dashboard document for clients.
+
+    Overdue and due-today counts depend on the current date, so they are derived
+    here from the per-day open task counts rather than stored.
+    """
+    document = document or empty_aggregate()
+    today = (now or datetime.now(timezone.utc)).date().isoformat()
+    open_due_by_day = document.get("open_due_by_day", {})
+    return {
+        "task_count": document.get("task_count", 0),
+        "status_counts": dict(document.get("status_counts", {})),
+        "overdue_count": sum(count for day, count in open_due_by_day.items() if day < today),
+        "due_today_count": open_due_by_day.get(today, 0),
+        "effort_total": document.get("effort_total", 0),
+        "open_effort_total": document.get("open_effort_total", 0),
+        "completions_by_week": dict(document.get("completions_by_week", {})),
+        "aggregated_at": document.get("aggregated_at"),
+    }
+
+class DashboardAggregator:
+    """Maintains each user's dashboard document from task deltas."""
+
+    def __init__(self, cosmos_db):
+        self.cosmos_db = cosmos_db
+
+    def get(self, user_id: str) -> Dict[str, Any]:
+        """Read a user's dashboard with a single point read."""
+        return dashboard_summary(self.cosmos_db.get_item_by_id(DASHBOARD_ID, user_id, DASHBOARD_TYPE))
+
+    def apply_change(
+        self,
+        user_id: str,
+        before: Optional[Dict[str, Any]],
+        after: Optional[Dict[str, Any]],
+        archived_added: Optional[List[Dict[str, Any]]] = None,
+        archived_removed: Optional[List[Dict[str, Any]]] = None
+    ) -> None:
+        """
+        Apply the delta between two versions of a task to the dashboard.
+        Concurrent writers are reconciled with ETag-conditional replaces.
+        """
+        self._write_delta(user_id, diff_contributions(before, after, archived_added, archived_removed))
+
+    def apply_changes(self, user_id: str, changes: List[Tuple[Optional[Dict[str, Any]], Optional[Dict[str, Any]]]]) -> None:
+        """Apply the combined delta of several (before, after) task changes with one dashboard write."""
+        delta = empty_aggregate()
+        for before, after in changes:
+            apply_delta(delta, diff_contributions(before, after), 1)
+        self._write_delta(user_id, delta)
+
+    def _write_delta(self, user_id: str, delta: Dict[str, Any]) -> None:
+        if not apply_delta(empty_aggregate(), delta, 1):
+            return
+
+        for _ in range(MAX_CONFLICT_RETRIES):
+            document = self.cosmos_db.get_item_by_id(DASHBOARD_ID, user_id, DASHBOARD_TYPE)
+            try:
+                if document is None:
+                    document = self._new_document(user_id)
+                    apply_delta(document, delta, 1)
+                    self.cosmos_db.create_item(document)
+                else:
+                    apply_delta(document, delta, 1)
+                    document["aggregated_at"] = datetime.now(timezone.utc).isoformat()
+                    self.cosmos_db.replace_item(document, etag=document.get("_etag"))
+                return
+            except (exceptions.CosmosAccessConditionFailedError, exceptions.CosmosResourceExistsError):
+                continue
+        raise RuntimeError(f"Dashboard for user {user_id} is too contended to update")
+
+    def rebuild(self, user_id: str) -> Dict[str, Any]:
+        """Recompute a user's dashboard from all of their tasks, repairing any drift."""
+        document = self._new_document(user_id)
+        for task in self.cosmos_db.get_user_data(user_id)["tasks"]:
+            apply_delta(document, task_contribution(task), 1)
+        for history in self.cosmos_db.get_history_buckets(user_id):
+            add_completions(document, history.get("entries", []))
+
+        existing = self.cosmos_db.get_item_by_id(DASHBOARD_ID, user_id, DASHBOARD_TYPE)
+        if existing is None:
+            return self.cosmos_db.create_item(document)
+        existing.update(document)
+        return self.cosmos_db.replace_item(existing)
+
+    @staticmethod
+    def _new_document(user_id: str) -> Dict[str, Any]:
+        document = empty_aggregate()
+        document.update({
+            "id": DASHBOARD_ID,
+            "user_id": user_id,
+            "type": DASHBOARD_TYPE,
+            "aggregated_at": datetime.now(timezone.utc).isoformat(),
+        })
+        return document
@@ -0,0 +1,17 @@
+# File: backend/date_utils.py
+
+from datetime import datetime, timezone
+from typing import Optional
+from dateutil import parser as date_parser
+
+def parse_iso_datetime(value: Optional[str]) -> Optional[datetime]:
+    """Parse an ISO 8601 string into an aware UTC datetime, or None if missing/invalid."""
+    if not value:
+        return None
+    try:
+        parsed = date_parser.isoparse(value)
+    except (ValueError, TypeError):
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.astimezone(timezone.utc)
@@ -0,0 +1,103 @@
+# File: backend/field_merge.py
+
+import humps
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional, Tuple
+from date_utils import parse_iso_datetime
+
+# Fields the server maintains; they have no per-field version and are never merged
+SERVER_FIELDS = {
+    "id", "user_id", "type", "created_at", "updated_at", "schema_version", "field_versions",
+    "partition_bucket", "completion_summary",
+}
+# Fields whose updates add to what is stored rather than replace it, so they always apply
+APPEND_FIELDS = {"completion_history"}
+
+def version_timestamp(value: Optional[str], now: Optional[datetime] = None) -> str:
+    """
+    A change time in one comparable form (UTC isoformat). Missing or invalid times,
+    and times ahead of the server's clock, become the server's current time, so a
+    device with a fast clock cannot win every later conflict.
+    """
+    now = now or datetime.now(timezone.utc)
+    parsed = parse_iso_datetime(value)
+    if parsed is None or parsed > now:
+        parsed = now
+    return parsed.isoformat()
+
+def change_versions(timestamp: Optional[str], field_timestamps: Optional[Dict[str, str]]) -> Tuple[str, Dict[str, str]]:
+    """
+    The version of a change and of each of its fields (client names, as collected by
+    coalesce_changes), keyed by storage name.
+    """
+    now = datetime.now(timezone.utc)
+    return version_timestamp(timestamp, now), {
+        humps.decamelize(field): version_timestamp(value, now) for field, value in (field_timestamps or {}).items()
+    }
+
+def _content_fields(document: Dict[str, Any]):
+    return [
+        field for field in document
+        if field not in SERVER_FIELDS and field not in APPEND_FIELDS and not field.startswith("_")
+    ]
+
+def stamp_fields(document: Dict[str, Any], timestamp: str, field_timestamps: Optional[Dict[str, str]] = None) -> None:
+    """Set the version of every content field of a new document."""
+    field_timestamps = field_timestamps or {}
+    document["field_versions"] = {field: field_timestamps.get(field, timestamp) for field in _content_fields(document)}
+
+def merge_fields(
+    stored: Dict[str, Any],
+    updates: Dict[str, Any],
+    timestamp: str,
+    field_timestamps: Optional[Dict[str, str]] = None
+) -> Dict[str, Any]:
+    """
+    Field-level last-writer-wins: keep each updated field only if its change is at
+    least as new as the stored field's version, and return the updates to apply,
+    including the new field_versions. `timestamp` and `field_timestamps` are the
+    change's versions from change_versions().
+
+    The fields of documents stored before field versions existed take the
+    document's updated_at as their version.
+    """
+    field_timestamps = field_timestamps or {}
+    versions = stored.get("field_versions")
+    if versions is None:
+        stored_at = version_timestamp(stored.get("updated_at"))
+        versions = {field: stored_at for field in _content_fields(stored)}
+    versions = dict(versions)
+    merged: Dict[str, Any] = {}
+    for field, value in updates.items():
+        if field in SERVER_FIELDS or field in APPEND_FIELDS or field.startswith("_"):
+            merged[field] = value
+            continue
+        changed_at = field_timestamps.get(field, timestamp)
+        if field in versions and changed_at < versions[field]:
+            # The stored value is newer; the client gets it back in the sync response
+            continue
+        merged[field] = value
+        versions[field] = changed_at
+    merged["field_versions"] = versions
+    return merged
+
+def changed_fields(data: Dict[str, Any], sent: Optional[Dict[str, Any]], since: Optional[str]) -> Dict[str, Any]:
+    """
+    The part of a document (client form) a client does not have yet: fields it sent
+    whose stored value differs (its change lost to a newer one), and fields it did
+    not send that changed after `since`, its last sync. Documents without field
+    versions are reported whole.
+    """
+    versions = data.get("fieldVersions")
+    if not versions:
+        return data
+    sent = sent or {}
+    since = version_timestamp(since) if since else ""
+    changed = {"updatedAt": data.get("updatedAt"), "fieldVersions": versions}
+    for key, value in data.items():
+        if key in sent:
+            if sent[key] != value:
+                changed[key] = value
+        elif key in versions and versions[key] > since:
+            changed[key] = value
+    return changed
@@ -0,0 +1,69 @@
+# File: backend/gunicorn.conf.py
+#
+# Production server: gunicorn managing uvicorn workers.
+#   gunicorn -c gunicorn.conf.py app:app
+
+import os
+import signal
+import threading
+import time
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '8000')}"
+worker_class = "uvicorn.workers.UvicornWorker"
+
+# One async worker by default: push events (SSE) and the search index live in each
+# worker, and nothing fans writes out across workers yet, so with several workers
+# sessions miss pushes and searches miss writes handled elsewhere. WEB_CONCURRENCY
+# opts into more workers where that is acceptable. Write-behind and actor modes
+# always use a single worker: the journal, and each user's actor state, belong to
+# one process
+workers = int(os.environ.get("WEB_CONCURRENCY", "1"))
+if os.environ.get("WRITE_BEHIND_ENABLED", "false").lower() == "true":
+    workers = 1
+if os.environ.get("ACTOR_MODE_ENABLED", "false").lower() == "true":
+    workers = 1
+
+# Import the app (and open the Cosmos DB client, fetching its token) once in the
+# master; workers fork from it and only open their own connections (post_fork)
+preload_app = True
+
+# Recycle a worker after this many requests (jittered so they do not all restart at once)
+max_requests = int(os.environ.get("MAX_REQUESTS", "10000"))
+max_requests_jitter = int(os.environ.get("MAX_REQUESTS_JITTER", "1000"))
+
+# Recycle a worker whose resident memory grows past this (0 disables the check)
+WORKER_MAX_MEMORY_MB = int(os.environ.get("WORKER_MAX_MEMORY_MB", "0"))
+WORKER_MEMORY_CHECK_SECONDS = float(os.environ.get("WORKER_MEMORY_CHECK_SECONDS", "30"))
+
+# Open SSE streams are closed after this on shutdown; clients reconnect to another worker
+graceful_timeout = int(os.environ.get("GRACEFUL_TIMEOUT", "30"))
+timeout = int(os.environ.get("WORKER_TIMEOUT", "60"))
+keepalive = 5
+
+# Access log to stdout; set ACCESS_LOG="" to turn it off (e.g. for load tests)
+accesslog = os.environ.get("ACCESS_LOG", "-") or None
+errorlog = "-"
+
+def _resident_memory_mb() -> float:
+    with open("/proc/self/statm") as statm:
+        resident_pages = int(statm.read().split()[1])
+    return resident_pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+
+def _watch_memory(worker) -> None:
+    while True:
+        time.sleep(WORKER_MEMORY_CHECK_SECONDS)
+        try:
+            memory_mb = _resident_memory_mb()
+        except OSError:
+            return
+        if memory_mb > WORKER_MAX_MEMORY_MB:
+            worker.log.info(f"Worker {worker.pid} using {memory_mb:.0f} MB, restarting")
+            # Graceful shutdown; the master starts a replacement
+            os.kill(worker.pid, signal.SIGTERM)
+            return
+
+def post_fork(server, worker):
+    import app
+    app.cosmos_db.reconnect()
+    if WORKER_MAX_MEMORY_MB > 0 and os.path.exists("/proc/self/statm"):
+        threading.Thread(target=_watch_memory, args=(worker,), daemon=True).start()
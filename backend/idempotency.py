@@ -0,0 +1,109 @@
+# File: backend/idempotency.py
+
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+
+class IdempotencyKeyReused(Exception):
+    """An idempotency key was sent again with a different request body."""
+
+class CachedResponse:
+    """A completed response, stored so a replayed request can be answered as-is."""
+
+    def __init__(self, status_code: int, body: bytes, media_type: str):
+        self.status_code = status_code
+        self.body = body
+        self.media_type = media_type
+
+class IdempotencyStore:
+    """
+    Bounded, TTL-evicted store of recent idempotency keys and their responses.
+
+    The first request for a key runs the handler; concurrent duplicates wait for
+    it and later duplicates get the cached response. Only successful (2xx)
+    responses are kept, so a request that failed can be retried for real.
+    """
+
+    def __init__(self, max_entries: int = 10000, ttl_seconds: int = 3600):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, Tuple[float, str, CachedResponse]]" = OrderedDict()
+        self._in_flight: Dict[str, Tuple[str, asyncio.Future]] = {}
+        self.hits = 0
+        self.misses = 0
+        self.waits = 0
+
+    def _evict(self, now: float) -> None:
+        while self._entries:
+            key, (stored_at, _, _) = next(iter(self._entries.items()))
+            if now - stored_at < self.ttl_seconds and len(self._entries) <= self.max_entries:
+                break
+            del self._entries[key]
+
+    def _lookup(self, key: str, fingerprint: str, now: float) -> Optional[CachedResponse]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        stored_at, stored_fingerprint, response = entry
+        if now - stored_at >= self.ttl_seconds:
+            del self._entries[key]
+            return None
+        if stored_fingerprint != fingerprint:
+            raise IdempotencyKeyReused(key)
+        return response
+
+    async def run(
+        self,
+        key: str,
+        fingerprint: str,
+        handler: Callable[[], Awaitable[CachedResponse]]
+    ) -> Tuple[CachedResponse, bool]:
+        """
+        Run `handler` once per key. Returns the response and whether it was replayed.
+        `fingerprint` identifies the request body; reusing a key for a different body
+        raises IdempotencyKeyReused.
+        """
+        now = time.monotonic()
+        self._evict(now)
+
+        cached = self._lookup(key, fingerprint, now)
+        if cached is not None:
+            self.hits += 1
+            return cached, True
+
+        in_flight = self._in_flight.get(key)
+        if in_flight is not None:
+            in_flight_fingerprint, future = in_flight
+            if in_flight_fingerprint != fingerprint:
+                raise IdempotencyKeyReused(key)
+            self.waits += 1
+            return await asyncio.shield(future), True
+
+        self.misses += 1
+        future = asyncio.get_running_loop().create_future()
+        self._in_flight[key] = (fingerprint, future)
+        try:
+            response = await handler()
+        except BaseException as e:
+            future.set_exception(e)
+            # Mark the exception retrieved in case no duplicate was waiting on it
+            future.exception()
+            raise
+        finally:
+            self._in_flight.pop(key, None)
+
+        future.set_result(response)
+        if 200 <= response.status_code < 300:
+            self._entries[key] = (time.monotonic(), fingerprint, response)
+            self._evict(time.monotonic())
+        return response, False
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "entries": len(self._entries),
+            "in_flight": len(self._in_flight),
+            "hits": self.hits,
+            "misses": self.misses,
+            "waits": self.waits,
+        }
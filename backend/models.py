@@ -0,0 +1,171 @@
+# File: backend/models.py
+
+from typing import Any, Dict, List, Literal, Optional, Union
+from typing_extensions import Annotated
+from pydantic import (
+    BaseModel,
+    BeforeValidator,
+    ConfigDict,
+    SerializationInfo,
+    TypeAdapter,
+    ValidationError,
+    WrapSerializer,
+)
+from pydantic.alias_generators import to_camel
+from case_conversion import camel_to_snake, snake_to_camel
+
+_STATUS_TO_STORED = {"notStarted": "not_started", "workingOnIt": "working_on_it"}
+_STATUS_TO_CLIENT = {stored: client for client, stored in _STATUS_TO_STORED.items()}
+
+def _status_from_any_case(value: Any) -> Any:
+    return _STATUS_TO_STORED.get(value, value) if isinstance(value, str) else value
+
+def _status_to_output_case(value: Any, handler, info: SerializationInfo) -> Any:
+    value = handler(value)
+    return _STATUS_TO_CLIENT.get(value, value) if info.by_alias else value
+
+# Stored as snake_case, accepted and returned to clients as camelCase
+Status = Annotated[
+    Literal["not_started", "working_on_it", "complete"],
+    BeforeValidator(_status_from_any_case),
+    WrapSerializer(_status_to_output_case),
+]
+
+class CamelModel(BaseModel):
+    """
+    Base for stored documents: snake_case field names, camelCase aliases.
+
+    Validation accepts either case. Dumping with by_alias=True gives the client
+    (camelCase) shape, without it the storage (snake_case) shape. Fields that are
+    not declared are kept as-is; parse_change_data and serialize_document convert
+    their keys.
+    """
+
+    model_config = ConfigDict(alias_generator=to_camel, populate_by_name=True, extra="allow")
+
+def _convert_extra_keys(model: BaseModel, data: Dict[str, Any], by_alias: bool) -> Dict[str, Any]:
+    """Convert the keys of undeclared fields in a dumped model, including nested models."""
+    if model.__pydantic_extra__:
+        convert = snake_to_camel if by_alias else camel_to_snake
+        for key in model.__pydantic_extra__:
+            if key in data and not key.startswith("_"):
+                data.update(convert({key: data.pop(key)}))
+    for name, value in model.__dict__.items():
+        if isinstance(value, BaseModel):
+            key = model.model_fields[name].alias if by_alias else name
+            if key in data:
+                _convert_extra_keys(value, data[key], by_alias)
+        elif isinstance(value, list) and value and isinstance(value[0], BaseModel):
+            key = model.model_fields[name].alias if by_alias else name
+            for item, item_data in zip(value, data.get(key) or ()):
+                _convert_extra_keys(item, item_data, by_alias)
+    return data
+
+class CompletionEntry(CamelModel):
+    completed_at: str
+    next_due_date: Optional[str] = None
+    completion_notes: Optional[str] = None
+
+class CompletionSummary(CamelModel):
+    count: int = 0
+    streak: int = 0
+    last_completed_at: Optional[str] = None
+    last_next_due_date: Optional[str] = None
+
+class RecurrenceRule(CamelModel):
+    frequency: Literal["daily", "weekly", "monthly", "yearly"]
+    interval: int = 1
+    end_date: Optional[str] = None
+    max_occurrences: Optional[int] = None
+    days_of_week: Optional[List[int]] = None
+    day_of_month: Optional[int] = None
+    months: Optional[List[int]] = None
+    week_of_month: Optional[int] = None
+
+class Recurrence(CamelModel):
+    is_recurring: bool = False
+    rule: Optional[RecurrenceRule] = None
+
+class DocumentBase(CamelModel):
+    id: Optional[str] = None
+    user_id: Optional[str] = None
+    type: Optional[str] = None
+    created_at: Optional[str] = None
+    updated_at: Optional[str] = None
+    schema_version: Optional[int] = None
+    # field_versions (field_merge.py) is left undeclared so its keys are case-converted like the fields they name
+
+class TaskDocument(DocumentBase):
+    """Task document (see "Task Document" in docs/design_document.md)."""
+
+    title: Optional[str] = None
+    status: Optional[Status] = None
+    priority: Optional[Union[int, float]] = None
+    dynamic_priority: Optional[Union[int, float]] = None
+    effort: Optional[Union[int, float]] = None
+    notes: Optional[str] = None
+    due_date: Optional[str] = None
+    scheduled_date: Optional[str] = None
+    completion_history: Optional[List[CompletionEntry]] = None
+    completion_summary: Optional[CompletionSummary] = None
+    recurrence: Optional[Recurrence] = None
+    tags: Optional[List[str]] = None
+
+class GoalDocument(DocumentBase):
+    title: Optional[str] = None
+    status: Optional[Status] = None
+    notes: Optional[str] = None
+    due_date: Optional[str] = None
+
+class CategoryDocument(DocumentBase):
+    name: Optional[str] = None
+    color: Optional[str] = None
+
+class DashboardDocument(DocumentBase):
+    task_count: int = 0
+    status_counts: Dict[Status, int] = {}
+    effort_total: float = 0
+    open_effort_total: float = 0
+    open_due_by_day: Dict[str, int] = {}
+    completions_by_week: Dict[str, int] = {}
+    aggregated_at: Optional[str] = None
+
+# Built once at import so every validation and dump runs in pydantic-core
+DOCUMENT_ADAPTERS: Dict[str, TypeAdapter] = {
+    "task": TypeAdapter(TaskDocument),
+    "goal": TypeAdapter(GoalDocument),
+    "category": TypeAdapter(CategoryDocument),
+    "dashboard": TypeAdapter(DashboardDocument),
+}
+
+def parse_change_data(change_type: str, data: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Validate client (camelCase) change data and return it in storage (snake_case) form.
+    Only fields present in the change are returned, so partial updates stay partial.
+    Unknown document types fall back to plain case conversion.
+    """
+    adapter = DOCUMENT_ADAPTERS.get(change_type)
+    if adapter is None:
+        return camel_to_snake(data)
+    document = adapter.validate_python(data)
+    return _convert_extra_keys(document, adapter.dump_python(document, exclude_unset=True), by_alias=False)
+
+def serialize_document(document: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Convert a stored (snake_case) document to the client (camelCase) shape.
+    Documents written before the models existed that do not validate are still
+    returned, converted field by field.
+    """
+    adapter = DOCUMENT_ADAPTERS.get(document.get("type"))
+    if adapter is None:
+        return snake_to_camel(document)
+    try:
+        model = adapter.validate_python(document)
+    except ValidationError as e:
+        print(f"Stored {document.get('type')} {document.get('id')} does not match its model: {str(e)}")
+        return snake_to_camel(document)
+    return _convert_extra_keys(
+        model,
+        adapter.dump_python(model, by_alias=True, exclude_unset=True, mode="json"),
+        by_alias=True
+    )
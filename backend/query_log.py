@@ -0,0 +1,204 @@
+# File: backend/query_log.py
+
+import json
+import os
+import threading
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+# Query metrics (x-ms-documentdb-query-metrics) summed over a query's pages
+_SUMMED_METRICS = {
+    "totalExecutionTimeInMs",
+    "retrievedDocumentCount",
+    "retrievedDocumentSize",
+    "outputDocumentCount",
+    "outputDocumentSize",
+    "indexLookupTimeInMs",
+    "documentLoadTimeInMs",
+}
+
+def parse_query_metrics(header: Optional[str]) -> Dict[str, float]:
+    """Parse the semicolon-delimited `name=value` query metrics header."""
+    metrics = {}
+    for pair in (header or "").split(";"):
+        name, _, value = pair.partition("=")
+        try:
+            metrics[name.strip()] = float(value)
+        except ValueError:
+            continue
+    return metrics
+
+class QueryPages:
+    """
+    Response hook for `query_items` that adds up the cost of a query's pages:
+    request charge, query metrics and the indexes Cosmos reports it could have used.
+    The SDK calls `clear()` when the query starts.
+    """
+
+    def __init__(self):
+        self.clear()
+
+    def clear(self) -> None:
+        self.pages = 0
+        self.request_charge = 0.0
+        self.metrics: Dict[str, float] = {}
+        self.potential_single: List[str] = []
+        self.potential_composite: List[List[str]] = []
+
+    def __call__(self, headers: Dict[str, Any], result: Any) -> None:
+        # The SDK also calls the hook once with the pager itself, before any page is fetched
+        if not isinstance(result, dict):
+            return
+        self.pages += 1
+        self.request_charge += float(headers.get("x-ms-request-charge") or 0)
+        for name, value in parse_query_metrics(headers.get("x-ms-documentdb-query-metrics")).items():
+            if name in _SUMMED_METRICS:
+                self.metrics[name] = self.metrics.get(name, 0.0) + value
+        # Decoded from base64 JSON by the SDK
+        index_metrics = headers.get("x-ms-cosmos-index-utilization")
+        if isinstance(index_metrics, dict):
+            for index in index_metrics.get("PotentialSingleIndexes") or []:
+                if index.get("IndexSpec") and index["IndexSpec"] not in self.potential_single:
+                    self.potential_single.append(index["IndexSpec"])
+            for index in index_metrics.get("PotentialCompositeIndexes") or []:
+                if index.get("IndexSpecs") and index["IndexSpecs"] not in self.potential_composite:
+                    self.potential_composite.append(index["IndexSpecs"])
+
+def _composite_key(specs: List[str]) -> List[tuple]:
+    """"/due_date ASC" -> ("/due_date", "ascending")."""
+    key = []
+    for spec in specs:
+        path, _, order = spec.strip().partition(" ")
+        key.append((path, "descending" if order.strip().upper() == "DESC" else "ascending"))
+    return key
+
+def _inverted(key: List[tuple]) -> List[tuple]:
+    return [(path, "ascending" if order == "descending" else "descending") for path, order in key]
+
+def missing_indexes(pages: QueryPages, indexing_policy: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """
+    The indexes Cosmos says would have served a query, each marked with whether
+    the indexing policy declares it. One the policy declares but the container lacks
+    means the policy has not been applied yet (or is still being built).
+    """
+    excluded = [entry["path"].rstrip("?*").rstrip("/") for entry in indexing_policy.get("excludedPaths", [])]
+    composites = [
+        [(entry["path"], entry.get("order", "ascending")) for entry in index]
+        for index in indexing_policy.get("compositeIndexes", [])
+    ]
+    flagged = []
+    for spec in pages.potential_single:
+        path = spec.rstrip("?*").rstrip("/")
+        in_policy = not any(path == prefix or path.startswith(prefix + "/") for prefix in excluded)
+        flagged.append({"index": spec, "kind": "range", "in_policy": in_policy})
+    for specs in pages.potential_composite:
+        key = _composite_key(specs)
+        # A composite index also serves ORDER BY with every direction inverted
+        in_policy = key in composites or _inverted(key) in composites
+        flagged.append({"index": ", ".join(specs), "kind": "composite", "in_policy": in_policy})
+    return flagged
+
+class QueryLog:
+    """
+    Per-query cost counters for one worker process, and a slow query log.
+
+    A query is slow when it takes at least `slow_threshold_ms`, or costs at least
+    `slow_request_units` (0 turns that check off). Slow queries are printed and,
+    with `log_path`, appended to it as JSON lines, with their parameterized SQL and
+    parameter names; parameter values are not logged. Every slow query lists the
+    indexes Cosmos reported missing, checked against `indexing_policy`.
+    """
+
+    def __init__(
+        self,
+        indexing_policy: Dict[str, Any],
+        slow_threshold_ms: float = 100,
+        slow_request_units: float = 0,
+        log_path: Optional[str] = None
+    ):
+        self.indexing_policy = indexing_policy
+        self.slow_threshold_ms = slow_threshold_ms
+        self.slow_request_units = slow_request_units
+        self.log_path = log_path
+        self._queries: Dict[str, Dict[str, float]] = {}
+        self._lock = threading.Lock()
+        self._file = None
+        self._file_pid: Optional[int] = None
+
+    def record(
+        self,
+        name: str,
+        query: str,
+        parameters: Optional[List[Dict[str, Any]]],
+        pages: QueryPages,
+        duration_seconds: float,
+        items: int
+    ) -> None:
+        duration_ms = duration_seconds * 1000
+        slow = duration_ms >= self.slow_threshold_ms or (
+            self.slow_request_units > 0 and pages.request_charge >= self.slow_request_units
+        )
+        flagged = missing_indexes(pages, self.indexing_policy)
+        with self._lock:
+            counters = self._queries.setdefault(name, {
+                "count": 0, "slow": 0, "pages": 0, "request_units": 0.0, "total_ms": 0.0, "max_ms": 0.0,
+                "retrieved_documents": 0, "output_documents": 0, "missing_indexes": 0
+            })
+            counters["count"] += 1
+            counters["slow"] += slow
+            counters["pages"] += pages.pages
+            counters["request_units"] += pages.request_charge
+            counters["total_ms"] += duration_ms
+            counters["max_ms"] = max(counters["max_ms"], duration_ms)
+            counters["retrieved_documents"] += int(pages.metrics.get("retrievedDocumentCount", 0))
+            counters["output_documents"] += int(pages.metrics.get("outputDocumentCount", 0))
+            counters["missing_indexes"] += bool(flagged)
+        if slow:
+            self._log_slow(name, query, parameters, pages, duration_ms, items, flagged)
+
+    def _log_slow(self, name, query, parameters, pages, duration_ms, items, flagged) -> None:
+        entry = {
+            "at": datetime.now(timezone.utc).isoformat(),
+            "query": name,
+            "sql": " ".join(query.split()),
+            "parameters": [parameter["name"] for parameter in parameters or []],
+            "duration_ms": round(duration_ms, 2),
+            "request_charge": round(pages.request_charge, 2),
+            "pages": pages.pages,
+            "items": items,
+            "metrics": pages.metrics,
+            "missing_indexes": flagged,
+        }
+        print(f"Slow query {name}: {entry['duration_ms']} ms, {entry['request_charge']} RU, "
+              f"{pages.pages} pages, {items} items: {entry['sql']}")
+        for index in flagged:
+            where = "declared in INDEXING_POLICY but not applied" if index["in_policy"] else "not in INDEXING_POLICY"
+            print(f"Slow query {name}: missing {index['kind']} index {index['index']} ({where})")
+        if self.log_path:
+            try:
+                self._open().write(json.dumps(entry, separators=(",", ":")) + "\n")
+            except OSError as e:
+                print(f"Error writing slow query log: {str(e)}")
+
+    def _open(self):
+        # One writer per worker process
+        if self._file is None or self._file_pid != os.getpid():
+            directory = os.path.dirname(self.log_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._file = open(self.log_path, "a", encoding="utf-8", buffering=1)
+            self._file_pid = os.getpid()
+        return self._file
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                name: dict(
+                    counters,
+                    request_units=round(counters["request_units"], 2),
+                    average_ms=round(counters["total_ms"] / counters["count"], 2),
+                    total_ms=round(counters["total_ms"], 2),
+                    max_ms=round(counters["max_ms"], 2)
+                )
+                for name, counters in self._queries.items()
+            }
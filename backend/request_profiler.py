@@ -0,0 +1,230 @@
+# File: backend/request_profiler.py
+
+import hmac
+import os
+import random
+import re
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from typing import Any, Dict, Optional
+from admission import header_value
+
+_BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+_UNSAFE_ID_CHARACTERS = re.compile(r"[^A-Za-z0-9._-]")
+_WORKER_THREAD_PREFIX = "AnyIO worker thread"
+
+def profile_id_for(request_id: Optional[str]) -> str:
+    """File-safe profile id: the request's X-Request-ID, or a new id when it has none."""
+    if request_id:
+        safe = _UNSAFE_ID_CHARACTERS.sub("_", request_id)[:100].lstrip(".")
+        if safe.strip("_"):
+            return safe
+    return uuid.uuid4().hex
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    name = getattr(code, "co_qualname", code.co_name)
+    return f"{name} ({os.path.basename(code.co_filename)})".replace(";", ":")
+
+class _Sampler(threading.Thread):
+    """
+    Samples the stacks that belong to one request until stopped, and counts
+    them as folded stacks ("root;...;leaf count" per line), the input format
+    of flamegraph.pl, speedscope and similar tools.
+
+    On the event loop thread, a stack is the request's only while it contains
+    the middleware's own frame, and it is cut at that frame. Threadpool stacks
+    running backend code are included under "[threadpool]"; with other requests
+    in flight, those may include their work too.
+    """
+
+    def __init__(self, loop_thread_id: int, marker_frame, path: str, interval: float, max_seconds: float):
+        super().__init__(name="request-profiler", daemon=True)
+        self.loop_thread_id = loop_thread_id
+        self.marker_frame = marker_frame
+        self.path = path
+        self.interval = interval
+        self.deadline = time.monotonic() + max_seconds
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self._stopped = threading.Event()
+
+    def run(self) -> None:
+        while not self._stopped.wait(self.interval) and time.monotonic() < self.deadline:
+            self._sample()
+
+    def stop(self) -> None:
+        self._stopped.set()
+
+    def _sample(self) -> None:
+        worker_threads = {
+            thread.ident for thread in threading.enumerate() if thread.name.startswith(_WORKER_THREAD_PREFIX)
+        }
+        for thread_id, frame in sys._current_frames().items():
+            if thread_id == self.loop_thread_id:
+                stack = self._request_stack(frame)
+            elif thread_id in worker_threads:
+                stack = self._worker_stack(frame)
+            else:
+                continue
+            if stack:
+                self.stacks[";".join(stack)] += 1
+                self.samples += 1
+
+    def _request_stack(self, frame) -> Optional[list]:
+        labels = []
+        while frame is not None:
+            if frame is self.marker_frame:
+                labels.append(self.path)
+                return labels[::-1]
+            labels.append(_frame_label(frame))
+            frame = frame.f_back
+        return None
+
+    def _worker_stack(self, frame) -> Optional[list]:
+        frames = []
+        while frame is not None:
+            frames.append(frame)
+            frame = frame.f_back
+        frames.reverse()
+        # Start at the outermost backend frame; idle workers have none
+        for index, candidate in enumerate(frames):
+            if candidate.f_code.co_filename.startswith(_BACKEND_DIR):
+                return [self.path, "[threadpool]"] + [_frame_label(entry) for entry in frames[index:]]
+        return None
+
+    def folded(self) -> str:
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+class RequestProfiler:
+    """
+    Decides which requests are profiled and stores their profiles.
+
+    A request is profiled when it carries `X-Profile: <token>` matching the
+    configured token, or at random with probability `sample_rate`. Profiles are
+    written to `directory` as `<profile id>.folded`; the oldest are removed
+    beyond `max_files`. With no token and a zero sample rate, a request costs
+    one header lookup.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        token: Optional[str] = None,
+        sample_rate: float = 0.0,
+        interval_seconds: float = 0.005,
+        max_seconds: float = 30.0,
+        max_concurrent: int = 2,
+        max_files: int = 200
+    ):
+        self.directory = directory
+        self.token = token
+        self.sample_rate = sample_rate
+        self.interval_seconds = interval_seconds
+        self.max_seconds = max_seconds
+        self.max_concurrent = max_concurrent
+        self.max_files = max_files
+        self.active = 0
+        self.requested = 0
+        self.sampled = 0
+        self.skipped = 0
+        self.written = 0
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.token) or self.sample_rate > 0
+
+    def authorized(self, header: Optional[str]) -> bool:
+        return bool(self.token) and header is not None and hmac.compare_digest(header, self.token)
+
+    def should_profile(self, profile_header: Optional[str]) -> bool:
+        if self.authorized(profile_header):
+            self.requested += 1
+        elif self.sample_rate > 0 and random.random() < self.sample_rate:
+            self.sampled += 1
+        else:
+            return False
+        if self.active >= self.max_concurrent:
+            self.skipped += 1
+            return False
+        return True
+
+    def start(self, marker_frame, path: str) -> _Sampler:
+        self.active += 1
+        sampler = _Sampler(threading.get_ident(), marker_frame, path, self.interval_seconds, self.max_seconds)
+        sampler.start()
+        return sampler
+
+    def finish(self, sampler: _Sampler, profile_id: str) -> None:
+        """Stop sampling and write the profile from a separate thread, off the event loop."""
+        self.active -= 1
+        sampler.stop()
+        threading.Thread(target=self._write, args=(sampler, profile_id), daemon=True).start()
+
+    def _write(self, sampler: _Sampler, profile_id: str) -> None:
+        sampler.join()
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            with open(self.path_for(profile_id), "w", encoding="utf-8") as profile:
+                profile.write(sampler.folded())
+            self.written += 1
+            self._remove_oldest()
+        except OSError as e:
+            print(f"Error writing profile {profile_id}: {str(e)}")
+
+    def _remove_oldest(self) -> None:
+        profiles = [
+            os.path.join(self.directory, name) for name in os.listdir(self.directory) if name.endswith(".folded")
+        ]
+        if len(profiles) <= self.max_files:
+            return
+        profiles.sort(key=os.path.getmtime)
+        for path in profiles[:len(profiles) - self.max_files]:
+            os.remove(path)
+
+    def path_for(self, profile_id: str) -> str:
+        return os.path.join(self.directory, f"{profile_id_for(profile_id)}.folded")
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "active": self.active,
+            "requested": self.requested,
+            "sampled": self.sampled,
+            "skipped": self.skipped,
+            "written": self.written,
+        }
+
+class ProfilerMiddleware:
+    """ASGI middleware that runs the profiler around the requests it selects."""
+
+    def __init__(self, app, profiler: RequestProfiler, exempt_prefixes=()):
+        self.app = app
+        self.profiler = profiler
+        self.exempt_prefixes = tuple(exempt_prefixes)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"].startswith(self.exempt_prefixes):
+            await self.app(scope, receive, send)
+            return
+        if not self.profiler.should_profile(header_value(scope, b"x-profile")):
+            await self.app(scope, receive, send)
+            return
+
+        profile_id = profile_id_for(header_value(scope, b"x-request-id"))
+
+        async def send_with_profile_id(message):
+            if message["type"] == "http.response.start":
+                message = dict(message, headers=list(message.get("headers", [])) + [
+                    (b"x-profile-id", profile_id.encode("latin-1"))
+                ])
+            await send(message)
+
+        # This frame is on the loop thread's stack exactly while this request runs
+        sampler = self.profiler.start(sys._getframe(), f"{scope['method']} {scope['path']}")
+        try:
+            await self.app(scope, receive, send_with_profile_id)
+        finally:
+            self.profiler.finish(sampler, profile_id)
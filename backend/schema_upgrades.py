@@ -0,0 +1,135 @@
+# File: backend/schema_upgrades.py
+
+import copy
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from azure.cosmos import exceptions
+
+Upgrade = Callable[[Dict[str, Any]], None]
+
+# Document type -> upgrade functions; the function at index i takes a document
+# from schema version i to i + 1. Documents without schema_version are version 0.
+UPGRADES: Dict[str, List[Upgrade]] = {}
+
+def upgrade(document_type: str, from_version: int):
+    """Register an upgrade function for one document type, in version order."""
+    def register(function: Upgrade) -> Upgrade:
+        steps = UPGRADES.setdefault(document_type, [])
+        if from_version != len(steps):
+            raise ValueError(f"Upgrade for {document_type} from version {from_version} registered out of order")
+        steps.append(function)
+        return function
+    return register
+
+def current_version(document_type: Optional[str]) -> int:
+    return len(UPGRADES.get(document_type, ()))
+
+def upgrade_document(document: Dict[str, Any]) -> bool:
+    """Upgrade a document in place to its type's current version. Returns whether it changed."""
+    steps = UPGRADES.get(document.get("type"))
+    if not steps:
+        return False
+    version = document.get("schema_version") or 0
+    if version >= len(steps):
+        return False
+    for step in steps[version:]:
+        step(document)
+    document["schema_version"] = len(steps)
+    return True
+
+def stamp_version(document: Dict[str, Any]) -> None:
+    """Mark a document written by the current code as being at the current version."""
+    version = current_version(document.get("type"))
+    if version:
+        document["schema_version"] = version
+
+# Task version 1: early versions stored status values in camelCase
+_LEGACY_STATUS = {"notStarted": "not_started", "workingOnIt": "working_on_it"}
+
+@upgrade("task", from_version=0)
+def _task_status_snake_case(task: Dict[str, Any]) -> None:
+    status = task.get("status")
+    if status in _LEGACY_STATUS:
+        task["status"] = _LEGACY_STATUS[status]
+
+class UpgradeWriter:
+    """
+    Writes upgraded documents back to storage in the background, at most
+    `writes_per_second`, so old documents are rewritten gradually by normal reads.
+
+    Pending documents are kept per id, latest read wins, up to `max_pending`;
+    beyond that they are dropped and upgraded again on a later read. Each write is
+    conditional on the etag that was read, so a document changed in the meantime
+    is skipped: whatever changed it wrote the upgraded version already.
+    """
+
+    def __init__(
+        self,
+        write: Callable[[Dict[str, Any]], Any],
+        writes_per_second: float = 5,
+        max_pending: int = 1000
+    ):
+        self.write = write
+        self.interval = 1 / writes_per_second
+        self.max_pending = max_pending
+        self._pending: "OrderedDict[Tuple[str, str], Dict[str, Any]]" = OrderedDict()
+        self._condition = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._thread_pid: Optional[int] = None
+        self.submitted = 0
+        self.dropped = 0
+        self.written = 0
+        self.skipped = 0
+        self.failed = 0
+
+    def submit(self, document: Dict[str, Any]) -> None:
+        key = (document.get("user_id"), document.get("id"))
+        with self._condition:
+            if key not in self._pending and len(self._pending) >= self.max_pending:
+                self.dropped += 1
+                return
+            # Copied because the caller goes on to use (and may change) the document
+            self._pending[key] = copy.deepcopy(document)
+            self.submitted += 1
+            self._ensure_thread()
+            self._condition.notify()
+
+    def _ensure_thread(self) -> None:
+        # Threads do not survive a fork, so a forked worker starts its own
+        if self._thread is not None and self._thread_pid == os.getpid():
+            return
+        self._thread_pid = os.getpid()
+        self._thread = threading.Thread(target=self._run, name="schema-upgrade-writer", daemon=True)
+        self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            with self._condition:
+                while not self._pending:
+                    self._condition.wait()
+                _, document = self._pending.popitem(last=False)
+            try:
+                self.write(document)
+                self.written += 1
+            except exceptions.CosmosAccessConditionFailedError:
+                self.skipped += 1
+            except exceptions.CosmosResourceNotFoundError:
+                self.skipped += 1
+            except Exception as e:
+                print(f"Error writing upgraded document {document.get('id')}: {str(e)}")
+                self.failed += 1
+            time.sleep(self.interval)
+
+    def stats(self) -> Dict[str, int]:
+        with self._condition:
+            return {
+                "pending": len(self._pending),
+                "submitted": self.submitted,
+                "dropped": self.dropped,
+                "written": self.written,
+                "skipped": self.skipped,
+                "failed": self.failed,
+            }
@@ -0,0 +1,233 @@
+# File: backend/search_index.py
+
+import re
+import threading
+from bisect import bisect_left
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Set
+
+# Words are runs of letters/digits; everything is matched case-insensitively
+TOKEN_PATTERN = re.compile(r"\w+", re.UNICODE)
+
+# Relative weight of a term depending on the field it came from
+FIELD_WEIGHTS = {"title": 3, "tags": 2, "notes": 1}
+
+# Task fields kept in memory so search results can be returned without a read
+RESULT_FIELDS = ["id", "title", "status", "priority", "dynamic_priority", "due_date", "scheduled_date", "tags"]
+
+def tokenize(text: Optional[str]) -> List[str]:
+    """Split text into lowercase search terms."""
+    if not text:
+        return []
+    return [token.lower() for token in TOKEN_PATTERN.findall(text)]
+
+class UserSearchIndex:
+    """Inverted index over one user's tasks (title, notes and tags)."""
+
+    def __init__(self):
+        self.postings: Dict[str, Dict[str, int]] = {}
+        self.doc_terms: Dict[str, Set[str]] = {}
+        self.documents: Dict[str, Dict[str, Any]] = {}
+        self._sorted_terms: Optional[List[str]] = None
+
+    def __len__(self) -> int:
+        return len(self.documents)
+
+    def add(self, task: Dict[str, Any]) -> None:
+        """Index a task, replacing any previous version of it."""
+        task_id = task["id"]
+        self.remove(task_id)
+
+        weights: Dict[str, int] = {}
+        fields = {
+            "title": tokenize(task.get("title")),
+            "notes": tokenize(task.get("notes")),
+            "tags": [term for tag in (task.get("tags") or []) for term in tokenize(tag)],
+        }
+        for field, terms in fields.items():
+            for term in terms:
+                weights[term] = max(weights.get(term, 0), FIELD_WEIGHTS[field])
+
+        for term, weight in weights.items():
+            if term not in self.postings:
+                self.postings[term] = {}
+                self._sorted_terms = None
+            self.postings[term][task_id] = weight
+
+        self.doc_terms[task_id] = set(weights)
+        self.documents[task_id] = {field: task.get(field) for field in RESULT_FIELDS}
+
+    def remove(self, task_id: str) -> None:
+        """Drop a task from the index if present."""
+        for term in self.doc_terms.pop(task_id, ()):
+            docs = self.postings.get(term)
+            if docs is None:
+                continue
+            docs.pop(task_id, None)
+            if not docs:
+                del self.postings[term]
+                self._sorted_terms = None
+        self.documents.pop(task_id, None)
+
+    def _terms_with_prefix(self, prefix: str) -> List[str]:
+        if self._sorted_terms is None:
+            self._sorted_terms = sorted(self.postings)
+        terms = []
+        start = bisect_left(self._sorted_terms, prefix)
+        for term in self._sorted_terms[start:]:
+            if not term.startswith(prefix):
+                break
+            terms.append(term)
+        return terms
+
+    def search(self, query: str, tags: Optional[List[str]] = None, limit: int = 20) -> Dict[str, Any]:
+        """
+        Find tasks matching every query term, treating each term as a prefix.
+        Results are ranked by field weight, then priority.
+        """
+        scores: Optional[Dict[str, int]] = None
+        for token in tokenize(query):
+            token_scores: Dict[str, int] = {}
+            for term in self._terms_with_prefix(token):
+                for task_id, weight in self.postings[term].items():
+                    token_scores[task_id] = max(token_scores.get(task_id, 0), weight)
+            if scores is None:
+                scores = token_scores
+            else:
+                scores = {task_id: score + token_scores[task_id]
+                          for task_id, score in scores.items() if task_id in token_scores}
+            if not scores:
+                break
+
+        if scores is None:
+            scores = {task_id: 0 for task_id in self.documents}
+
+        if tags:
+            wanted = set(tags)
+            scores = {task_id: score for task_id, score in scores.items()
+                      if wanted.intersection(self.documents[task_id].get("tags") or [])}
+
+        tag_facets: Dict[str, int] = {}
+        for task_id in scores:
+            for tag in self.documents[task_id].get("tags") or []:
+                tag_facets[tag] = tag_facets.get(tag, 0) + 1
+
+        ranked = sorted(
+            scores,
+            key=lambda task_id: (-scores[task_id], -(self.documents[task_id].get("priority") or 0), task_id)
+        )
+        return {
+            "results": [self.documents[task_id] for task_id in ranked[:limit]],
+            "total": len(ranked),
+            "tag_facets": tag_facets,
+        }
+
+class SearchIndexManager:
+    """
+    Per-user search indexes held in memory.
+
+    Indexes are built lazily on a user's first search using `loader`, kept current
+    through apply_upsert/apply_delete from the sync write path, and evicted least
+    recently used first once the user or document budget is exceeded.
+    """
+
+    def __init__(
+        self,
+        loader: Callable[[str], List[Dict[str, Any]]],
+        max_users: int = 500,
+        max_documents: int = 500000
+    ):
+        self.loader = loader
+        self.max_users = max_users
+        self.max_documents = max_documents
+        self._indexes: "OrderedDict[str, UserSearchIndex]" = OrderedDict()
+        self._document_count = 0
+        self._building: Dict[str, List[Callable[[UserSearchIndex], None]]] = {}
+        self._lock = threading.Lock()
+        self.builds = 0
+        self.evictions = 0
+
+    def _get_or_build(self, user_id: str) -> UserSearchIndex:
+        with self._lock:
+            index = self._indexes.get(user_id)
+            if index is not None:
+                self._indexes.move_to_end(user_id)
+                return index
+            self._building.setdefault(user_id, [])
+
+        index = UserSearchIndex()
+        try:
+            for task in self.loader(user_id):
+                index.add(task)
+        except Exception:
+            with self._lock:
+                self._building.pop(user_id, None)
+            raise
+
+        with self._lock:
+            # Replay writes that landed while the partition was being read
+            for apply in self._building.pop(user_id, []):
+                apply(index)
+            existing = self._indexes.get(user_id)
+            if existing is not None:
+                return existing
+            self._indexes[user_id] = index
+            self._document_count += len(index)
+            self.builds += 1
+            self._evict()
+        return index
+
+    def _evict(self) -> None:
+        while self._indexes and (
+            len(self._indexes) > self.max_users or self._document_count > self.max_documents
+        ):
+            if len(self._indexes) == 1:
+                break
+            _, index = self._indexes.popitem(last=False)
+            self._document_count -= len(index)
+            self.evictions += 1
+
+    def _apply(self, user_id: str, apply: Callable[[UserSearchIndex], None]) -> None:
+        with self._lock:
+            if user_id in self._building:
+                self._building[user_id].append(apply)
+                return
+            index = self._indexes.get(user_id)
+            if index is None:
+                return
+            before = len(index)
+            apply(index)
+            self._document_count += len(index) - before
+            self._evict()
+
+    def apply_upsert(self, user_id: str, task: Dict[str, Any]) -> None:
+        """Reflect a created or updated task in the user's index, if it is resident."""
+        self._apply(user_id, lambda index: index.add(task))
+
+    def apply_delete(self, user_id: str, task_id: str) -> None:
+        """Remove a deleted task from the user's index, if it is resident."""
+        self._apply(user_id, lambda index: index.remove(task_id))
+
+    def is_resident(self, user_id: str) -> bool:
+        with self._lock:
+            return user_id in self._indexes
+
+    def build(self, user_id: str) -> None:
+        """Build a user's index if it is not resident. Reads the whole partition; call it off the event loop."""
+        self._get_or_build(user_id)
+
+    def search(self, user_id: str, query: str, tags: Optional[List[str]] = None, limit: int = 20) -> Dict[str, Any]:
+        """Search a user's tasks, building their index first if necessary."""
+        index = self._get_or_build(user_id)
+        with self._lock:
+            return index.search(query, tags=tags, limit=limit)
+
+    def stats(self) -> Dict[str, int]:
+        """Current memory footprint and lifetime build/eviction counters."""
+        with self._lock:
+            return {
+                "users": len(self._indexes),
+                "documents": self._document_count,
+                "builds": self.builds,
+                "evictions": self.evictions,
+            }
@@ -0,0 +1,50 @@
+# File: backend/single_flight.py
+
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Tuple
+
+class SingleFlight:
+    """
+    Collapses concurrent calls with the same key into one execution.
+
+    The first caller for a key starts the work; callers arriving while it runs
+    wait for the same result instead of starting their own. Nothing is cached:
+    once the work finishes, the next call for the key runs it again. The work
+    runs as its own task, so a caller that disconnects does not cancel it for
+    the callers still waiting.
+    """
+
+    def __init__(self):
+        self._in_flight: Dict[str, asyncio.Task] = {}
+        self.calls = 0
+        self.executions = 0
+        self.collapsed = 0
+
+    async def run(self, key: str, work: Callable[[], Awaitable[Any]]) -> Tuple[Any, bool]:
+        """Return the result of `work` for `key` and whether it was shared with an earlier caller."""
+        self.calls += 1
+        task = self._in_flight.get(key)
+        shared = task is not None
+        if shared:
+            self.collapsed += 1
+        else:
+            self.executions += 1
+            task = asyncio.ensure_future(work())
+            self._in_flight[key] = task
+            task.add_done_callback(lambda done: self._finish(key, done))
+        return await asyncio.shield(task), shared
+
+    def _finish(self, key: str, task: asyncio.Task) -> None:
+        if self._in_flight.get(key) is task:
+            del self._in_flight[key]
+        if not task.cancelled():
+            # Mark a failure retrieved even if every caller has gone away
+            task.exception()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "in_flight": len(self._in_flight),
+            "calls": self.calls,
+            "executions": self.executions,
+            "collapsed": self.collapsed,
+        }
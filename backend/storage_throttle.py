@@ -0,0 +1,176 @@
+# File: backend/storage_throttle.py
+
+import random
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Dict, Optional, TypeVar
+from azure.cosmos import exceptions
+
+T = TypeVar("T")
+
+THROTTLED_STATUS = 429
+RETRY_AFTER_HEADER = "x-ms-retry-after-ms"
+
+class StorageOverloaded(Exception):
+    """A storage call could not start in time, or stayed throttled past its retry budget."""
+
+    status_code = 503
+
+    def __init__(self, message: str, retry_after_seconds: float):
+        super().__init__(message)
+        self.retry_after_seconds = retry_after_seconds
+
+class AdaptiveThrottle:
+    """
+    AIMD concurrency limiter and retry policy for Cosmos DB calls in one process.
+
+    At most `limit` calls run at once; others wait in line up to
+    `queue_timeout_seconds`. Each successful call while the limit is in use
+    raises the limit by 1/limit (about +1 per round of calls); a 429 halves it,
+    at most once per `decrease_cooldown_seconds` so one burst of 429s counts
+    once. Throttled calls are retried after the server's retry-after (or an
+    exponential backoff) with jitter, until `retry_budget_seconds` is spent.
+    Settling just under the provisioned RU rate keeps throughput steady where
+    unbounded concurrency would alternate between bursts and 429 storms.
+    """
+
+    def __init__(
+        self,
+        initial_limit: float = 16,
+        min_limit: float = 1,
+        max_limit: float = 64,
+        queue_timeout_seconds: float = 2.0,
+        retry_budget_seconds: float = 10.0,
+        max_retries: int = 8,
+        base_backoff_seconds: float = 0.05,
+        max_backoff_seconds: float = 2.0,
+        decrease_factor: float = 0.5,
+        decrease_cooldown_seconds: float = 1.0,
+        charge_of: Optional[Callable[[], Any]] = None
+    ):
+        self.limit = float(initial_limit)
+        self.min_limit = float(min_limit)
+        self.max_limit = float(max_limit)
+        self.queue_timeout_seconds = queue_timeout_seconds
+        self.retry_budget_seconds = retry_budget_seconds
+        self.max_retries = max_retries
+        self.base_backoff_seconds = base_backoff_seconds
+        self.max_backoff_seconds = max_backoff_seconds
+        self.decrease_factor = decrease_factor
+        self.decrease_cooldown_seconds = decrease_cooldown_seconds
+        self.charge_of = charge_of
+        self._condition = threading.Condition()
+        self._last_decrease = 0.0
+        self._recent_charges: deque = deque()  # (time, request units) over the last minute
+        self.in_flight = 0
+        self.waiting = 0
+        self.calls = 0
+        self.throttled = 0
+        self.retries = 0
+        self.queue_timeouts = 0
+        self.exhausted = 0
+        self.request_units = 0.0
+
+    def run(self, operation: Callable[[], T]) -> T:
+        """Run a storage call under the concurrency limit, retrying it while throttled."""
+        started = time.monotonic()
+        attempt = 0
+        while True:
+            self._acquire()
+            try:
+                result = operation()
+            except exceptions.CosmosHttpResponseError as e:
+                if e.status_code != THROTTLED_STATUS:
+                    self._release(None)
+                    raise
+                self._release(e)
+                attempt += 1
+                delay = self._retry_delay(e, attempt)
+                if attempt > self.max_retries or time.monotonic() - started + delay > self.retry_budget_seconds:
+                    with self._condition:
+                        self.exhausted += 1
+                    raise StorageOverloaded("Storage is throttling requests", retry_after_seconds=delay)
+                with self._condition:
+                    self.retries += 1
+                time.sleep(delay)
+                continue
+            except BaseException:
+                self._release(None)
+                raise
+            self._release(None)
+            return result
+
+    def _acquire(self) -> None:
+        deadline = time.monotonic() + self.queue_timeout_seconds
+        with self._condition:
+            self.waiting += 1
+            try:
+                while self.in_flight >= max(1, int(self.limit)):
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self.queue_timeouts += 1
+                        raise StorageOverloaded(
+                            "Too many storage requests in progress",
+                            retry_after_seconds=self.queue_timeout_seconds
+                        )
+                    self._condition.wait(remaining)
+            finally:
+                self.waiting -= 1
+            self.in_flight += 1
+            self.calls += 1
+
+    def _release(self, throttle_error: Optional[Exception]) -> None:
+        charge = self._observed_charge()
+        with self._condition:
+            saturated = self.in_flight >= int(self.limit)
+            self.in_flight -= 1
+            now = time.monotonic()
+            if charge:
+                self.request_units += charge
+                self._recent_charges.append((now, charge))
+            if throttle_error is not None:
+                self.throttled += 1
+                if now - self._last_decrease >= self.decrease_cooldown_seconds:
+                    self.limit = max(self.min_limit, self.limit * self.decrease_factor)
+                    self._last_decrease = now
+            elif saturated:
+                # Only grow while the limit is what holds calls back
+                self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+            self._condition.notify()
+
+    def _observed_charge(self) -> float:
+        if self.charge_of is None:
+            return 0.0
+        try:
+            return float(self.charge_of() or 0)
+        except (TypeError, ValueError):
+            return 0.0
+
+    def _retry_delay(self, error: exceptions.CosmosHttpResponseError, attempt: int) -> float:
+        retry_after_ms = (error.headers or {}).get(RETRY_AFTER_HEADER)
+        if retry_after_ms:
+            delay = float(retry_after_ms) / 1000
+        else:
+            delay = min(self.max_backoff_seconds, self.base_backoff_seconds * (2 ** (attempt - 1)))
+        # Jitter so calls throttled together do not all come back together
+        return delay * random.uniform(1.0, 1.5)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._condition:
+            now = time.monotonic()
+            while self._recent_charges and now - self._recent_charges[0][0] > 60:
+                self._recent_charges.popleft()
+            return {
+                "limit": round(self.limit, 2),
+                "in_flight": self.in_flight,
+                "waiting": self.waiting,
+                "calls": self.calls,
+                "throttled": self.throttled,
+                "throttle_rate": round(self.throttled / self.calls, 4) if self.calls else 0.0,
+                "retries": self.retries,
+                "queue_timeouts": self.queue_timeouts,
+                "exhausted": self.exhausted,
+                "request_units": round(self.request_units, 2),
+                "request_units_per_second": round(sum(charge for _, charge in self._recent_charges) / 60, 2),
+            }
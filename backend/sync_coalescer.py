@@ -0,0 +1,85 @@
+# File: backend/sync_coalescer.py
+
+from typing import Any, Dict, List, Optional
+
+# Marker operation for a create that was cancelled by a later delete
+CANCELLED = "cancelled"
+
+def _merge(first: Optional[Dict[str, Any]], second: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    if first is None:
+        return dict(second) if second is not None else None
+    merged = dict(first)
+    merged.update(second or {})
+    return merged
+
+def _field_timestamps(change) -> Dict[str, str]:
+    """When each data field of a change was set on the client (the change's timestamp)."""
+    if not change.data or not change.timestamp:
+        return {}
+    return {key: change.timestamp for key in change.data}
+
+def _fold(pending: Dict[str, Any], change) -> bool:
+    """
+    Fold `change` into the pending operation for the same id.
+    Returns False when the pair cannot be combined and must run in sequence.
+    """
+    operation = pending["operation"]
+    if change.type != pending["type"]:
+        return False
+
+    if change.operation == "update" and operation in ("create", "update"):
+        pending["data"] = _merge(pending["data"], change.data)
+        pending["field_timestamps"].update(_field_timestamps(change))
+    elif change.operation == "delete" and operation == "create":
+        # Never stored, so there is nothing to delete
+        pending["operation"] = CANCELLED
+        pending["data"] = None
+        pending["field_timestamps"] = {}
+    elif change.operation == "delete" and operation == "update":
+        pending["operation"] = "delete"
+        pending["data"] = None
+        pending["field_timestamps"] = {}
+    elif change.operation == "create" and operation == CANCELLED:
+        pending["operation"] = "create"
+        pending["data"] = _merge(None, change.data)
+        pending["field_timestamps"] = _field_timestamps(change)
+    else:
+        return False
+
+    pending["timestamp"] = change.timestamp or pending["timestamp"]
+    return True
+
+def coalesce_changes(changes: List[Any]) -> List[Dict[str, Any]]:
+    """
+    Reduce a sync change list to the minimal set of storage operations per item id.
+
+    Updates are merged, a create followed by updates becomes one create, and a
+    create followed by a delete cancels out (operation "cancelled"). Pairs that
+    cannot be combined, such as an update after a delete, are kept in order.
+    Each result lists the indexes of the original changes it covers in `sources`,
+    and in `field_timestamps` the client timestamp of the change that set each data
+    field, for field-level conflict resolution (field_merge.py).
+    """
+    operations: List[Dict[str, Any]] = []
+    latest_by_id: Dict[str, Dict[str, Any]] = {}
+
+    for index, change in enumerate(changes):
+        pending = latest_by_id.get(change.id) if change.id else None
+        if pending is not None and _fold(pending, change):
+            pending["sources"].append(index)
+            continue
+
+        operation = {
+            "type": change.type,
+            "operation": change.operation,
+            "id": change.id,
+            "data": _merge(None, change.data),
+            "timestamp": change.timestamp,
+            "field_timestamps": _field_timestamps(change),
+            "sources": [index],
+        }
+        operations.append(operation)
+        if change.id:
+            latest_by_id[change.id] = operation
+
+    return operations
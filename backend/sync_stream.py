@@ -0,0 +1,144 @@
+# File: backend/sync_stream.py
+
+import json
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+from starlette.responses import StreamingResponse
+
+class SyncStreamError(Exception):
+    """A streamed sync upload that cannot be read; `status_code` is the HTTP status to report."""
+
+    def __init__(self, message: str, status_code: int = 400):
+        super().__init__(message)
+        self.status_code = status_code
+
+class SyncStreamReader:
+    """
+    Reads one streamed sync upload from the request body a piece at a time. The
+    upload is NDJSON: a header object (clientLastSync), then one change per line.
+    Only the current chunk of changes and one partial line are held in memory.
+    """
+
+    def __init__(self, body: AsyncIterator[bytes], ingest: "SyncStreamIngest"):
+        self._body = body.__aiter__()
+        self._buffer = bytearray()
+        self._start = 0
+        self._done = False
+        self._lines = 0
+        self.ingest = ingest
+        self.changes = 0
+
+    async def _next_line(self) -> Optional[bytes]:
+        """The next non-blank line, or None at the end of the body."""
+        while True:
+            end = self._buffer.find(b"\n", self._start)
+            if end >= 0:
+                line = bytes(self._buffer[self._start:end])
+                self._start = end + 1
+                self._lines += 1
+                if line.strip():
+                    return line
+                continue
+            if len(self._buffer) - self._start > self.ingest.max_line_bytes:
+                raise SyncStreamError(
+                    f"Line {self._lines + 1} is longer than {self.ingest.max_line_bytes} bytes", 413
+                )
+            if self._done:
+                line = bytes(self._buffer[self._start:])
+                self._buffer.clear()
+                self._start = 0
+                self._lines += 1
+                return line if line.strip() else None
+            try:
+                piece = await self._body.__anext__()
+            except StopAsyncIteration:
+                self._done = True
+                continue
+            # Drop the lines already handed out before taking more of the body
+            del self._buffer[:self._start]
+            self._start = 0
+            self._buffer.extend(piece)
+            self.ingest.max_buffered_bytes = max(self.ingest.max_buffered_bytes, len(self._buffer))
+
+    def _parse(self, line: bytes) -> Dict[str, Any]:
+        try:
+            value = json.loads(line)
+        except ValueError:
+            raise SyncStreamError(f"Line {self._lines} is not valid JSON")
+        if not isinstance(value, dict):
+            raise SyncStreamError(f"Line {self._lines} is not a JSON object")
+        return value
+
+    async def header(self) -> Dict[str, Any]:
+        """The upload's first line."""
+        line = await self._next_line()
+        if line is None:
+            raise SyncStreamError("Upload is empty")
+        return self._parse(line)
+
+    async def chunks(self) -> AsyncIterator[Tuple[int, List[Dict[str, Any]]]]:
+        """
+        The changes after the header, in chunks of at most `chunk_changes` changes
+        and about `chunk_bytes` bytes, each with the upload index of its first change.
+        """
+        chunk: List[Dict[str, Any]] = []
+        size = 0
+        while True:
+            line = await self._next_line()
+            if line is not None:
+                chunk.append(self._parse(line))
+                size += len(line)
+            if chunk and (line is None or len(chunk) >= self.ingest.chunk_changes or size >= self.ingest.chunk_bytes):
+                first_index = self.changes
+                self.changes += len(chunk)
+                self.ingest.chunks += 1
+                self.ingest.changes += len(chunk)
+                yield first_index, chunk
+                chunk = []
+                size = 0
+            if line is None:
+                return
+
+class SyncStreamIngest:
+    """
+    Limits and counters for streamed sync uploads. A request holds at most one
+    chunk of changes and one line of its body, however large the upload.
+    """
+
+    def __init__(self, max_line_bytes: int = 1024 * 1024, chunk_changes: int = 200, chunk_bytes: int = 1024 * 1024):
+        if max_line_bytes < 1 or chunk_changes < 1 or chunk_bytes < 1:
+            raise ValueError("Sync stream limits must be positive")
+        self.max_line_bytes = max_line_bytes
+        self.chunk_changes = chunk_changes
+        self.chunk_bytes = chunk_bytes
+        self.streams = 0
+        self.active = 0
+        self.changes = 0
+        self.chunks = 0
+        self.rejected = 0
+        self.max_buffered_bytes = 0
+
+    def reader(self, body: AsyncIterator[bytes]) -> SyncStreamReader:
+        self.streams += 1
+        return SyncStreamReader(body, self)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "streams": self.streams,
+            "active": self.active,
+            "changes": self.changes,
+            "chunks": self.chunks,
+            "rejected": self.rejected,
+            "max_buffered_bytes": self.max_buffered_bytes,
+        }
+
+class IngestingStreamingResponse(StreamingResponse):
+    """
+    A streaming response whose content reads the request body while it is sent.
+    StreamingResponse listens for a disconnect meanwhile, which would consume the
+    body's messages; here a disconnect ends the body read (ClientDisconnect) instead.
+    """
+
+    async def __call__(self, scope, receive, send) -> None:
+        await self.stream_response(send)
+        if self.background is not None:
+            await self.background()
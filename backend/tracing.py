@@ -0,0 +1,242 @@
+# File: backend/tracing.py
+
+import json
+import os
+import random
+import threading
+import time
+import uuid
+from collections import deque
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+# The span that new spans are children of. Context variables follow awaits,
+# tasks created from the request and run_in_threadpool calls.
+_current_span: ContextVar[Optional["Span"]] = ContextVar("current_span", default=None)
+
+class _NoopSpan:
+    """Returned by span() outside a traced request, so untraced code pays almost nothing."""
+
+    def __enter__(self) -> "_NoopSpan":
+        return self
+
+    def __exit__(self, exc_type, exc, traceback) -> bool:
+        return False
+
+    def set_attribute(self, name: str, value: Any) -> None:
+        pass
+
+_NOOP = _NoopSpan()
+
+class Trace:
+    def __init__(self, trace_id: str, name: str, max_spans: int):
+        self.trace_id = trace_id
+        self.name = name
+        self.started_at = time.time()
+        self.started = time.perf_counter()
+        self.max_spans = max_spans
+        self.root: Optional["Span"] = None
+        self.spans: List["Span"] = []
+        self.dropped = 0
+
+    def add(self, span: "Span") -> None:
+        if len(self.spans) >= self.max_spans:
+            self.dropped += 1
+            return
+        self.spans.append(span)
+
+    @property
+    def duration_ms(self) -> float:
+        return round(self.root.duration * 1000, 3) if self.root else 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        breakdown: Dict[str, Dict[str, float]] = {}
+        for span in self.spans:
+            if span is self.root:
+                continue
+            stage = breakdown.setdefault(span.name, {"count": 0, "total_ms": 0.0})
+            stage["count"] += 1
+            stage["total_ms"] = round(stage["total_ms"] + span.duration * 1000, 3)
+        return {
+            "trace_id": self.trace_id,
+            "name": self.name,
+            "started_at": datetime.fromtimestamp(self.started_at, timezone.utc).isoformat(),
+            "duration_ms": self.duration_ms,
+            "dropped_spans": self.dropped,
+            "breakdown": [
+                {"name": name, **stage}
+                for name, stage in sorted(breakdown.items(), key=lambda entry: entry[1]["total_ms"], reverse=True)
+            ],
+            "spans": [span.to_dict(self.started) for span in self.spans],
+        }
+
+class Span:
+    __slots__ = ("name", "trace", "span_id", "parent_id", "attributes", "start", "duration", "_token")
+
+    def __init__(self, name: str, trace: Trace, parent_id: Optional[str], attributes: Dict[str, Any]):
+        self.name = name
+        self.trace = trace
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent_id = parent_id
+        self.attributes = attributes
+        self.start = 0.0
+        self.duration = 0.0
+
+    def __enter__(self) -> "Span":
+        self.start = time.perf_counter()
+        self._token = _current_span.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc, traceback) -> bool:
+        self.duration = time.perf_counter() - self.start
+        _current_span.reset(self._token)
+        if exc_type is not None:
+            self.attributes["error"] = exc_type.__name__
+        self.trace.add(self)
+        return False
+
+    def set_attribute(self, name: str, value: Any) -> None:
+        self.attributes[name] = value
+
+    def to_dict(self, trace_start: float) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "offset_ms": round((self.start - trace_start) * 1000, 3),
+            "duration_ms": round(self.duration * 1000, 3),
+            "attributes": self.attributes,
+        }
+
+def span(name: str, **attributes: Any):
+    """Time a block as a child of the current span; a no-op outside a traced request."""
+    parent = _current_span.get()
+    if parent is None:
+        return _NOOP
+    return Span(name, parent.trace, parent.span_id, attributes)
+
+def current_span():
+    return _current_span.get() or _NOOP
+
+class Tracer:
+    """
+    Starts a trace per sampled request and keeps finished traces in a ring buffer
+    of `buffer_size`, optionally also appending them to `export_path` as one
+    JSON line per trace.
+    """
+
+    def __init__(
+        self,
+        buffer_size: int = 200,
+        export_path: Optional[str] = None,
+        sample_rate: float = 1.0,
+        max_spans: int = 1000
+    ):
+        self.sample_rate = sample_rate
+        self.max_spans = max_spans
+        self.export_path = export_path
+        self._traces: deque = deque(maxlen=buffer_size)
+        self._lock = threading.Lock()
+        self._file = None
+        self._file_pid: Optional[int] = None
+        self.started = 0
+        self.exported = 0
+
+    def start(self, name: str, trace_id: Optional[str], **attributes: Any) -> Optional[Span]:
+        """Root span of a new trace, or None if the request is not sampled."""
+        if self.sample_rate < 1 and random.random() >= self.sample_rate:
+            return None
+        self.started += 1
+        trace = Trace((trace_id or uuid.uuid4().hex)[:100], name, self.max_spans)
+        trace.root = Span(name, trace, None, attributes)
+        return trace.root
+
+    def finish(self, root: Span) -> None:
+        trace = root.trace
+        with self._lock:
+            self._traces.append(trace)
+        if self.export_path:
+            self._open().write(json.dumps(trace.to_dict(), separators=(",", ":"), default=str) + "\n")
+            self.exported += 1
+
+    def _open(self):
+        # One writer per worker process
+        if self._file is None or self._file_pid != os.getpid():
+            directory = os.path.dirname(self.export_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._file = open(self.export_path, "a", encoding="utf-8", buffering=1)
+            self._file_pid = os.getpid()
+        return self._file
+
+    def recent(self, min_duration_ms: float = 0, limit: int = 50) -> List[Dict[str, Any]]:
+        """Summaries of the newest finished traces at least `min_duration_ms` long."""
+        with self._lock:
+            traces = list(self._traces)
+        summaries = []
+        for trace in reversed(traces):
+            if trace.duration_ms < min_duration_ms:
+                continue
+            summaries.append({
+                "trace_id": trace.trace_id,
+                "name": trace.name,
+                "started_at": datetime.fromtimestamp(trace.started_at, timezone.utc).isoformat(),
+                "duration_ms": trace.duration_ms,
+                "spans": len(trace.spans),
+                "status": trace.root.attributes.get("status"),
+            })
+            if len(summaries) >= limit:
+                break
+        return summaries
+
+    def get(self, trace_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            traces = list(self._traces)
+        for trace in reversed(traces):
+            if trace.trace_id == trace_id:
+                return trace.to_dict()
+        return None
+
+    def stats(self) -> Dict[str, Any]:
+        return {"started": self.started, "buffered": len(self._traces), "exported": self.exported}
+
+class TracingMiddleware:
+    """
+    ASGI middleware that traces each request, with its X-Request-ID as the trace
+    id when present, and returns the trace id in X-Trace-ID.
+    """
+
+    def __init__(self, app, tracer: Tracer, exempt_prefixes=()):
+        self.app = app
+        self.tracer = tracer
+        self.exempt_prefixes = tuple(exempt_prefixes)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"].startswith(self.exempt_prefixes):
+            await self.app(scope, receive, send)
+            return
+        request_id = dict(scope["headers"]).get(b"x-request-id")
+        root = self.tracer.start(
+            f"{scope['method']} {scope['path']}",
+            request_id.decode("latin-1") if request_id else None,
+            method=scope["method"],
+            path=scope["path"]
+        )
+        if root is None:
+            await self.app(scope, receive, send)
+            return
+
+        async def send_with_trace_id(message):
+            if message["type"] == "http.response.start":
+                root.set_attribute("status", message["status"])
+                message = dict(message, headers=list(message.get("headers", [])) + [
+                    (b"x-trace-id", root.trace.trace_id.encode("latin-1"))
+                ])
+            await send(message)
+
+        try:
+            with root:
+                await self.app(scope, receive, send_with_trace_id)
+        finally:
+            self.tracer.finish(root)
@@ -0,0 +1,172 @@
+# File: backend/traffic_recorder.py
+
+import hashlib
+import hmac
+import json
+import os
+import re
+import time
+from typing import Any, Dict, Iterable, Optional
+from admission import header_value
+
+# Keys whose string values are kept as recorded: enums and dates, which carry
+# the shape of the traffic but nothing about the user
+_KEPT_KEYS = {"type", "operation", "status", "frequency", "clientLastSync", "timestamp"}
+_DATE_KEY = re.compile(r"(At|_at|Date|_date)$")
+# Keys whose values identify something: hashed so references stay consistent
+_HASHED_KEYS = {"id", "userId", "user_id", "taskId", "task_id", "goalId", "goal_id", "categoryId", "category_id"}
+_HASHED_LIST_KEYS = {"tags"}
+
+class TrafficRecorder:
+    """
+    Appends anonymized API requests to a newline-delimited JSON log, one file per worker.
+
+    Each line is one request: {"w": wall clock (epoch seconds), "m": method,
+    "p": path, "q": query string, "u": user, "k": idempotency key, "b": body, "s": status,
+    "d": duration (ms), "n": response bytes}. User ids, item ids and tags are
+    replaced by keyed hashes, so the same id maps to the same value throughout
+    a recording. Other strings are replaced by "x" of the same length, except
+    enum and date fields, which are kept.
+    Users are sampled as a whole, so a sampled user's request sequence stays intact.
+    """
+
+    def __init__(self, directory: str, salt: str, sample_rate: float = 1.0, max_bytes: int = 256 * 1024 * 1024):
+        self.directory = directory
+        self.salt = salt.encode("utf-8")
+        self.sample_rate = sample_rate
+        self.max_bytes = max_bytes
+        self._file = None
+        self._file_pid: Optional[int] = None
+        self.recorded = 0
+        self.bytes_written = 0
+        self.skipped = 0
+
+    def anonymize_id(self, value: str) -> str:
+        return hmac.new(self.salt, value.encode("utf-8"), hashlib.sha256).hexdigest()[:16]
+
+    def sampled(self, user_id: str) -> bool:
+        if self.sample_rate >= 1:
+            return True
+        # Stable per user, so every worker samples the same users
+        return int(self.anonymize_id(user_id), 16) / 16 ** 16 < self.sample_rate
+
+    def anonymize(self, value: Any, key: Optional[str] = None) -> Any:
+        if isinstance(value, dict):
+            return {name: self.anonymize(item, name) for name, item in value.items()}
+        if isinstance(value, list):
+            if key in _HASHED_LIST_KEYS:
+                return [self.anonymize_id(str(item)) for item in value]
+            return [self.anonymize(item) for item in value]
+        if not isinstance(value, str):
+            return value
+        if key in _HASHED_KEYS:
+            return self.anonymize_id(value)
+        if key in _KEPT_KEYS or (key and _DATE_KEY.search(key)):
+            return value
+        return "x" * len(value)
+
+    def record(
+        self,
+        started: float,
+        method: str,
+        path: str,
+        query: str,
+        user_id: str,
+        idempotency_key: Optional[str],
+        body: bytes,
+        status: int,
+        duration_seconds: float,
+        response_bytes: int
+    ) -> None:
+        if not self.sampled(user_id):
+            return
+        if self.bytes_written >= self.max_bytes:
+            self.skipped += 1
+            return
+        entry: Dict[str, Any] = {"w": round(started, 3), "m": method, "p": path, "u": self.anonymize_id(user_id)}
+        if query:
+            entry["q"] = query
+        if idempotency_key:
+            entry["k"] = self.anonymize_id(idempotency_key)
+        if body:
+            try:
+                entry["b"] = self.anonymize(json.loads(body))
+            except ValueError:
+                entry["b"] = None
+        entry.update({"s": status, "d": round(duration_seconds * 1000, 2), "n": response_bytes})
+        line = json.dumps(entry, separators=(",", ":")) + "\n"
+        self._open().write(line)
+        self.recorded += 1
+        self.bytes_written += len(line)
+
+    def _open(self):
+        # One file per worker process, opened after the fork
+        if self._file is None or self._file_pid != os.getpid():
+            os.makedirs(self.directory, exist_ok=True)
+            path = os.path.join(self.directory, f"traffic-{os.getpid()}-{int(time.time())}.ndjson")
+            self._file = open(path, "a", encoding="utf-8", buffering=1)
+            self._file_pid = os.getpid()
+        return self._file
+
+    def close(self) -> None:
+        if self._file is not None and self._file_pid == os.getpid():
+            self._file.close()
+        self._file = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {"recorded": self.recorded, "bytes_written": self.bytes_written, "skipped": self.skipped}
+
+class RecorderMiddleware:
+    """ASGI middleware that records requests to the given paths with a TrafficRecorder."""
+
+    def __init__(self, app, recorder: TrafficRecorder, paths: Iterable[str]):
+        self.app = app
+        self.recorder = recorder
+        self.paths = set(paths)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] not in self.paths:
+            await self.app(scope, receive, send)
+            return
+
+        user_id = header_value(scope, b"x-user-id") or "test-user"
+        if not self.recorder.sampled(user_id):
+            await self.app(scope, receive, send)
+            return
+
+        started_wall = time.time()
+        started = time.perf_counter()
+        body = bytearray()
+        response = {"status": 0, "bytes": 0}
+
+        async def recording_receive():
+            message = await receive()
+            if message["type"] == "http.request":
+                body.extend(message.get("body", b""))
+            return message
+
+        async def recording_send(message):
+            if message["type"] == "http.response.start":
+                response["status"] = message["status"]
+            elif message["type"] == "http.response.body":
+                response["bytes"] += len(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, recording_receive, recording_send)
+        finally:
+            try:
+                self.recorder.record(
+                    started=started_wall,
+                    method=scope["method"],
+                    path=scope["path"],
+                    query=scope.get("query_string", b"").decode("latin-1"),
+                    user_id=user_id,
+                    idempotency_key=header_value(scope, b"idempotency-key"),
+                    body=bytes(body),
+                    status=response["status"],
+                    duration_seconds=time.perf_counter() - started,
+                    response_bytes=response["bytes"]
+                )
+            except Exception as e:
+                print(f"Error recording request: {str(e)}")
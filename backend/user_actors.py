@@ -0,0 +1,203 @@
+# File: backend/user_actors.py
+
+import asyncio
+import bisect
+import hashlib
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence
+from cosmos_db import TOMBSTONE_TYPE
+
+class HashRing:
+    """
+    Consistent hashing of user ids onto nodes, with `replicas` points per node so
+    users spread evenly and adding or removing a node moves only its share of them.
+    """
+
+    def __init__(self, nodes: Sequence[str], replicas: int = 100):
+        if not nodes:
+            raise ValueError("A hash ring needs at least one node")
+        self.nodes = list(nodes)
+        self._points = sorted(
+            (self._hash(f"{node}#{replica}"), node) for node in self.nodes for replica in range(replicas)
+        )
+        self._hashes = [point for point, _ in self._points]
+
+    @staticmethod
+    def _hash(value: str) -> int:
+        return int.from_bytes(hashlib.md5(value.encode("utf-8")).digest()[:8], "big")
+
+    def owner(self, key: str) -> str:
+        index = bisect.bisect(self._hashes, self._hash(key)) % len(self._points)
+        return self._points[index][1]
+
+class UserState:
+    """
+    A user's documents (tasks, goals, categories) held by their actor, by id, and
+    the tombstones of their deleted items, by item id.
+    Documents are replaced on write, never changed in place, so callers may keep
+    references to ones they were given.
+    """
+
+    def __init__(self, documents: List[Dict[str, Any]]):
+        self.documents: Dict[str, Dict[str, Any]] = {}
+        self.tombstones: Dict[str, Dict[str, Any]] = {}
+        for document in documents:
+            if document.get("type") == TOMBSTONE_TYPE:
+                self.tombstones[document["item_id"]] = document
+            else:
+                self.documents[document["id"]] = document
+
+    def get(self, item_id: str) -> Optional[Dict[str, Any]]:
+        return self.documents.get(item_id)
+
+    def put(self, document: Dict[str, Any]) -> None:
+        self.documents[document["id"]] = document
+        self.tombstones.pop(document["id"], None)
+
+    def remove(self, item_id: str, tombstone: Optional[Dict[str, Any]] = None) -> None:
+        self.documents.pop(item_id, None)
+        if tombstone is not None:
+            self.tombstones[item_id] = tombstone
+
+    def of_type(self, document_type: str) -> List[Dict[str, Any]]:
+        return [document for document in self.documents.values() if document.get("type") == document_type]
+
+    def changed_since(self, timestamp: str) -> List[Dict[str, Any]]:
+        """Documents and tombstones updated after `timestamp`, like CosmosDBManager.get_changes_since."""
+        # ISO timestamps compare as strings, as in the Cosmos DB query this replaces
+        return [
+            document
+            for documents in (self.documents, self.tombstones)
+            for document in documents.values()
+            if document.get("updated_at", "") > timestamp
+        ]
+
+class _Actor:
+    def __init__(self, user_id: str):
+        self.user_id = user_id
+        self.mailbox: asyncio.Queue = asyncio.Queue()
+        self.state: Optional[UserState] = None
+        self.busy = False
+        self.last_used = time.monotonic()
+        self.task: Optional[asyncio.Task] = None
+
+class UserActorSystem:
+    """
+    One asyncio actor per active user in this process. Each actor owns its user's
+    documents in memory (loaded on its first message) and runs the messages in its
+    mailbox one at a time, so a user's writes never overlap and reads see every
+    write before them.
+
+    Messages are `work(state)` coroutine functions. Work that writes to storage
+    must update the state once the write succeeds; work that fails may leave the
+    state partly updated only for writes that reached storage. An actor stops
+    after `idle_seconds` with an empty mailbox, and beyond `max_users` the least
+    recently used idle actor is evicted; its user is loaded again when next needed.
+
+    With several nodes, each user is owned by one of them (HashRing over `nodes`);
+    `owner()` tells a node which one.
+    """
+
+    def __init__(
+        self,
+        load: Callable[[str], Awaitable[List[Dict[str, Any]]]],
+        max_users: int = 1000,
+        idle_seconds: float = 300,
+        nodes: Sequence[str] = (),
+        node_id: Optional[str] = None
+    ):
+        self.load = load
+        self.max_users = max_users
+        self.idle_seconds = idle_seconds
+        self.ring = HashRing(nodes) if nodes else None
+        self.node_id = node_id
+        if self.ring is not None and node_id not in self.ring.nodes:
+            raise ValueError(f"Actor node {node_id} is not one of {self.ring.nodes}")
+        self._actors: Dict[str, _Actor] = {}
+        self.messages = 0
+        self.loads = 0
+        self.evictions = 0
+        self.idle_stops = 0
+        self.max_mailbox_depth = 0
+
+    def owner(self, user_id: str) -> Optional[str]:
+        """The node that owns the user, or None if it is this one."""
+        if self.ring is None:
+            return None
+        owner = self.ring.owner(user_id)
+        return None if owner == self.node_id else owner
+
+    async def call(self, user_id: str, work: Callable[[UserState], Awaitable[Any]]) -> Any:
+        """Run `work` in the user's actor after the messages already queued for it."""
+        actor = self._actors.get(user_id)
+        if actor is None:
+            actor = self._start(user_id)
+        future = asyncio.get_running_loop().create_future()
+        actor.mailbox.put_nowait((work, future))
+        actor.last_used = time.monotonic()
+        self.messages += 1
+        self.max_mailbox_depth = max(self.max_mailbox_depth, actor.mailbox.qsize())
+        # Shielded: a caller that goes away does not stop work already queued
+        return await asyncio.shield(future)
+
+    def _start(self, user_id: str) -> _Actor:
+        if len(self._actors) >= self.max_users:
+            self._evict_one()
+        actor = _Actor(user_id)
+        self._actors[user_id] = actor
+        actor.task = asyncio.ensure_future(self._run(actor))
+        return actor
+
+    def _evict_one(self) -> None:
+        idle = [actor for actor in self._actors.values() if not actor.busy and actor.mailbox.empty()]
+        if not idle:
+            # Every actor is working; run over the limit rather than block
+            return
+        actor = min(idle, key=lambda candidate: candidate.last_used)
+        self._stop(actor)
+        self.evictions += 1
+
+    def _stop(self, actor: _Actor) -> None:
+        if self._actors.get(actor.user_id) is actor:
+            del self._actors[actor.user_id]
+        actor.task.cancel()
+
+    async def _run(self, actor: _Actor) -> None:
+        while True:
+            try:
+                work, future = await asyncio.wait_for(actor.mailbox.get(), self.idle_seconds)
+            except asyncio.TimeoutError:
+                if not actor.mailbox.empty():
+                    # A message arrived as the wait timed out
+                    continue
+                self.idle_stops += 1
+                self._stop(actor)
+                return
+            actor.busy = True
+            try:
+                if actor.state is None:
+                    actor.state = UserState(await self.load(actor.user_id))
+                    self.loads += 1
+                result = await work(actor.state)
+            except Exception as e:
+                if not future.done():
+                    future.set_exception(e)
+            else:
+                if not future.done():
+                    future.set_result(result)
+            finally:
+                actor.busy = False
+                actor.last_used = time.monotonic()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "actors": len(self._actors),
+            "documents": sum(len(actor.state.documents) for actor in self._actors.values() if actor.state),
+            "mailbox_depth": sum(actor.mailbox.qsize() for actor in self._actors.values()),
+            "max_mailbox_depth": self.max_mailbox_depth,
+            "messages": self.messages,
+            "loads": self.loads,
+            "evictions": self.evictions,
+            "idle_stops": self.idle_stops,
+            "node_id": self.node_id,
+        }
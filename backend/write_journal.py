@@ -0,0 +1,393 @@
+# File: backend/write_journal.py
+
+import asyncio
+import fcntl
+import json
+import os
+import threading
+import time
+from collections import deque
+from itertools import islice
+from datetime import datetime, timezone
+from types import SimpleNamespace
+from typing import Any, Callable, Dict, List, Optional
+from starlette.concurrency import run_in_threadpool
+from sync_coalescer import coalesce_changes
+
+SEGMENT_PREFIX = "segment-"
+CHECKPOINT_FILE = "checkpoint.json"
+DEAD_LETTER_FILE = "dead-letter.log"
+LOCK_FILE = "journal.lock"
+
+def _fsync_directory(directory: str) -> None:
+    fd = os.open(directory, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+class WriteJournal:
+    """
+    Durable, append-only journal of accepted sync changes waiting to be written to Cosmos DB.
+
+    Records are appended as JSON lines to numbered segment files and fsync'd before
+    the change is acknowledged. A checkpoint file holds the sequence number of the
+    last record written to Cosmos DB; on open, every later record is pending again,
+    which is how a crash is recovered. Segments wholly covered by the checkpoint
+    are deleted. One process owns a journal directory at a time.
+    """
+
+    def __init__(self, directory: str, segment_max_bytes: int = 16 * 1024 * 1024, lock_timeout_seconds: float = 60):
+        self.directory = directory
+        self.segment_max_bytes = segment_max_bytes
+        self.lock_timeout_seconds = lock_timeout_seconds
+        self._lock = threading.Lock()
+        self._lock_file = None
+        self._segment = None
+        self._segment_number = 0
+        self._segments: List[Dict[str, Any]] = []  # {"number", "last_seq"} in order
+        self._pending: deque = deque()
+        self._pending_by_user: Dict[str, deque] = {}
+        self.last_seq = 0
+        self.flushed_seq = 0
+        self.appended = 0
+        self.recovered = 0
+        self.dead_lettered = 0
+
+    # Opening and recovery
+    def open(self) -> None:
+        os.makedirs(self.directory, exist_ok=True)
+        self._acquire_lock()
+        self.flushed_seq = self._read_checkpoint()
+        self.last_seq = self.flushed_seq
+        for number in self._segment_numbers():
+            last_seq = self._recover_segment(number)
+            self._segments.append({"number": number, "last_seq": last_seq})
+            self._segment_number = number
+        self.recovered = len(self._pending)
+        self._delete_flushed_segments()
+        self._open_segment(self._segment_number + 1)
+        if self.recovered:
+            print(f"Write journal recovered {self.recovered} unflushed changes from {self.directory}")
+
+    def _acquire_lock(self) -> None:
+        # A recycled server worker may still be draining the journal; wait for it
+        self._lock_file = open(os.path.join(self.directory, LOCK_FILE), "w")
+        deadline = time.monotonic() + self.lock_timeout_seconds
+        while True:
+            try:
+                fcntl.flock(self._lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                return
+            except BlockingIOError:
+                if time.monotonic() >= deadline:
+                    raise RuntimeError(f"Write journal {self.directory} is in use by another process")
+                time.sleep(0.2)
+
+    def _segment_numbers(self) -> List[int]:
+        numbers = []
+        for name in os.listdir(self.directory):
+            if name.startswith(SEGMENT_PREFIX) and name.endswith(".log"):
+                numbers.append(int(name[len(SEGMENT_PREFIX):-len(".log")]))
+        return sorted(numbers)
+
+    def _segment_path(self, number: int) -> str:
+        return os.path.join(self.directory, f"{SEGMENT_PREFIX}{number:08d}.log")
+
+    def _recover_segment(self, number: int) -> int:
+        """Load a segment's unflushed records; a torn final line (crash mid-append) is cut off."""
+        path = self._segment_path(number)
+        last_seq = 0
+        good_bytes = 0
+        with open(path, "rb") as segment:
+            for line in segment:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    break
+                if not line.endswith(b"\n"):
+                    break
+                good_bytes += len(line)
+                last_seq = record["seq"]
+                self.last_seq = max(self.last_seq, last_seq)
+                if record["seq"] > self.flushed_seq:
+                    self._add_pending(record)
+        if good_bytes < os.path.getsize(path):
+            print(f"Truncating torn record at byte {good_bytes} of {path}")
+            with open(path, "r+b") as segment:
+                segment.truncate(good_bytes)
+                os.fsync(segment.fileno())
+        return last_seq
+
+    def _read_checkpoint(self) -> int:
+        try:
+            with open(os.path.join(self.directory, CHECKPOINT_FILE)) as checkpoint:
+                return json.load(checkpoint)["flushed_seq"]
+        except FileNotFoundError:
+            return 0
+
+    def _write_checkpoint(self, flushed_seq: int) -> None:
+        path = os.path.join(self.directory, CHECKPOINT_FILE)
+        temp_path = path + ".tmp"
+        with open(temp_path, "w") as checkpoint:
+            json.dump({"flushed_seq": flushed_seq}, checkpoint)
+            checkpoint.flush()
+            os.fsync(checkpoint.fileno())
+        os.replace(temp_path, path)
+        _fsync_directory(self.directory)
+
+    def _open_segment(self, number: int) -> None:
+        if self._segment is not None:
+            self._segment.close()
+        self._segment_number = number
+        self._segment = open(self._segment_path(number), "ab")
+        self._segments.append({"number": number, "last_seq": self.last_seq})
+        _fsync_directory(self.directory)
+
+    # Writing
+    def append(self, entries: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Durably append entries; they are pending once this returns."""
+        with self._lock:
+            accepted_at = datetime.now(timezone.utc).isoformat()
+            records = []
+            lines = []
+            for entry in entries:
+                self.last_seq += 1
+                record = dict(entry, seq=self.last_seq, accepted_at=accepted_at)
+                records.append(record)
+                lines.append(json.dumps(record, separators=(",", ":")).encode("utf-8") + b"\n")
+
+            self._segment.write(b"".join(lines))
+            self._segment.flush()
+            os.fsync(self._segment.fileno())
+            self._segments[-1]["last_seq"] = self.last_seq
+            if self._segment.tell() >= self.segment_max_bytes:
+                self._open_segment(self._segment_number + 1)
+
+            for record in records:
+                self._add_pending(record)
+            self.appended += len(records)
+            return records
+
+    def _add_pending(self, record: Dict[str, Any]) -> None:
+        self._pending.append(record)
+        self._pending_by_user.setdefault(record["user_id"], deque()).append(record)
+
+    def mark_flushed(self, seq: int) -> None:
+        """Record that every change up to and including `seq` is in Cosmos DB."""
+        with self._lock:
+            if seq <= self.flushed_seq:
+                return
+            self._write_checkpoint(seq)
+            self.flushed_seq = seq
+            while self._pending and self._pending[0]["seq"] <= seq:
+                record = self._pending.popleft()
+                user_records = self._pending_by_user[record["user_id"]]
+                user_records.popleft()
+                if not user_records:
+                    del self._pending_by_user[record["user_id"]]
+            self._delete_flushed_segments()
+
+    def _delete_flushed_segments(self) -> None:
+        while len(self._segments) > 1 and self._segments[0]["last_seq"] <= self.flushed_seq:
+            os.remove(self._segment_path(self._segments.pop(0)["number"]))
+
+    def dead_letter(self, record: Dict[str, Any], error: Exception) -> None:
+        """Set aside a change Cosmos DB will never accept, so it does not block the ones after it."""
+        with self._lock:
+            with open(os.path.join(self.directory, DEAD_LETTER_FILE), "ab") as dead_letters:
+                line = json.dumps({"record": record, "error": str(error)}, separators=(",", ":"))
+                dead_letters.write(line.encode("utf-8") + b"\n")
+                dead_letters.flush()
+                os.fsync(dead_letters.fileno())
+            self.dead_lettered += 1
+
+    # Reading
+    def pending(self, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        with self._lock:
+            return list(islice(self._pending, limit) if limit else self._pending)
+
+    def pending_for_user(self, user_id: str) -> List[Dict[str, Any]]:
+        with self._lock:
+            return list(self._pending_by_user.get(user_id, ()))
+
+    def close(self) -> None:
+        with self._lock:
+            if self._segment is not None:
+                self._segment.close()
+                self._segment = None
+            if self._lock_file is not None:
+                fcntl.flock(self._lock_file, fcntl.LOCK_UN)
+                self._lock_file.close()
+                self._lock_file = None
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            oldest = self._pending[0]["accepted_at"] if self._pending else None
+            lag = 0.0
+            if oldest:
+                lag = (datetime.now(timezone.utc) - datetime.fromisoformat(oldest)).total_seconds()
+            return {
+                "queue_depth": len(self._pending),
+                "flush_lag_seconds": round(lag, 3),
+                "last_seq": self.last_seq,
+                "flushed_seq": self.flushed_seq,
+                "segments": len(self._segments),
+                "appended": self.appended,
+                "recovered": self.recovered,
+                "dead_lettered": self.dead_lettered,
+            }
+
+def merge_pending(
+    documents: Dict[str, Dict[str, Any]],
+    records: List[Dict[str, Any]],
+    to_document: Callable[[Dict[str, Any]], Dict[str, Any]],
+    fetch: Callable[[Dict[str, Any]], Optional[Dict[str, Any]]]
+) -> Dict[str, Optional[Dict[str, Any]]]:
+    """
+    Apply a user's pending journal records, in order, over documents read from Cosmos DB
+    (by id). `to_document` turns a record's change data into stored fields; `fetch`
+    reads the stored document for an update whose base was not among `documents`.
+    Returns the changed documents by id, with None for deleted ones.
+    """
+    changed: Dict[str, Optional[Dict[str, Any]]] = {}
+    for record in records:
+        item_id = record["id"]
+        if record["operation"] == "delete":
+            documents.pop(item_id, None)
+            changed[item_id] = None
+            continue
+        base = documents.get(item_id)
+        if base is None and record["operation"] == "update" and item_id not in changed:
+            base = fetch(record)
+        if base is None and record["operation"] == "update":
+            continue
+        document = dict(base or {})
+        document.update(to_document(record))
+        documents[item_id] = changed[item_id] = document
+    return changed
+
+def is_permanent_failure(error: Exception) -> bool:
+    """Failures retrying cannot fix: invalid or conflicting changes rather than throttling or outages."""
+    if isinstance(error, ValueError):
+        return True
+    status_code = getattr(error, "status_code", None)
+    return status_code is not None and 400 <= status_code < 500 and status_code not in (408, 429)
+
+class WriteBehindFlusher:
+    """
+    Background task that writes pending journal records to Cosmos DB in batches.
+
+    Each batch is grouped by user and folded with the sync coalescer, then applied
+    in order. The checkpoint advances once the whole batch is stored, so a crash or
+    retryable failure re-applies the batch; the storage operations tolerate that.
+    """
+
+    def __init__(
+        self,
+        journal: WriteJournal,
+        apply_operation: Callable[[str, Dict[str, Any]], Optional[Dict[str, Any]]],
+        on_applied: Callable[[str, List[Dict[str, Any]], List[Optional[Dict[str, Any]]]], None],
+        batch_size: int = 100,
+        interval_seconds: float = 0.05,
+        max_backoff_seconds: float = 30
+    ):
+        self.journal = journal
+        self.apply_operation = apply_operation
+        self.on_applied = on_applied
+        self.batch_size = batch_size
+        self.interval_seconds = interval_seconds
+        self.max_backoff_seconds = max_backoff_seconds
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = False
+        self.batches = 0
+        self.flushed = 0
+        self.retries = 0
+        self.last_flush_at: Optional[str] = None
+        self.last_error: Optional[str] = None
+
+    def start(self) -> None:
+        self._task = asyncio.ensure_future(self._run())
+
+    def notify(self) -> None:
+        """Wake the flusher after an append instead of waiting for the next interval."""
+        self._wakeup.set()
+
+    async def stop(self, drain_timeout_seconds: float = 10) -> None:
+        """Flush what is pending (up to the timeout), then stop; the rest is recovered on restart."""
+        self._stopping = True
+        self._wakeup.set()
+        if self._task is None:
+            return
+        try:
+            await asyncio.wait_for(asyncio.shield(self._task), drain_timeout_seconds)
+        except asyncio.TimeoutError:
+            self._task.cancel()
+
+    async def _run(self) -> None:
+        backoff = self.interval_seconds
+        while True:
+            batch = self.journal.pending(self.batch_size)
+            if not batch:
+                if self._stopping:
+                    return
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), 1.0)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            try:
+                applied = await run_in_threadpool(self._flush_batch, batch)
+                backoff = self.interval_seconds
+            except Exception as e:
+                self.retries += 1
+                self.last_error = str(e)
+                print(f"Error flushing write journal, retrying in {backoff:.1f}s: {str(e)}")
+                if self._stopping:
+                    return
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, self.max_backoff_seconds)
+                continue
+            for user_id, records, results in applied:
+                self.on_applied(user_id, records, results)
+            if not self._stopping:
+                await asyncio.sleep(self.interval_seconds)
+
+    def _flush_batch(self, batch: List[Dict[str, Any]]) -> List[Any]:
+        """Store one batch (in a worker thread). Returns (user_id, records, results) per user."""
+        by_user: Dict[str, List[Dict[str, Any]]] = {}
+        for record in batch:
+            by_user.setdefault(record["user_id"], []).append(record)
+
+        applied = []
+        for user_id, records in by_user.items():
+            operations = coalesce_changes([SimpleNamespace(**record) for record in records])
+            results = []
+            for operation in operations:
+                try:
+                    results.append(self.apply_operation(user_id, operation))
+                except Exception as e:
+                    if not is_permanent_failure(e):
+                        raise
+                    for index in operation["sources"]:
+                        self.journal.dead_letter(records[index], e)
+                    print(f"Dropped unwritable change {operation['id']} for user {user_id}: {str(e)}")
+                    results.append(None)
+            applied.append((user_id, records, results))
+
+        self.journal.mark_flushed(batch[-1]["seq"])
+        self.batches += 1
+        self.flushed += len(batch)
+        self.last_flush_at = datetime.now(timezone.utc).isoformat()
+        return applied
+
+    def stats(self) -> Dict[str, Any]:
+        return dict(
+            self.journal.stats(),
+            batches=self.batches,
+            flushed=self.flushed,
+            retries=self.retries,
+            last_flush_at=self.last_flush_at,
+            last_error=self.last_error,
+        )
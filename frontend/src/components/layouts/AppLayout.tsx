@@ -1,6 +1,6 @@
 import { useEffect, useState } from 'react';
 import { Outlet } from 'react-router-dom';
-import { initializeData } from '../../state/syncEngine';
+import { initializeData, subscribeToServerChanges } from '../../state/syncEngine';
 import { Sidebar } from './Sidebar';
 import { TopPanel } from './TopPanel';
 
@@ -10,6 +10,8 @@ export function AppLayout() {
   useEffect(() => {
     // Initialize data when the app loads
     initializeData();
+    // Receive other devices' changes by push instead of polling
+    return subscribeToServerChanges();
   }, []);
 
   return (
@@ -1,5 +1,8 @@
 
-import { Task } from '../../utils/types';
+import { useEffect, useState } from 'react';
+import { CompletionEntry, Task } from '../../utils/types';
+import { api } from '../../utils/api';
+import { Button } from '../ui/button';
 import {
   Dialog,
   DialogContent,
@@ -14,11 +17,42 @@ interface TaskDetailsProps {
 }
 
 const TaskDetails = ({ task, open, onOpenChange }: TaskDetailsProps) => {
-  const formatDate = (date: string | undefined) => {
+  const [history, setHistory] = useState<CompletionEntry[]>([]);
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
+  const [historyError, setHistoryError] = useState(false);
+
+  const formatDate = (date: string | undefined | null) => {
     if (!date) return '-';
     return new Date(date).toLocaleDateString();
   };
 
+  const loadHistory = async (cursor: string | null) => {
+    try {
+      const page = await api.getTaskHistory(task.id, cursor);
+      setHistory((entries) => (cursor ? [...entries, ...page.entries] : page.entries));
+      setNextCursor(page.hasMore ? page.nextCursor : null);
+      setHistoryError(false);
+    } catch {
+      setHistoryError(true);
+    }
+  };
+
+  // Completion entries live in the server's history archive, not on the task
+  useEffect(() => {
+    if (open) {
+      setHistory([]);
+      setNextCursor(null);
+      loadHistory(null);
+    }
+  }, [open, task.id, task.completionSummary?.count]);
+
+  // Completions made here that have not been synced and archived yet
+  const unsynced = (task.completionHistory || []).filter(
+    (entry) => !history.some((archived) => archived.completedAt === entry.completedAt)
+  );
+  const entries = [...unsynced].reverse().concat(history);
+  const summary = task.completionSummary;
+
   return (
     <Dialog open={open} onOpenChange={onOpenChange}>
       <DialogContent className="max-w-2xl">
@@ -83,12 +117,19 @@ const TaskDetails = ({ task, open, onOpenChange }: TaskDetailsProps) => {
             </div>
           )}
 
-          {task.completionHistory.length > 0 && (
+          {(entries.length > 0 || (summary && summary.count > 0) || historyError) && (
             <div className="grid grid-cols-4 items-start gap-4">
               <div className="font-medium">History</div>
               <div className="col-span-3">
+                {summary && summary.count > 0 && (
+                  <div className="text-sm text-gray-600 mb-2">
+                    Completed {summary.count} {summary.count === 1 ? 'time' : 'times'}
+                    {summary.streak > 1 && `, ${summary.streak} in a row`}
+                    {summary.lastCompletedAt && `, last on ${formatDate(summary.lastCompletedAt)}`}
+                  </div>
+                )}
                 <div className="space-y-2">
-                  {task.completionHistory.map((entry, index) => (
+                  {entries.map((entry, index) => (
                     <div key={index} className="text-sm">
                       Completed on {formatDate(entry.completedAt)}
                       {entry.completionNotes && (
@@ -97,6 +138,14 @@ const TaskDetails = ({ task, open, onOpenChange }: TaskDetailsProps) => {
                     </div>
                   ))}
                 </div>
+                {historyError && (
+                  <div className="text-sm text-red-600 mt-2">Could not load completion history</div>
+                )}
+                {nextCursor && (
+                  <Button variant="ghost" size="sm" className="mt-2" onClick={() => loadHistory(nextCursor)}>
+                    Show more
+                  </Button>
+                )}
               </div>
             </div>
           )}
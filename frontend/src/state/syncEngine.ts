@@ -3,14 +3,16 @@
 import { configureStore } from '@reduxjs/toolkit';
 import { debounce } from 'lodash';
 import taskReducer, {
-  setTasks
+  setTasks,
+  addTask,
+  deleteTask
 } from './slices/taskSlice';
 import syncReducer, {
   setSyncStatus,
   setLastSynced,
   resetPendingChanges
 } from './slices/syncSlice';
-import { api } from '../utils/api';
+import { api, ApiError, ServerChange } from '../utils/api';
 import { Task, UUID, ChangeType } from '../utils/types';
 import {
   stateLogger,
@@ -50,6 +52,35 @@ const SYNC_CONFIG: Record<ChangeType, number> = {
   drag: 500        // 500ms for drag operations
 };
 
+/**
+ * Larger syncs go through the streaming endpoint, which the server applies in chunks
+ */
+const STREAM_SYNC_MIN_CHANGES = 500;
+
+/**
+ * Failed syncs are retried with the same idempotency key after a network error
+ * or a 5xx, with exponential backoff, so the server applies them only once
+ */
+const SYNC_MAX_ATTEMPTS = 3;
+const SYNC_RETRY_DELAY_MS = 1000;
+
+const syncWithRetry = async (
+  syncRequest: Parameters<typeof api.sync>[0],
+  idempotencyKey: string
+) => {
+  for (let attempt = 1; ; attempt++) {
+    try {
+      return await api.sync(syncRequest, idempotencyKey);
+    } catch (error) {
+      const retryable = !(error instanceof ApiError) || error.status >= 500;
+      if (!retryable || attempt >= SYNC_MAX_ATTEMPTS) {
+        throw error;
+      }
+      await new Promise((resolve) => setTimeout(resolve, SYNC_RETRY_DELAY_MS * 2 ** (attempt - 1)));
+    }
+  }
+};
+
 /**
  * Initialize data on app start
  */
@@ -69,6 +100,30 @@ export const initializeData = async () => {
   }
 };
 
+/**
+ * Apply changes pushed by the server from the user's other sessions.
+ * Returns a function that closes the push channel.
+ */
+export const subscribeToServerChanges = () => {
+  const source = api.subscribeToChanges(
+    (changes: ServerChange[]) => {
+      changes.forEach((change) => {
+        if (change.type !== 'task') return;
+        if (change.operation === 'delete') {
+          store.dispatch(deleteTask(change.id));
+        } else if (change.data) {
+          store.dispatch(addTask(change.data as Task));
+        }
+      });
+    },
+    () => {
+      // We missed changes while disconnected or too slow; reload everything
+      initializeData();
+    }
+  );
+  return () => source.close();
+};
+
 /**
  * Debounced sync functions (FIRE AND FORGET!)
  *
@@ -98,8 +153,14 @@ const debouncedSyncs = Object.entries(SYNC_CONFIG).reduce(
         clientLastSync: store.getState().sync.lastSynced || new Date().toISOString()
       };
 
+      // Kept for every retry of this request (syncWithRetry), so the server applies it once
+      const idempotencyKey = crypto.randomUUID();
+
       // ===== Fire-and-forget: NO `await` here =====
-      api.sync(syncRequest)
+      const request = syncRequest.changes.length >= STREAM_SYNC_MIN_CHANGES
+        ? api.syncStream(syncRequest)
+        : syncWithRetry(syncRequest, idempotencyKey);
+      request
         .then((response) => {
           // Sync is done - just update sync status
           store.dispatch(setLastSynced(response.syncedAt));
@@ -107,6 +168,9 @@ const debouncedSyncs = Object.entries(SYNC_CONFIG).reduce(
           store.dispatch(resetPendingChanges());
 
           logSyncCompleted(response.syncedAt);
+          if (response.fullReloadRequired) {
+            initializeData();
+          }
         })
         .catch((error) => {
           logSyncFailed(error);
@@ -1,4 +1,4 @@
-import { Task, UUID } from './types';
+import { CompletionEntry, Task, UUID } from './types';
 
 const API_BASE_URL = '/api/v1';
 
@@ -24,9 +24,16 @@ interface ApiResponse<T> {
 
 interface UserData {
     tasks: Record<UUID, Task>;
+    archivedBefore?: string | null;  // set when completed tasks older than this were left out
     lastSyncedAt: string;
 }
 
+interface TaskHistoryPage {
+    entries: CompletionEntry[];
+    nextCursor: string | null;
+    hasMore: boolean;
+}
+
 interface SyncRequest {
     changes: Array<{
         type: 'task';
@@ -47,11 +54,35 @@ interface SyncResponse {
         data?: any;
         timestamp: string;
     }>;
+    acknowledged?: Array<{
+        id?: UUID;
+        operation: 'create' | 'update' | 'delete';
+        index: number;
+    }>;
     syncedAt: string;
+    // Set when deletes this client missed may have expired; reload instead of syncing incrementally
+    fullReloadRequired?: boolean;
+}
+
+export interface ServerChange {
+    type: 'task';
+    operation: 'create' | 'update' | 'delete';
+    id: UUID;
+    data?: any;
+    timestamp: string;
+}
+
+// A request the server answered with an error status
+export class ApiError extends Error {
+    constructor(message: string, readonly status: number) {
+        super(message);
+    }
 }
 
 class ApiClient {
     private userId: string = 'test-user'; // To Do: Get user ID from request headers
+    // Identifies this tab so the server does not push our own changes back to us
+    readonly clientId: string = crypto.randomUUID();
 
     private async request<T>(
         endpoint: string,
@@ -62,17 +93,20 @@ class ApiClient {
             'Content-Type': 'application/json',
             'X-User-ID': this.userId,
             'X-Request-ID': crypto.randomUUID(),
+            'X-Client-ID': this.clientId,
             ...options.headers,
         };
 
         try {
             const response = await fetch(url, { ...options, headers });
-            const data: ApiResponse<T> = await response.json();
 
             if (!response.ok) {
-                throw new Error(data.error?.message || 'An error occurred');
+                // Proxies can answer 5xx without a JSON body
+                const data: ApiResponse<T> | null = await response.json().catch(() => null);
+                throw new ApiError(data?.error?.message || 'An error occurred', response.status);
             }
 
+            const data: ApiResponse<T> = await response.json();
             return data;
         } catch (error) {
             console.error('API request failed:', error);
@@ -85,13 +119,102 @@ class ApiClient {
         return response.data!;
     }
 
-    async sync(changes: SyncRequest): Promise<SyncResponse> {
+    /**
+     * One page of a task's completion history, newest first. Pass the previous
+     * page's nextCursor to get the next one.
+     */
+    async getTaskHistory(taskId: UUID, cursor?: string | null): Promise<TaskHistoryPage> {
+        const params = new URLSearchParams(cursor ? { cursor } : {});
+        const response = await this.request<TaskHistoryPage>(
+            `/tasks/${encodeURIComponent(taskId)}/history?${params}`
+        );
+        return response.data!;
+    }
+
+    /**
+     * Reuse the same idempotencyKey when retrying a sync request so the
+     * server replays its original response instead of applying it twice.
+     */
+    async sync(changes: SyncRequest, idempotencyKey: string = crypto.randomUUID()): Promise<SyncResponse> {
         const response = await this.request<SyncResponse>('/sync', {
             method: 'POST',
             body: JSON.stringify(changes),
+            headers: { 'Idempotency-Key': idempotencyKey },
         });
         return response.data!;
     }
+
+    /**
+     * Sync a large batch of changes (e.g. after a long time offline) through the
+     * streaming endpoint, which applies them in chunks as they arrive instead of
+     * parsing the whole request first. Changes acknowledged before an error are
+     * applied; resend only the rest.
+     */
+    async syncStream(changes: SyncRequest): Promise<SyncResponse> {
+        const body = [JSON.stringify({ clientLastSync: changes.clientLastSync })]
+            .concat(changes.changes.map((change) => JSON.stringify(change)))
+            .join('\n');
+        const response = await fetch(`${API_BASE_URL}/sync/stream`, {
+            method: 'POST',
+            body,
+            headers: {
+                'Content-Type': 'application/x-ndjson',
+                'X-User-ID': this.userId,
+                'X-Request-ID': crypto.randomUUID(),
+                'X-Client-ID': this.clientId,
+            },
+        });
+        if (!response.ok || !response.body) {
+            const data: ApiResponse<unknown> = await response.json();
+            throw new Error(data.error?.message || 'An error occurred');
+        }
+
+        // One JSON event per line: progress, changes, then complete or error
+        const result: SyncResponse = { serverChanges: [], acknowledged: [], syncedAt: '' };
+        const reader = response.body.pipeThrough(new TextDecoderStream()).getReader();
+        let buffered = '';
+        for (;;) {
+            const { done, value } = await reader.read();
+            if (value) buffered += value;
+            const lines = buffered.split('\n');
+            buffered = done ? '' : lines.pop()!;
+            for (const line of lines.filter((line) => line.trim())) {
+                const event = JSON.parse(line);
+                result.serverChanges!.push(...(event.data.serverChanges ?? []));
+                result.acknowledged!.push(...(event.data.acknowledged ?? []));
+                if (event.event === 'error') {
+                    throw new Error(event.error?.message || 'An error occurred');
+                }
+                if (event.event === 'complete') {
+                    result.syncedAt = event.data.syncedAt;
+                    result.fullReloadRequired = event.data.fullReloadRequired;
+                }
+            }
+            if (done) break;
+        }
+        if (!result.syncedAt) {
+            throw new Error('Sync stream ended early');
+        }
+        return result;
+    }
+
+    /**
+     * Open the server push channel. `onChanges` receives changes committed by
+     * the user's other sessions; `onResync` is called when this client fell
+     * too far behind and should reload instead.
+     */
+    subscribeToChanges(
+        onChanges: (changes: ServerChange[]) => void,
+        onResync: () => void
+    ): EventSource {
+        const params = new URLSearchParams({ userId: this.userId, clientId: this.clientId });
+        const source = new EventSource(`${API_BASE_URL}/events?${params}`);
+        source.addEventListener('changes', (event) => {
+            onChanges(JSON.parse((event as MessageEvent).data));
+        });
+        source.addEventListener('resync', () => onResync());
+        return source;
+    }
 }
 
 export const api = new ApiClient(); 
\ No newline at end of file
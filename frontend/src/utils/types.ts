@@ -13,6 +13,14 @@ export interface CompletionEntry {
     completionNotes?: string;
 }
 
+// Maintained by the server; the entries themselves are served by /tasks/{id}/history
+export interface CompletionSummary {
+    count: number;
+    streak: number;
+    lastCompletedAt?: ISODateString | null;
+    lastNextDueDate?: ISODateString | null;
+}
+
 export interface RecurrenceRule {
     frequency: RecurrenceFrequency;
     interval: number;
@@ -40,7 +48,9 @@ export interface Task {
     createdAt: ISODateString;
     updatedAt: ISODateString;
     
+    // New entries only: the server moves them to the history archive on sync
     completionHistory: CompletionEntry[];
+    completionSummary?: CompletionSummary;
     
     recurrence?: {
         isRecurring: boolean;
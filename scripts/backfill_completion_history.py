@@ -0,0 +1,53 @@
+import sys
+from pathlib import Path
+
+# Backend modules import each other by module name, so put backend/ on the path
+backend_dir = str(Path(__file__).parent.parent.absolute() / "backend")
+sys.path.insert(0, backend_dir)
+
+from azure.cosmos import exceptions
+from cosmos_db import CosmosDBManager
+from completion_history import CompletionHistoryArchive
+
+def backfill_user(cosmos_manager: CosmosDBManager, archive: CompletionHistoryArchive, user_id: str):
+    """Move inline completion_history of a user's tasks into history buckets."""
+    moved_tasks = 0
+    moved_entries = 0
+    for task in cosmos_manager.get_user_data(user_id)["tasks"]:
+        entries = task.get("completion_history") or []
+        if not entries:
+            continue
+
+        _, summary = archive.archive(user_id, task["id"], entries, task.get("completion_summary"))
+        task["completion_history"] = []
+        task["completion_summary"] = summary
+        try:
+            # updated_at is left alone so the move does not look like a user change to sync
+            cosmos_manager.replace_item(task, etag=task.get("_etag"))
+        except exceptions.CosmosAccessConditionFailedError:
+            print(f"Task {task['id']} changed during backfill; rerun to pick it up")
+            continue
+        moved_tasks += 1
+        moved_entries += len(entries)
+
+    print(f"Backfilled {moved_entries} entries from {moved_tasks} tasks for user {user_id}")
+
+def main():
+    if len(sys.argv) < 2:
+        print("Usage:")
+        print("1. Backfill specific users: python backfill_completion_history.py <user_id> [<user_id> ...]")
+        print("2. Backfill every user: python backfill_completion_history.py --all")
+        sys.exit(1)
+
+    cosmos_manager = CosmosDBManager()
+    archive = CompletionHistoryArchive(cosmos_manager)
+    user_ids = cosmos_manager.get_user_ids() if sys.argv[1] == "--all" else sys.argv[1:]
+
+    for user_id in user_ids:
+        try:
+            backfill_user(cosmos_manager, archive, user_id)
+        except Exception as e:
+            print(f"Error backfilling user {user_id}: {str(e)}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+import os
+import sys
+import time
+import signal
+import subprocess
+import http.client
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from urllib.parse import urlparse
+
+backend_dir = Path(__file__).parent.parent.parent.absolute() / "backend"
+
+def run_connection(url: str, path: str, user_id: str, deadline: float, results: list) -> None:
+    """Send requests over one keep-alive connection until the deadline."""
+    target = urlparse(url)
+    connection = http.client.HTTPConnection(target.hostname, target.port or 80, timeout=30)
+    latencies = []
+    errors = 0
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        try:
+            connection.request("GET", path, headers={"X-User-ID": user_id})
+            response = connection.getresponse()
+            response.read()
+            if response.status != 200:
+                errors += 1
+        except (OSError, http.client.HTTPException):
+            errors += 1
+            connection.close()
+            connection = http.client.HTTPConnection(target.hostname, target.port or 80, timeout=30)
+            continue
+        latencies.append(time.perf_counter() - start)
+    connection.close()
+    results.append((latencies, errors))
+
+def run_client(url: str, path: str, user_id: str, connections: int, duration: float):
+    """One load generator process: `connections` threads, each with its own connection."""
+    deadline = time.perf_counter() + duration
+    results: list = []
+    threads = [
+        threading.Thread(target=run_connection, args=(url, path, user_id, deadline, results))
+        for _ in range(connections)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    latencies = [latency for thread_latencies, _ in results for latency in thread_latencies]
+    return latencies, sum(errors for _, errors in results)
+
+def measure(url: str, path: str, user_id: str, concurrency: int, duration: float, clients: int):
+    """Run the load from several processes so the load generator is not the bottleneck."""
+    per_client = max(1, concurrency // clients)
+    with ProcessPoolExecutor(max_workers=clients) as pool:
+        futures = [pool.submit(run_client, url, path, user_id, per_client, duration) for _ in range(clients)]
+        outcomes = [future.result() for future in futures]
+    latencies = sorted(latency for client_latencies, _ in outcomes for latency in client_latencies)
+    errors = sum(client_errors for _, client_errors in outcomes)
+    if not latencies:
+        return 0.0, 0.0, 0.0, errors
+    p50 = latencies[len(latencies) // 2] * 1000
+    p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000
+    return len(latencies) / duration, p50, p99, errors
+
+def wait_until_ready(url: str, path: str, user_id: str, timeout: float = 60) -> None:
+    target = urlparse(url)
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            connection = http.client.HTTPConnection(target.hostname, target.port or 80, timeout=5)
+            connection.request("GET", path, headers={"X-User-ID": user_id})
+            connection.getresponse().read()
+            connection.close()
+            return
+        except OSError:
+            time.sleep(0.5)
+    raise RuntimeError(f"Server at {url} did not start within {timeout} seconds")
+
+def start_server(workers: int, port: int) -> subprocess.Popen:
+    """Start the production server with `workers` workers, rate limiting and access logging off."""
+    env = dict(os.environ, WEB_CONCURRENCY=str(workers), PORT=str(port), RATE_LIMIT_ENABLED="false", ACCESS_LOG="")
+    return subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "app:app"],
+        cwd=backend_dir,
+        env=env
+    )
+
+def parse_options(args):
+    options = {"--path": "/api/v1/tasks", "--concurrency": "64", "--duration": "15",
+               "--url": "http://127.0.0.1:8000", "--workers": None, "--clients": str(os.cpu_count() or 1)}
+    for name, value in zip(args[::2], args[1::2]):
+        if name not in options:
+            raise ValueError(f"Unknown option: {name}")
+        options[name] = value
+    return options
+
+def main():
+    if len(sys.argv) < 2 or len(sys.argv) % 2 != 0:
+        print("Usage:")
+        print("1. Benchmark a running server: python bench_server_throughput.py <user_id> [--url http://127.0.0.1:8000]")
+        print("2. Start gunicorn with each worker count in turn: python bench_server_throughput.py <user_id> --workers 1,2,4")
+        print("Options: --path /api/v1/tasks --concurrency 64 --duration 15 --clients <load generator processes>")
+        sys.exit(1)
+
+    user_id = sys.argv[1]
+    options = parse_options(sys.argv[2:])
+    path = options["--path"]
+    concurrency = int(options["--concurrency"])
+    duration = float(options["--duration"])
+    clients = int(options["--clients"])
+
+    if not options["--workers"]:
+        wait_until_ready(options["--url"], path, user_id)
+        rps, p50, p99, errors = measure(options["--url"], path, user_id, concurrency, duration, clients)
+        print(f"{rps:10.1f} req/s  p50 {p50:7.1f} ms  p99 {p99:7.1f} ms  errors {errors}")
+        return
+
+    port = urlparse(options["--url"]).port or 8000
+    url = f"http://127.0.0.1:{port}"
+    print(f"{'workers':>7}  {'req/s':>10}  {'speedup':>7}  {'p50 ms':>7}  {'p99 ms':>7}  errors")
+    baseline = None
+    for workers in [int(count) for count in options["--workers"].split(",")]:
+        server = start_server(workers, port)
+        try:
+            wait_until_ready(url, path, user_id)
+            rps, p50, p99, errors = measure(url, path, user_id, concurrency, duration, clients)
+        finally:
+            server.send_signal(signal.SIGTERM)
+            server.wait()
+        baseline = baseline or rps
+        speedup = rps / baseline if baseline else 0.0
+        print(f"{workers:>7}  {rps:10.1f}  {speedup:6.2f}x  {p50:7.1f}  {p99:7.1f}  {errors}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+import sys
+import json
+import time
+import uuid
+from pathlib import Path
+
+# Backend modules import each other by module name, so put backend/ on the path
+backend_dir = str(Path(__file__).parent.parent.parent.absolute() / "backend")
+sys.path.insert(0, backend_dir)
+
+from case_conversion import camel_to_snake, snake_to_camel
+from models import DOCUMENT_ADAPTERS, parse_change_data, serialize_document
+
+def make_task_change(index: int) -> dict:
+    """A task change as the frontend sends it (camelCase)."""
+    return {
+        "id": str(uuid.uuid4()),
+        "title": f"Task {index}",
+        "status": ["notStarted", "workingOnIt", "complete"][index % 3],
+        "priority": index % 100,
+        "dynamicPriority": (index * 7) % 100,
+        "effort": index % 10,
+        "notes": "Some notes about the task " * 4,
+        "dueDate": "2024-06-01T00:00:00+00:00",
+        "scheduledDate": None,
+        "tags": ["home", "errands"],
+        "completionSummary": {"count": 3, "streak": 2, "lastCompletedAt": "2024-05-01T00:00:00+00:00"},
+        "recurrence": {
+            "isRecurring": True,
+            "rule": {"frequency": "weekly", "interval": 1, "daysOfWeek": [1, 3, 5]},
+        },
+    }
+
+def to_stored(item_data: dict) -> dict:
+    """What apply_change adds before writing, plus the system fields Cosmos DB returns."""
+    stored = dict(item_data)
+    stored.update({
+        "user_id": "bench-user",
+        "type": "task",
+        "updated_at": "2024-06-01T00:00:00+00:00",
+        "created_at": "2024-06-01T00:00:00+00:00",
+        "_rid": "rid", "_etag": "\"etag\"", "_ts": 1717200000,
+    })
+    return stored
+
+def dict_pipeline(changes):
+    stored = [to_stored(camel_to_snake(change)) for change in changes]
+    return json.dumps([snake_to_camel(item) for item in stored])
+
+def model_pipeline(changes):
+    stored = [to_stored(parse_change_data("task", change)) for change in changes]
+    return json.dumps([serialize_document(item) for item in stored])
+
+def model_pipeline_json(changes):
+    """Validation plus JSON encoding of the whole batch in pydantic-core."""
+    adapter = DOCUMENT_ADAPTERS["task"]
+    stored = [to_stored(adapter.dump_python(adapter.validate_python(change), exclude_unset=True)) for change in changes]
+    documents = [adapter.validate_python(item) for item in stored]
+    return b"[" + b",".join(adapter.dump_json(document, by_alias=True, exclude_unset=True) for document in documents) + b"]"
+
+def bench(name, fn, changes, repeat):
+    fn(changes)  # warm up
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(changes)
+        best = min(best, time.perf_counter() - start)
+    per_item = best / len(changes) * 1e6
+    print(f"{name:<22} {len(changes):>6} changes  {best * 1000:9.1f} ms  {per_item:7.1f} us/change")
+
+def main():
+    sizes = [int(arg) for arg in sys.argv[1:]] or [100, 1000, 10000]
+    for size in sizes:
+        changes = [make_task_change(i) for i in range(size)]
+        repeat = 5 if size <= 1000 else 2
+        bench("dict (humps)", dict_pipeline, changes, repeat)
+        bench("models", model_pipeline, changes, repeat)
+        bench("models (dump_json)", model_pipeline_json, changes, repeat)
+        print()
+
+if __name__ == "__main__":
+    main()
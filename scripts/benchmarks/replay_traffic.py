@@ -0,0 +1,154 @@
+import sys
+import json
+import time
+import uuid
+import threading
+import http.client
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from urllib.parse import urlparse
+
+def load_entries(paths):
+    """Read recorded requests from log files (or directories of them), oldest first."""
+    entries = []
+    for path in map(Path, paths):
+        files = sorted(path.glob("*.ndjson")) if path.is_dir() else [path]
+        for file in files:
+            with open(file, encoding="utf-8") as log:
+                entries.extend(json.loads(line) for line in log if line.strip())
+    return sorted(entries, key=lambda entry: entry["w"])
+
+class Timeline:
+    """Maps recorded wall-clock times onto the replay's, compressed by the replay speed."""
+
+    def __init__(self, recorded_start: float, replay_start: float, speed: float):
+        self.recorded_start = recorded_start
+        self.replay_start = replay_start
+        self.speed = speed or 1
+
+    def shift(self, value):
+        try:
+            recorded = datetime.fromisoformat(value.replace("Z", "+00:00"))
+        except (AttributeError, ValueError):
+            return value
+        if recorded.tzinfo is None:
+            recorded = recorded.replace(tzinfo=timezone.utc)
+        offset = (recorded.timestamp() - self.recorded_start) / self.speed
+        return (datetime.fromtimestamp(self.replay_start, timezone.utc) + timedelta(seconds=offset)).isoformat()
+
+def build_body(entry, timeline: Timeline):
+    body = entry.get("b")
+    if body is None:
+        return None
+    if entry["p"] == "/api/v1/sync":
+        # clientLastSync gaps and change times keep their shape in the replay; the
+        # mapping is fixed, so a retried request gets the same body as the original
+        body = dict(body)
+        body["clientLastSync"] = timeline.shift(body.get("clientLastSync"))
+        body["changes"] = [
+            dict(change, timestamp=timeline.shift(change.get("timestamp")))
+            for change in body.get("changes") or []
+        ]
+    return json.dumps(body).encode("utf-8")
+
+class Replayer:
+    def __init__(self, url: str, timeline: Timeline):
+        self.target = urlparse(url)
+        self.timeline = timeline
+        # Idempotency keys are scoped to this run, so replaying a log twice applies it twice
+        self.run_id = uuid.uuid4().hex[:8]
+        self.local = threading.local()
+        self.lock = threading.Lock()
+        self.results = []  # (path, latency seconds, status, lag seconds)
+
+    def connection(self) -> http.client.HTTPConnection:
+        if getattr(self.local, "connection", None) is None:
+            self.local.connection = http.client.HTTPConnection(self.target.hostname, self.target.port or 80, timeout=60)
+        return self.local.connection
+
+    def send(self, entry, due: float) -> None:
+        lag = time.perf_counter() - due
+        headers = {"X-User-ID": entry["u"], "Content-Type": "application/json"}
+        if entry.get("k"):
+            headers["Idempotency-Key"] = f"{self.run_id}:{entry['k']}"
+        path = entry["p"] + (f"?{entry['q']}" if entry.get("q") else "")
+        body = build_body(entry, self.timeline)
+        start = time.perf_counter()
+        try:
+            connection = self.connection()
+            connection.request(entry["m"], path, body=body, headers=headers)
+            response = connection.getresponse()
+            response.read()
+            status = response.status
+        except (OSError, http.client.HTTPException):
+            self.local.connection = None
+            status = 0
+        with self.lock:
+            self.results.append((entry["p"], time.perf_counter() - start, status, lag))
+
+def percentile(values, fraction: float) -> float:
+    return values[min(len(values) - 1, int(len(values) * fraction))] if values else 0.0
+
+def report(entries, results, elapsed: float) -> None:
+    print(f"Replayed {len(results)} requests in {elapsed:.1f} s ({len(results) / elapsed if elapsed else 0:.1f} req/s)")
+    print(f"{'path':<20} {'count':>6} {'errors':>6} {'p50 ms':>8} {'p90 ms':>8} {'p99 ms':>8} {'max ms':>8}  recorded p50/p99 ms")
+    for path in sorted({entry["p"] for entry in entries}):
+        latencies = sorted(latency * 1000 for result_path, latency, _, _ in results if result_path == path)
+        errors = sum(1 for result_path, _, status, _ in results if result_path == path and not 200 <= status < 300)
+        recorded = sorted(entry["d"] for entry in entries if entry["p"] == path)
+        print(
+            f"{path:<20} {len(latencies):>6} {errors:>6} {percentile(latencies, 0.5):8.1f} {percentile(latencies, 0.9):8.1f} "
+            f"{percentile(latencies, 0.99):8.1f} {(latencies[-1] if latencies else 0):8.1f}  "
+            f"{percentile(recorded, 0.5):.1f}/{percentile(recorded, 0.99):.1f}"
+        )
+    lags = sorted(lag for _, _, _, lag in results)
+    print(f"Schedule lag p99 {percentile(lags, 0.99) * 1000:.1f} ms (high values mean the replayer could not keep up)")
+
+def parse_options(args):
+    options = {"--url": "http://127.0.0.1:8000", "--speed": "1", "--concurrency": "64", "--limit": None}
+    paths = []
+    index = 0
+    while index < len(args):
+        if args[index] in options:
+            options[args[index]] = args[index + 1]
+            index += 2
+        elif args[index].startswith("--"):
+            raise ValueError(f"Unknown option: {args[index]}")
+        else:
+            paths.append(args[index])
+            index += 1
+    return paths, options
+
+def main():
+    paths, options = parse_options(sys.argv[1:])
+    if not paths:
+        print("Usage:")
+        print("1. Replay at recorded speed: python replay_traffic.py <log file or directory> [...] --url http://127.0.0.1:8000")
+        print("2. Replay 10x faster: python replay_traffic.py <log directory> --speed 10")
+        print("3. Replay as fast as possible: python replay_traffic.py <log directory> --speed 0 --concurrency 64")
+        print("Options: --limit <requests>. Run the server with RATE_LIMIT_ENABLED=false.")
+        sys.exit(1)
+
+    entries = load_entries(paths)
+    if options["--limit"]:
+        entries = entries[:int(options["--limit"])]
+    if not entries:
+        print("No recorded requests found")
+        sys.exit(1)
+    speed = float(options["--speed"])
+
+    first = entries[0]["w"]
+    replayer = Replayer(options["--url"], Timeline(first, time.time(), speed))
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=int(options["--concurrency"])) as pool:
+        for entry in entries:
+            due = start + ((entry["w"] - first) / speed if speed else 0)
+            delay = due - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            pool.submit(replayer.send, entry, due)
+    report(entries, replayer.results, time.perf_counter() - start)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+import sys
+import time
+import json
+from pathlib import Path
+
+# Backend modules import each other by module name, so put backend/ on the path
+backend_dir = str(Path(__file__).parent.parent.absolute() / "backend")
+sys.path.insert(0, backend_dir)
+
+from cosmos_db import CosmosDBManager, PARTITION_SCHEMES, partition_bucket
+
+# Cosmos DB system properties; regenerated by the target container
+SYSTEM_PROPERTIES = ["_rid", "_self", "_etag", "_attachments", "_ts"]
+
+POLL_INTERVAL_SECONDS = 5
+
+def state_path(target_container_id: str) -> Path:
+    return Path(__file__).parent / f".migrate_{target_container_id}.json"
+
+def load_continuation(target_container_id: str):
+    path = state_path(target_container_id)
+    if not path.exists():
+        return None
+    return json.loads(path.read_text()).get("continuation")
+
+def save_continuation(target_container_id: str, continuation) -> None:
+    state_path(target_container_id).write_text(json.dumps({"continuation": continuation}))
+
+def copy_changes(source: CosmosDBManager, target: CosmosDBManager, continuation=None):
+    """
+    Upsert every document changed since `continuation` (all documents when None)
+    into the target container. Returns the number copied and the new continuation.
+    """
+    feed = source.container.query_items_change_feed(
+        is_start_from_beginning=continuation is None,
+        continuation=continuation
+    )
+    copied = 0
+    for item in feed:
+        document = {key: value for key, value in item.items() if key not in SYSTEM_PROPERTIES}
+        if len(target.partition_paths) == 3:
+            document["partition_bucket"] = partition_bucket(document)
+        # upsert keeps user_id/updated_at as they are, so sync sees no change
+        target._call("upsert_item", lambda: target.container.upsert_item(body=document))
+        copied += 1
+    return copied, source.container.client_connection.last_response_headers.get("etag") or continuation
+
+def remove_deleted(source: CosmosDBManager, target: CosmosDBManager) -> int:
+    """Delete target documents whose source document was deleted (the change feed does not carry deletes)."""
+    query = "SELECT c.id, c.user_id, c.type FROM c"
+    source_ids = {
+        (item["user_id"], item["id"])
+        for item in source.container.query_items(query=query, enable_cross_partition_query=True)
+    }
+    removed = 0
+    for item in target.container.query_items(query=query, enable_cross_partition_query=True):
+        if (item["user_id"], item["id"]) not in source_ids:
+            target.delete_item(item["id"], item["user_id"], item.get("type"))
+            removed += 1
+    return removed
+
+def main():
+    if len(sys.argv) < 3 or sys.argv[2] not in PARTITION_SCHEMES:
+        print("Usage:")
+        print("1. Copy, then keep copying new changes: python migrate_partition_key.py <target_container> <scheme> --follow")
+        print("2. Final pass after writes are paused: python migrate_partition_key.py <target_container> <scheme> --reconcile")
+        print(f"Schemes: {', '.join(PARTITION_SCHEMES)}")
+        print("The source is COSMOS_CONTAINER_ID with COSMOS_PARTITION_SCHEME.")
+        sys.exit(1)
+
+    target_container_id, scheme = sys.argv[1], sys.argv[2]
+    follow = "--follow" in sys.argv[3:]
+    reconcile = "--reconcile" in sys.argv[3:]
+
+    source = CosmosDBManager()
+    target = CosmosDBManager(cosmos_container_id=target_container_id, partition_scheme=scheme)
+    if source.cosmos_container_id == target_container_id:
+        print("Target container must differ from the source container")
+        sys.exit(1)
+
+    continuation = load_continuation(target_container_id)
+    while True:
+        try:
+            copied, continuation = copy_changes(source, target, continuation)
+        except Exception as e:
+            print(f"Error copying changes: {str(e)}")
+            raise
+        save_continuation(target_container_id, continuation)
+        if copied:
+            print(f"Copied {copied} documents to {target_container_id}")
+        if not follow:
+            break
+        time.sleep(POLL_INTERVAL_SECONDS)
+
+    if reconcile:
+        removed = remove_deleted(source, target)
+        print(f"Removed {removed} documents deleted from the source")
+        print(f"Ready: set COSMOS_CONTAINER_ID={target_container_id} and COSMOS_PARTITION_SCHEME={scheme}")
+
+if __name__ == "__main__":
+    main()
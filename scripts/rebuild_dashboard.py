@@ -0,0 +1,37 @@
+import sys
+from pathlib import Path
+
+# Backend modules import each other by module name, so put backend/ on the path
+backend_dir = str(Path(__file__).parent.parent.absolute() / "backend")
+sys.path.insert(0, backend_dir)
+
+from cosmos_db import CosmosDBManager
+from dashboard import DashboardAggregator
+
+def rebuild_dashboards(cosmos_manager: CosmosDBManager, user_ids):
+    """Recompute dashboard aggregates from scratch for the given users."""
+    aggregator = DashboardAggregator(cosmos_manager)
+    for user_id in user_ids:
+        try:
+            dashboard = aggregator.rebuild(user_id)
+            print(f"Rebuilt dashboard for {user_id}: {dashboard['task_count']} tasks")
+        except Exception as e:
+            print(f"Error rebuilding dashboard for {user_id}: {str(e)}")
+
+def main():
+    if len(sys.argv) < 2:
+        print("Usage:")
+        print("1. Rebuild specific users: python rebuild_dashboard.py <user_id> [<user_id> ...]")
+        print("2. Rebuild every user: python rebuild_dashboard.py --all")
+        sys.exit(1)
+
+    cosmos_manager = CosmosDBManager()
+    if sys.argv[1] == "--all":
+        user_ids = cosmos_manager.get_user_ids()
+    else:
+        user_ids = sys.argv[1:]
+
+    rebuild_dashboards(cosmos_manager, user_ids)
+
+if __name__ == "__main__":
+    main()
@@ -23,7 +23,7 @@ def cleanup_test_data(cosmos_manager: CosmosDBManager, user_id: str):
         
         # Delete each item
         for item in items:
-            cosmos_manager.delete_item(item['id'], user_id)
+            cosmos_manager.delete_item(item['id'], user_id, item.get('type'))
             print(f"Deleted existing item: {item['id']}")
         
         print(f"Cleaned up {len(items)} existing items for user {user_id}")